@@ -3,6 +3,7 @@ import uuid
 import json
 import urllib.request
 import urllib.parse
+import httpx
 from openai import OpenAI
 
 # ComfyUI API Client
@@ -76,3 +77,100 @@ class ComfyUIClient:
         ws = websocket.WebSocket()
         ws.connect(ws_url.format(self.client_id))
         return ws
+
+
+# Async ComfyUI API Client (pooled keep-alive connections)
+class AsyncComfyUIClient:
+    """
+    Non-blocking counterpart of ComfyUIClient.
+    A single instance keeps a pool of keep-alive HTTP connections to one ComfyUI server,
+    so it should be shared (see services.comfyui_service.get_comfyui_client) rather than created per call.
+    """
+    def __init__(self, server_address, pool_size=8, timeout=30.0, connect_timeout=5.0):
+        self.server_address = server_address
+        self.client_id = str(uuid.uuid4())
+        self.base_url = "http://{}".format(server_address)
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=60.0),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        )
+
+    async def queue_prompt(self, prompt):
+        p = {"prompt": prompt, "client_id": self.client_id}
+        response = await self._http.post("/prompt", json=p)
+        if response.status_code >= 400:
+            print(f"HTTP Error {response.status_code}: {response.text}")
+            response.raise_for_status()
+        return response.json()
+
+    async def get_image(self, filename, subfolder, folder_type):
+        params = {"filename": filename, "subfolder": subfolder, "type": folder_type}
+        response = await self._http.get("/view", params=params)
+        response.raise_for_status()
+        return response.content
+
+    async def get_history(self, prompt_id):
+        response = await self._http.get("/history/{}".format(prompt_id))
+        response.raise_for_status()
+        return response.json()
+
+    async def get_object_info(self, node_class=None):
+        """Get object info (metadata) for a node class or all nodes"""
+        url = "/object_info"
+        if node_class:
+            url += "/{}".format(node_class)
+        response = await self._http.get(url)
+        response.raise_for_status()
+        return response.json()
+
+    async def upload_image(self, image_data, filename="reference.png", subfolder="inputs", overwrite=True):
+        """Upload image to ComfyUI input directory (multipart/form-data)"""
+        files = {'image': (filename, image_data)}
+        data = {'overwrite': str(overwrite).lower(), 'subfolder': subfolder}
+        response = await self._http.post("/upload/image", files=files, data=data)
+        return response.json()
+
+    async def free_memory(self, unload_models=True, free_memory=True):
+        """Call ComfyUI /free endpoint to clear VRAM"""
+        data = {"unload_models": unload_models, "free_memory": free_memory}
+        try:
+            response = await self._http.post("/free", json=data)
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            print(f"Failed to free memory: {e}")
+            return False
+
+    async def get_system_stats(self):
+        """Get device / VRAM statistics (/system_stats)"""
+        response = await self._http.get("/system_stats")
+        response.raise_for_status()
+        return response.json()
+
+    async def get_queue(self):
+        """Get running/pending prompts ({"queue_running": [...], "queue_pending": [...]})"""
+        response = await self._http.get("/queue")
+        response.raise_for_status()
+        return response.json()
+
+    async def delete_from_queue(self, prompt_ids):
+        """Remove pending prompts from the ComfyUI queue (running prompts are not affected)"""
+        try:
+            response = await self._http.post("/queue", json={"delete": list(prompt_ids)})
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            print(f"Failed to delete queued prompts: {e}")
+            return False
+
+    async def ping(self):
+        """Return True if the server answers on its HTTP port"""
+        try:
+            response = await self._http.get("/system_stats", timeout=httpx.Timeout(2.0, connect=1.0))
+            return response.status_code < 500
+        except Exception:
+            return False
+
+    async def aclose(self):
+        await self._http.aclose()
@@ -1,6 +1,8 @@
 ﻿import os
 import json
+import threading
 from .paths import CONFIG_PATH
+from .utils import atomic_write_json
 
 DEFAULT_PROMPTS = {
     "protagonist_prompt": '''A majestic wild animal (specific species determined by story), detailed fur/skin texture, bright expressive eyes, natural lighting, photorealistic, 8k uhd, national geographic style''',
@@ -378,21 +380,97 @@ JSON array: [{"title": "Korean Title", "style": "category", "hook": "Why this wo
 }
 
 # Config helpers
+class FrozenDict(dict):
+    """Read-only dict (json.dumps and FastAPI still see a plain dict)"""
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("config snapshot is read-only; use load_config() for an editable copy")
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+def thaw(value):
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+class ConfigSnapshot(FrozenDict):
+    """Immutable view of config.json. `version` increases every time the file content changes."""
+    def __init__(self, data: dict, version: int):
+        super().__init__((k, freeze(v)) for k, v in data.items())
+        self.version = version
+
+def _read_config_file():
+    with open(CONFIG_PATH, 'r', encoding='utf-8-sig') as f:
+        config = json.load(f)
+    # 기본 프롬프트 병합 (사용자 설정이 없으면 기본값 사용)
+    if "prompts" not in config:
+        config["prompts"] = {}
+    for key, value in DEFAULT_PROMPTS.items():
+        # Migration: if the prompt is missing, empty, or contains the old animal rescue persona, update to new default
+        current_val = config["prompts"].get(key, "")
+        if not current_val or "animal rescue" in current_val.lower() or "A Dog's Fight for Survival" in current_val:
+            config["prompts"][key] = value
+    return config
+
+def _file_signature():
+    try:
+        st = os.stat(CONFIG_PATH)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+_config_lock = threading.Lock()
+_snapshot = None
+_signature = None
+_version = 0
+
+def _set_snapshot(data: dict, signature):
+    global _snapshot, _signature, _version
+    _version += 1
+    _snapshot = ConfigSnapshot(data, _version)
+    _signature = signature
+    return _snapshot
+
+def get_config() -> ConfigSnapshot:
+    """
+    Current config as an immutable, versioned snapshot.
+    config.json is only re-parsed when its mtime or size changes; otherwise this is one stat().
+    Take a snapshot once per job to see consistent settings throughout.
+    """
+    signature = _file_signature()
+    snapshot = _snapshot
+    if snapshot is not None and signature == _signature:
+        return snapshot
+    with _config_lock:
+        if _snapshot is not None and signature == _signature:
+            return _snapshot
+        if signature is None:
+            return _set_snapshot({"openai_api_key": "", "comfyui_path": "", "prompts": DEFAULT_PROMPTS.copy()}, None)
+        try:
+            return _set_snapshot(_read_config_file(), signature)
+        except (OSError, ValueError) as e:
+            # Unreadable file (e.g. edited by hand mid-save): keep serving the last good snapshot
+            if _snapshot is not None:
+                print(f"[Config] Failed to reload config.json: {e}")
+                return _snapshot
+            raise
+
 def load_config():
-    if os.path.exists(CONFIG_PATH):
-        with open(CONFIG_PATH, 'r', encoding='utf-8-sig') as f:
-            config = json.load(f)
-            # 기본 프롬프트 병합 (사용자 설정이 없으면 기본값 사용)
-            if "prompts" not in config:
-                config["prompts"] = {}
-            for key, value in DEFAULT_PROMPTS.items():
-                # Migration: if the prompt is missing, empty, or contains the old animal rescue persona, update to new default
-                current_val = config["prompts"].get(key, "")
-                if not current_val or "animal rescue" in current_val.lower() or "A Dog's Fight for Survival" in current_val:
-                    config["prompts"][key] = value
-            return config
-    return {"openai_api_key": "", "comfyui_path": "", "prompts": DEFAULT_PROMPTS.copy()}
+    """Editable copy of the current config (pass it to save_config to persist changes)"""
+    return thaw(get_config())
 
 def save_config(config):
-    with open(CONFIG_PATH, 'w', encoding='utf-8-sig') as f:
-        json.dump(config, f, ensure_ascii=False, indent=4)
\ No newline at end of file
+    """Atomically replace config.json (temp file + rename) and refresh the cached snapshot"""
+    with _config_lock:
+        atomic_write_json(CONFIG_PATH, thaw(config), encoding='utf-8-sig', ensure_ascii=False, indent=4)
+        _set_snapshot(_read_config_file(), _file_signature())
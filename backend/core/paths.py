@@ -7,6 +7,10 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 ASSETS_DIR = os.path.join(BASE_DIR, "assets")
 OUTPUTS_DIR = os.path.join(BASE_DIR, "outputs")
 CONFIG_PATH = os.path.join(BASE_DIR, "config.json")
+# Rebuildable local state (indexes, caches)
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+# Queued / running jobs (not rebuildable, kept outside CACHE_DIR)
+JOBS_DB_PATH = os.path.join(BASE_DIR, "jobs.sqlite3")
 
 # Ensure directories exist
 if not os.path.exists(OUTPUTS_DIR):
@@ -14,3 +18,6 @@ if not os.path.exists(OUTPUTS_DIR):
 
 if not os.path.exists(ASSETS_DIR):
     os.makedirs(ASSETS_DIR)
+
+if not os.path.exists(CACHE_DIR):
+    os.makedirs(CACHE_DIR)
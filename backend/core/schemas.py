@@ -12,6 +12,20 @@ class SettingsUpdate(BaseModel):
     sampler_name: str | None = None
     scheduler: str | None = None
     prompts: dict | None = None
+    comfyui_servers: List[str] | None = None
+    queue_ahead_depth: int | None = None
+    vram_policy: str | None = None
+    vram_min_free_ratio: float | None = None
+    vram_every_n: int | None = None
+    llm_rpm: int | None = None
+    llm_tpm: int | None = None
+    llm_max_concurrency: int | None = None
+    preview_mode: str | None = None
+    preview_width: int | None = None
+    preview_format: str | None = None
+    download_cache_enabled: bool | None = None
+    max_concurrent_jobs: int | None = None
+    max_inflight_prompts: int | None = None
 
 # Drafts
 class DraftRequest(BaseModel):
@@ -77,6 +91,8 @@ class QueueRequest(BaseModel):
     characterPrompt: str = ""
     referenceImage: str = ""
     skip_generation: bool = False
+    priority: str = "normal"  # high | normal | low
 
 class ControlRequest(BaseModel):
     action: str
+    jobId: str = ""
@@ -1,6 +1,9 @@
+import os
 import time
 import re
 import json
+import base64
+import tempfile
 
 def get_time():
     return time.strftime("%Y%m%d-%H%M%S")
@@ -14,6 +17,28 @@ def clean_string(s: str) -> str:
     s = str(s).replace('\n', ' ').replace('\r', ' ').replace('\t', ' ')
     return "".join(c for c in s if c.isprintable() or ord(c) > 127).strip()
 
+def atomic_write_json(path: str, data, **dump_kwargs):
+    """Write JSON to a temp file in the same directory, then rename it over `path`"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding=dump_kwargs.pop("encoding", "utf-8")) as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def encode_data_uri(path: str, media_type: str) -> str:
+    """data: URI of a file (blocking; run it in a thread for large files)"""
+    with open(path, "rb") as f:
+        return f"data:{media_type};base64,{base64.b64encode(f.read()).decode('utf-8')}"
+
 def create_sse_event(data: dict):
     return {"event": "message", "data": json.dumps(data)}
 
@@ -77,3 +102,63 @@ def robust_parse_json(text: str):
         pass
 
     return None
+
+def shingles(text: str, size: int = 3) -> set:
+    """Character n-grams of a whitespace/punctuation-normalized string (works for Korean and English)"""
+    normalized = re.sub(r'[\W_]+', " ", (text or "").lower()).strip()
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+def jaccard_similarity(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class StreamingArrayParser:
+    """
+    Incremental parser for streamed JSON such as {"cuts": [{...}, {...}]}.
+    feed() returns every object element of the first array as soon as its closing brace arrives,
+    so items can be forwarded before the whole response is complete.
+    """
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0            # nesting depth relative to the start of the document
+        self._array_depth = None   # depth inside the target array
+        self._item_start = None
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> list:
+        self.buffer += text
+        items = []
+        while self._pos < len(self.buffer):
+            ch = self.buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._array_depth is None:
+                    self._array_depth = self._depth
+                elif ch == "{" and self._array_depth is not None and self._depth == self._array_depth + 1:
+                    self._item_start = self._pos
+            elif ch in "}]":
+                if ch == "}" and self._item_start is not None and self._depth == self._array_depth + 1:
+                    try:
+                        items.append(json.loads(self.buffer[self._item_start:self._pos + 1]))
+                    except ValueError:
+                        pass
+                    self._item_start = None
+                elif ch == "]" and self._depth == self._array_depth:
+                    self._array_depth = -1  # target array closed; ignore later arrays
+                self._depth -= 1
+            self._pos += 1
+        return items
@@ -1,28 +1,117 @@
 import psutil
-import time
+from typing import Optional
 
 class VRAMGuard:
     """
-    Monitors System Memory (and hypothetically GPU VRAM via nvidia-smi if accessible).
-    Since we cannot directly access GPU memory from standard python without torch/pynvml,
-    this creates the structure for the 'Free Memory' logic.
+    Decides when to ask ComfyUI to release memory (POST /free).
+
+    Unloading after every cut forces the checkpoint, CLIP vision and IPAdapter models to be
+    reloaded for the next one, so memory is only freed when the policy asks for it:
+      - "never":           leave model management to ComfyUI
+      - "always":          free after every cut (legacy behaviour)
+      - "on_model_change": unload before a cut that needs a different model set than the node has loaded
+      - "threshold":       free when the node's free VRAM (from /system_stats) drops below a limit
+      - "every_n":         free after every N cuts on a node
+    State is tracked per ComfyUI node; use get_vram_guard() so jobs sharing a node share it.
     """
-    def __init__(self, high_water_mark_gb=10.0):
+    MODES = ("never", "always", "on_model_change", "threshold", "every_n")
+
+    def __init__(self, mode="threshold", min_free_ratio=0.15, min_free_gb=None, every_n=10, high_water_mark_gb=10.0):
+        self.mode = mode if mode in self.MODES else "threshold"
+        self.min_free_ratio = min_free_ratio
+        self.min_free_bytes = min_free_gb * 1024**3 if min_free_gb else None
+        self.every_n = max(1, int(every_n))
         self.high_water_mark = high_water_mark_gb * 1024**3
-    
+        self._cuts_since_free = {}  # node -> count
+        self._loaded_model = {}     # node -> model key of the last submitted cut
+        self.free_count = 0
+
+    @classmethod
+    def from_config(cls, config: dict):
+        return cls(
+            mode=config.get("vram_policy", "threshold"),
+            min_free_ratio=float(config.get("vram_min_free_ratio", 0.15)),
+            min_free_gb=config.get("vram_min_free_gb"),
+            every_n=config.get("vram_every_n", 10),
+        )
+
     def check_memory(self):
         """
-        Returns True if memory usage is safe, False if critical.
+        Returns True if host memory usage is safe, False if critical.
         """
         mem = psutil.virtual_memory()
-        # In a real VRAM context, we would query `nvidia-smi` or `torch.cuda.memory_allocated()`
-        return True 
+        return mem.used < self.high_water_mark or mem.available > mem.total * self.min_free_ratio
+
+    def is_vram_low(self, stats: dict) -> bool:
+        """True if any device in a ComfyUI /system_stats payload is below the free-memory limit"""
+        for device in (stats or {}).get("devices", []):
+            total = device.get("vram_total") or 0
+            free = device.get("vram_free")
+            if not total or free is None:
+                continue
+            if self.min_free_bytes is not None and free < self.min_free_bytes:
+                return True
+            if free / total < self.min_free_ratio:
+                return True
+        return False
+
+    async def force_cleanup(self, client, node: str = None, unload_models=True):
+        """Ask ComfyUI to unload models and free cached memory"""
+        freed = await client.free_memory(unload_models=unload_models, free_memory=True)
+        if freed:
+            self.free_count += 1
+            if node is not None:
+                self._cuts_since_free[node] = 0
+                if unload_models:
+                    self._loaded_model.pop(node, None)
+        return freed
 
-    def force_cleanup(self):
+    async def before_submit(self, client, node: str, model_key: str):
         """
-        Simulates the VRAM cleanup command.
-        In production, this would make an API call to ComfyUI to 'unload_models' or run garbage collection.
+        Call before queueing a cut on `node`.
+        Returns a reason string if memory was freed, else None.
         """
-        print("[VRAMGuard] Triggering Garbage Collection & Model Unload...")
-        # Placeholder for actual ComfyUI API call
-        return True
+        previous = self._loaded_model.get(node)
+        reason = None
+        if self.mode == "on_model_change" and previous is not None and previous != model_key:
+            if await self.force_cleanup(client, node):
+                reason = "model change"
+        self._loaded_model[node] = model_key
+        return reason
+
+    async def after_cut(self, client, node: str):
+        """
+        Call after a cut finished on `node`.
+        Returns a reason string if memory was freed, else None.
+        """
+        count = self._cuts_since_free.get(node, 0) + 1
+        self._cuts_since_free[node] = count
+
+        if self.mode == "always":
+            return "every cut" if await self.force_cleanup(client, node) else None
+        if self.mode == "every_n" and count >= self.every_n:
+            return f"every {self.every_n} cuts" if await self.force_cleanup(client, node) else None
+        if self.mode == "threshold":
+            try:
+                stats = await client.get_system_stats()
+            except Exception as e:
+                print(f"[VRAMGuard] system_stats unavailable: {e}")
+                return None
+            if self.is_vram_low(stats):
+                return "low VRAM" if await self.force_cleanup(client, node) else None
+        return None
+
+_guard: Optional[VRAMGuard] = None
+
+def get_vram_guard(config: dict) -> VRAMGuard:
+    """Process-wide guard keyed by node; the policy follows the current config"""
+    global _guard
+    configured = VRAMGuard.from_config(config)
+    if _guard is None:
+        _guard = configured
+    else:
+        _guard.mode = configured.mode
+        _guard.min_free_ratio = configured.min_free_ratio
+        _guard.min_free_bytes = configured.min_free_bytes
+        _guard.every_n = configured.every_n
+    return _guard
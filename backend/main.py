@@ -9,10 +9,23 @@ from fastapi.staticfiles import StaticFiles
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.core.paths import OUTPUTS_DIR, ASSETS_DIR, BASE_DIR
-from backend.routers import workflow, settings, history
+from backend.routers import workflow, settings, history, thumbnails
+from backend.services.comfyui_service import close_comfyui_clients
+from backend.services.comfyui_events import close_event_listeners
+from backend.services.openai_service import close_openai_clients
+from backend.services.thumbnails import get_thumbnail_service
+from backend.services.io_writer import shutdown_io_writer
 
 app = FastAPI()
 
+@app.on_event("shutdown")
+async def shutdown_clients():
+    await close_event_listeners()
+    await close_comfyui_clients()
+    await close_openai_clients()
+    get_thumbnail_service().shutdown()
+    shutdown_io_writer()
+
 # Input/Output Directories
 if not os.path.exists(OUTPUTS_DIR):
     os.makedirs(OUTPUTS_DIR)
@@ -36,6 +49,7 @@ app.mount("/assets", StaticFiles(directory=ASSETS_DIR), name="assets")
 app.include_router(workflow.router)
 app.include_router(settings.router)
 app.include_router(history.router)
+app.include_router(thumbnails.router)
 # (Optional) app.include_router(resources.router) if needed later
 
 # Serve Frontend (Optional/Fallthrough)
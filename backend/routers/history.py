@@ -1,71 +1,61 @@
 import os
+import asyncio
 import shutil
 import platform
 import subprocess
 import urllib.parse
 from fastapi import APIRouter
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from sse_starlette.sse import EventSourceResponse
 from backend.core.paths import OUTPUTS_DIR
+from backend.core.config import get_config
+from backend.core.utils import create_sse_event
 from backend.services.openai_service import generate_veo_prompts_for_history
+from backend.services.veo_backfill import get_veo_backfill
+from backend.services.history_index import get_history_index
+from backend.services.project_store import read_project, update_meta, compact
+from backend.services.project_archive import project_files, content_fingerprint, iter_zip, get_archive_cache
 
 router = APIRouter(prefix="/api/history", tags=["history"])
 
 @router.get("")
-async def get_history():
-    """Get list of generated projects"""
-    projects = []
+async def get_history(limit: int = None, cursor: str = None, sort: str = "folder_name", order: str = "desc", fields: str = "summary"):
+    """
+    List generated projects from the history index.
+    limit/cursor: keyset pagination (pass back nextCursor); sort: folder_name|created_at|title|cuts;
+    fields: "summary" (no cuts_data) or "full".
+    """
     if not os.path.exists(OUTPUTS_DIR):
-        return {"projects": []}
-        
-    for name in os.listdir(OUTPUTS_DIR):
-        path = os.path.join(OUTPUTS_DIR, name)
-        if os.path.isdir(path):
-            # Try to read metadata
-            meta_path = os.path.join(path, "metadata.json")
-            if os.path.exists(meta_path):
-                import json
-                try:
-                    with open(meta_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        if "created_at" in data and "timestamp" not in data:
-                            data["timestamp"] = data["created_at"]
-                        data["folder_name"] = name
-                        data["id"] = name
-                        
-                        # Find first image for thumbnail
-                        data["thumbnails"] = []
-                        for img in os.listdir(path):
-                            if img.endswith(('.png', '.jpg')) and "reference" not in img and "chain" not in img:
-                                data["thumbnails"].append(f"/outputs/{name}/{img}")
-                                break
-                                
-                        projects.append(data)
-                except: pass
-    
-    # Sort by creation time desc
-    projects.sort(key=lambda x: x.get("folder_name", ""), reverse=True)
-    return {"projects": projects}
+        return {"projects": [], "nextCursor": None, "total": 0}
+    return await asyncio.to_thread(get_history_index().list_projects, limit, cursor, sort, order, fields)
+
+@router.get("/veo-backfill/stream")
+async def veo_backfill_stream(folders: str = None):
+    """Backfill missing Veo prompts over SSE; `folders` is comma separated (all projects if omitted)"""
+    folder_names = [f for f in folders.split(",") if f.strip()] if folders else None
+
+    async def event_generator():
+        async for event in get_veo_backfill().run(folder_names):
+            yield create_sse_event(event)
+
+    return EventSourceResponse(event_generator())
 
 @router.post("/{folder_name}/title")
 async def update_project_title(folder_name: str, req: dict):
-    from backend.core.paths import OUTPUTS_DIR
-    import json
-    
     folder_name = urllib.parse.unquote(folder_name)
     path = os.path.join(OUTPUTS_DIR, folder_name)
     meta_path = os.path.join(path, "metadata.json")
     
     if os.path.exists(meta_path):
         try:
-            with open(meta_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            data["title"] = req.get("title", data.get("title"))
+            data = await asyncio.to_thread(read_project, path) or {}
+            title = req.get("title", data.get("title"))
             
-            with open(meta_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+            # Appended to the project log instead of rewriting metadata.json
+            await asyncio.to_thread(update_meta, path, {"title": title})
+            await asyncio.to_thread(get_history_index().upsert_project, folder_name)
                 
-            return {"success": True, "title": data["title"]}
+            return {"success": True, "title": title}
         except Exception as e:
             return {"success": False, "error": str(e)}
             
@@ -78,9 +68,7 @@ async def get_project_details(folder_name: str):
     meta_path = os.path.join(path, "metadata.json")
     
     if os.path.exists(meta_path):
-        import json
-        with open(meta_path, 'r', encoding='utf-8') as f:
-            meta_data = json.load(f)
+        meta_data = await asyncio.to_thread(read_project, path) or {}
 
         # Collect assets (images)
         assets = []
@@ -105,23 +93,44 @@ async def delete_project(folder_name: str):
     path = os.path.join(OUTPUTS_DIR, folder_name)
     if os.path.exists(path):
         shutil.rmtree(path)
+        get_history_index().remove_project(folder_name)
+        get_archive_cache().invalidate(folder_name)
         return {"success": True}
     return {"success": False, "error": "Not found"}
 
 @router.get("/{folder_name}/download")
 async def download_project(folder_name: str):
+    """
+    Project folder as a ZIP, generated while it is sent (media stored, not deflated).
+    With download_cache_enabled the finished archive is kept per content fingerprint so repeat
+    downloads of an unchanged project are served directly.
+    """
     folder_name = urllib.parse.unquote(folder_name)
     path = os.path.join(OUTPUTS_DIR, folder_name)
     if not os.path.exists(path):
         return {"error": "Project not found"}
-        
-    # Zip it
+
+    # Archives written into OUTPUTS_DIR by older versions
+    legacy_zip = os.path.join(OUTPUTS_DIR, f"{folder_name}.zip")
+    if os.path.isfile(legacy_zip):
+        os.remove(legacy_zip)
+
     zip_filename = f"{folder_name}.zip"
-    zip_path = os.path.join(OUTPUTS_DIR, zip_filename)
-    
-    shutil.make_archive(zip_path.replace('.zip', ''), 'zip', path)
-    
-    return FileResponse(zip_path, filename=zip_filename, media_type='application/zip')
+    # Fold the per-cut log into metadata.json: the log itself is not archived
+    await asyncio.to_thread(compact, path)
+    files = await asyncio.to_thread(project_files, folder_name)
+    headers = {"Content-Disposition": f"attachment; filename*=UTF-8''{urllib.parse.quote(zip_filename)}"}
+
+    if get_config().get("download_cache_enabled", False):
+        cache = get_archive_cache()
+        fingerprint = content_fingerprint(files)
+        cached = cache.get(folder_name, fingerprint)
+        if cached:
+            return FileResponse(cached, filename=zip_filename, media_type='application/zip')
+        # Sync iterators are run in the threadpool by StreamingResponse
+        return StreamingResponse(cache.stream_and_store(folder_name, fingerprint, files), media_type='application/zip', headers=headers)
+
+    return StreamingResponse(iter_zip(files), media_type='application/zip', headers=headers)
 
 @router.get("/{folder_name}/open")
 async def open_project_folder_get(folder_name: str):
@@ -162,3 +171,11 @@ async def open_project_folder(req: dict):
 @router.post("/{folder_name}/generate_veo_prompts")
 async def generate_veo_route(folder_name: str):
     return await generate_veo_prompts_for_history(folder_name)
+
+@router.get("/{folder_name}/generate_veo_prompts/stream")
+async def generate_veo_stream_route(folder_name: str):
+    async def event_generator():
+        async for event in get_veo_backfill().run([folder_name]):
+            yield create_sse_event(event)
+
+    return EventSourceResponse(event_generator())
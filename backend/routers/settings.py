@@ -1,10 +1,20 @@
+import asyncio
 from fastapi import APIRouter
 from backend.core.schemas import SettingsUpdate
 from backend.core.config import load_config, save_config
-from backend.services.comfyui_service import fetch_available_models, check_comfyui_connection
+from backend.services.comfyui_service import fetch_available_models, check_comfyui_connection, get_comfyui_servers
+from backend.services.comfyui_dispatcher import get_dispatcher
+from backend.services.node_registry import get_node_registry
+from backend.services.model_inventory import get_model_inventory
+from backend.services.llm_limiter import get_llm_limiter
+from backend.services.llm_cache import get_llm_cache
+from backend.services.thumbnails import THUMBNAIL_FORMATS
+from backend.logic.vram_guard import VRAMGuard
 
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
+PREVIEW_MODES = ("inline", "url", "full", "off")
+
 @router.get("")
 async def get_settings():
     """Get current settings (API key masked)"""
@@ -23,6 +33,20 @@ async def get_settings():
             "cfg": config.get("cfg", 7.5),
             "sampler_name": config.get("sampler_name", "dpmpp_2m"),
             "scheduler": config.get("scheduler", "karras"),
+            "comfyui_servers": get_comfyui_servers(config),
+            "queue_ahead_depth": config.get("queue_ahead_depth", 2),
+            "vram_policy": config.get("vram_policy", "threshold"),
+            "vram_min_free_ratio": config.get("vram_min_free_ratio", 0.15),
+            "vram_every_n": config.get("vram_every_n", 10),
+            "llm_rpm": config.get("llm_rpm", 500),
+            "llm_tpm": config.get("llm_tpm", 200000),
+            "llm_max_concurrency": config.get("llm_max_concurrency", 16),
+            "preview_mode": config.get("preview_mode", "inline"),
+            "preview_width": config.get("preview_width", 640),
+            "preview_format": config.get("preview_format", "webp"),
+            "download_cache_enabled": config.get("download_cache_enabled", False),
+            "max_concurrent_jobs": config.get("max_concurrent_jobs", 2),
+            "max_inflight_prompts": config.get("max_inflight_prompts", 8),
             "prompts": config.get("prompts", {})
         }
     except Exception as e:
@@ -43,13 +67,61 @@ async def update_settings(settings: SettingsUpdate):
     if settings.sampler_name is not None: config["sampler_name"] = settings.sampler_name
     if settings.scheduler is not None: config["scheduler"] = settings.scheduler
     if settings.prompts is not None: config["prompts"] = settings.prompts
+    if settings.comfyui_servers is not None: config["comfyui_servers"] = settings.comfyui_servers
+    if settings.queue_ahead_depth is not None: config["queue_ahead_depth"] = max(1, settings.queue_ahead_depth)
+    if settings.vram_policy in VRAMGuard.MODES: config["vram_policy"] = settings.vram_policy
+    if settings.vram_min_free_ratio is not None: config["vram_min_free_ratio"] = settings.vram_min_free_ratio
+    if settings.vram_every_n is not None: config["vram_every_n"] = max(1, settings.vram_every_n)
+    if settings.llm_rpm is not None: config["llm_rpm"] = max(1, settings.llm_rpm)
+    if settings.llm_tpm is not None: config["llm_tpm"] = max(1000, settings.llm_tpm)
+    if settings.llm_max_concurrency is not None: config["llm_max_concurrency"] = max(1, settings.llm_max_concurrency)
+    if settings.preview_mode in PREVIEW_MODES: config["preview_mode"] = settings.preview_mode
+    if settings.preview_width is not None: config["preview_width"] = max(64, settings.preview_width)
+    if settings.preview_format in THUMBNAIL_FORMATS: config["preview_format"] = settings.preview_format
+    if settings.download_cache_enabled is not None: config["download_cache_enabled"] = settings.download_cache_enabled
+    if settings.max_concurrent_jobs is not None: config["max_concurrent_jobs"] = max(1, settings.max_concurrent_jobs)
+    if settings.max_inflight_prompts is not None: config["max_inflight_prompts"] = max(1, settings.max_inflight_prompts)
     
     save_config(config)
+    if settings.comfyui_servers is not None or settings.comfyui_path is not None:
+        get_node_registry().invalidate()
     return {"success": True}
 
 @router.get("/models")
-async def get_available_models():
-    """Fetch available checkpoint models from ComfyUI or local scan"""
+async def get_available_models(refresh: bool = False):
+    """Fetch available checkpoint models from ComfyUI or local scan (refresh=true drops the cached node info)"""
     config = load_config()
+    if refresh:
+        get_node_registry().invalidate()
     models = await fetch_available_models(config)
-    return {"models": models}
+    sizes = {}
+    comfy_path = config.get("comfyui_path", "")
+    if comfy_path:
+        inventory = get_model_inventory(comfy_path)
+        sizes = {m: inventory.size_of(m) for m in models if inventory.size_of(m) is not None}
+    return {"models": models, "sizes": sizes}
+
+@router.get("/comfyui/nodes")
+async def get_comfyui_nodes():
+    """Health, queue depth and latency of each configured ComfyUI server"""
+    dispatcher = get_dispatcher()
+    await dispatcher.refresh(force=True)
+    return {"nodes": dispatcher.status()}
+
+@router.get("/llm/limiter")
+async def get_llm_limiter_status():
+    """Rate limiter budget, in-flight and queued LLM calls"""
+    return get_llm_limiter().status()
+
+@router.get("/llm/cache")
+async def get_llm_cache_stats():
+    """LLM response cache size and hit/miss counters"""
+    llm_cache = get_llm_cache()
+    return await asyncio.to_thread(llm_cache.stats) if llm_cache else {"enabled": False}
+
+@router.delete("/llm/cache")
+async def clear_llm_cache():
+    llm_cache = get_llm_cache()
+    if llm_cache:
+        await asyncio.to_thread(llm_cache.clear)
+    return {"success": True}
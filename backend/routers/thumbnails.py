@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import FileResponse
+from backend.services.thumbnails import get_thumbnail_service, MEDIA_TYPES
+
+router = APIRouter(prefix="/api/thumbnails", tags=["thumbnails"])
+
+@router.get("/{image_path:path}")
+async def get_thumbnail(image_path: str, w: int = 320, format: str = "webp"):
+    """Resized copy of an image under /outputs (e.g. /api/thumbnails/<folder>/cut_000_1.png?w=320&format=webp)"""
+    service = get_thumbnail_service()
+    src = service.resolve_source(image_path)
+    if src is None:
+        return {"error": "Image not found"}
+    try:
+        path = await service.get(image_path, w, format)
+    except Exception as e:
+        # Pillow missing or unreadable image: fall back to the original
+        print(f"[Thumbnails] {image_path}: {e}")
+        return FileResponse(src)
+    fmt = path.rsplit(".", 1)[-1]
+    return FileResponse(path, media_type=MEDIA_TYPES.get(fmt, "image/webp"), headers={"Cache-Control": "public, max-age=86400"})
@@ -1,3 +1,4 @@
+import asyncio
 import uuid
 from fastapi import APIRouter
 from fastapi.responses import Response
@@ -14,10 +15,11 @@ from backend.services.openai_service import (
     regenerate_cut, generate_titles, parse_script
 )
 from backend.services.generation import (
-    real_comfyui_process_generator, upload_reference, generate_reference_image,
-    set_generation_status, get_generation_status
+    real_comfyui_process_generator, upload_reference, generate_reference_image
 )
 from backend.services.comfyui_service import calculate_parameters
+from backend.services.job_store import get_job_store
+from backend.services.job_scheduler import get_job_scheduler, JOB_ACTIONS
 
 router = APIRouter(prefix="/api", tags=["workflow"])
 
@@ -39,15 +41,26 @@ router.add_api_route("/workflow/titles", generate_titles, methods=["POST"])
 router.add_api_route("/workflow/upload_reference", upload_reference, methods=["POST"])
 router.add_api_route("/workflow/generate-reference", generate_reference_image, methods=["POST"])
 
-# Queue System
-generation_jobs = {}
-
+# Queue System (jobs are persisted so a restarted backend can resume them)
 @router.post("/queue-generation")
 async def queue_generation(req: QueueRequest):
     job_id = str(uuid.uuid4())
-    generation_jobs[job_id] = req.dict()
+    await asyncio.to_thread(get_job_store().create_job, job_id, "generation", req.dict())
     return {"success": True, "jobId": job_id}
 
+@router.get("/jobs")
+async def list_resumable_jobs():
+    """Generation jobs that have not completed (reopen /api/stream?jobId=... to resume one)"""
+    store = get_job_store()
+
+    def resumable():
+        return [{
+            "jobId": job["job_id"], "status": job["status"], "folderName": job["folder_name"],
+            "title": job["payload"].get("title", ""), "totalCuts": len(job["payload"].get("cuts", [])),
+            "completedCuts": len(store.completed_cuts(job["job_id"])),
+        } for job in store.list_jobs("generation", ("queued", "running", "stopped"))]
+    return {"jobs": await asyncio.to_thread(resumable)}
+
 @router.get("/stream")
 async def stream_workflow(
     mode: str = "long", 
@@ -60,8 +73,9 @@ async def stream_workflow(
 ):
     # Check key from Queue
     job_data = {}
-    if jobId and jobId in generation_jobs:
-        job_data = generation_jobs[jobId]
+    job = await asyncio.to_thread(get_job_store().get_job, jobId) if jobId else None
+    if job:
+        job_data = job["payload"]
         # Override params with job data
         mode = job_data.get("mode", mode)
         topic = job_data.get("topic", topic)
@@ -84,12 +98,27 @@ async def stream_workflow(
 
     # Use real generator
     return EventSourceResponse(
-        real_comfyui_process_generator(params, topic, referenceImage, skip_generation=skip_generation)
+        real_comfyui_process_generator(params, topic, referenceImage, skip_generation=skip_generation,
+                                       job_id=jobId if job else "", priority=job_data.get("priority", "normal"))
     )
 
 @router.post("/workflow/control")
 async def control_generation(req: ControlRequest):
-    if req.action in ["stop", "finish_early"]:
-        if set_generation_status(req.action):
-             return {"success": True, "status": "updated", "new_state": req.action}
+    """stop / finish_early one job. Without jobId the request only applies when exactly one job is active."""
+    if req.action not in JOB_ACTIONS:
+        return {"success": False, "error": "invalid_action or failed to update"}
+    scheduler = get_job_scheduler()
+    job_id = req.jobId
+    if not job_id:
+        active = scheduler.active_jobs()
+        if len(active) != 1:
+            return {"success": False, "error": "jobId is required" if active else "no active job"}
+        job_id = active[0].job_id
+    if scheduler.control(job_id, req.action):
+        return {"success": True, "status": "updated", "jobId": job_id, "new_state": req.action}
     return {"success": False, "error": "invalid_action or failed to update"}
+
+@router.get("/workflow/status")
+async def workflow_status():
+    """Running / waiting jobs and global in-flight prompt usage"""
+    return get_job_scheduler().status()
@@ -0,0 +1,231 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+import httpx
+from backend.core.config import get_config
+from backend.services.comfyui_service import get_comfyui_client, get_comfyui_servers
+from backend.services.comfyui_events import wait_for_prompt
+from backend.services.node_registry import get_node_registry
+
+# Combo inputs that name model files: a node can only run a workflow whose files it has
+MODEL_INPUTS = ("ckpt_name", "ipadapter_file")
+
+class ComfyUINodeError(Exception):
+    """Raised when a ComfyUI node stops answering (the cut should move to another node)"""
+    def __init__(self, node, message: str):
+        super().__init__(f"{node.address}: {message}")
+        self.node = node
+
+class ComfyUICapabilityError(Exception):
+    """Raised when no healthy node has the node classes / model files a workflow needs"""
+
+def missing_requirements(workflow: dict, object_info: dict) -> List[str]:
+    """Node classes and model files used by `workflow` that a server's /object_info does not offer"""
+    missing = []
+    for node in workflow.values():
+        if not isinstance(node, dict):
+            continue
+        class_type = node.get("class_type")
+        if class_type not in object_info:
+            missing.append(class_type)
+            continue
+        spec_inputs = object_info[class_type].get("input", {})
+        for name in MODEL_INPUTS:
+            value = node.get("inputs", {}).get(name)
+            spec = spec_inputs.get("required", {}).get(name) or spec_inputs.get("optional", {}).get(name) or []
+            if isinstance(value, str) and spec and isinstance(spec[0], list) and value not in spec[0]:
+                missing.append(value)
+    return missing
+
+class ComfyUINode:
+    """Scheduling state for one ComfyUI server"""
+    def __init__(self, address: str):
+        self.address = address
+        self.client = get_comfyui_client(address)
+        self.healthy = True
+        self.queue_depth = 0          # running + pending, as of the last /queue refresh
+        self.submitted_since_refresh = 0
+        self.pending: Dict[str, float] = {}  # prompt_id -> submitted_at (prompts we are waiting on)
+        self.rtt = 0.0                # EWMA of /queue round trip (seconds)
+        self.cut_seconds = None       # EWMA of execution time per prompt
+        self.last_done = 0.0
+        self.last_refresh = 0.0
+        self.failures = 0
+
+    @property
+    def load(self) -> int:
+        return max(self.queue_depth + self.submitted_since_refresh, len(self.pending))
+
+    def estimated_wait(self, default_cut_seconds: float) -> float:
+        cut_seconds = self.cut_seconds if self.cut_seconds is not None else default_cut_seconds
+        return (self.load + 1) * cut_seconds + self.rtt
+
+    def snapshot(self) -> dict:
+        return {
+            "address": self.address, "healthy": self.healthy, "queueDepth": self.queue_depth,
+            "load": self.load, "rtt": round(self.rtt, 4),
+            "cutSeconds": round(self.cut_seconds, 2) if self.cut_seconds is not None else None,
+        }
+
+class ComfyUIDispatcher:
+    """
+    Sends prompts to the least-loaded healthy ComfyUI node that can run them (has every node
+    class and model file the workflow uses, per the node registry). Load is the node's /queue depth plus what we submitted since the last refresh, weighted
+    by the node's recent per-cut latency. A node that stops answering is marked unhealthy and
+    its cuts can be re-queued elsewhere with submit(..., exclude=...).
+    """
+    def __init__(self, servers: List[str], refresh_interval: float = 2.0, alpha: float = 0.3):
+        if not servers:
+            raise ValueError("At least one ComfyUI server is required")
+        self.servers = list(servers)
+        self.nodes = [ComfyUINode(address) for address in self.servers]
+        self.refresh_interval = refresh_interval
+        self.alpha = alpha
+        self._lock = asyncio.Lock()
+
+    def _ewma(self, current: Optional[float], sample: float) -> float:
+        return sample if current is None else (1 - self.alpha) * current + self.alpha * sample
+
+    async def _refresh_node(self, node: ComfyUINode):
+        started = time.monotonic()
+        try:
+            queue = await node.client.get_queue()
+            node.rtt = self._ewma(node.rtt if node.last_refresh else None, time.monotonic() - started)
+            node.queue_depth = len(queue.get("queue_running", [])) + len(queue.get("queue_pending", []))
+            node.submitted_since_refresh = 0
+            node.healthy = True
+            node.failures = 0
+        except Exception:
+            node.healthy = False
+            node.failures += 1
+        node.last_refresh = time.monotonic()
+
+    async def refresh(self, force: bool = False):
+        """Refresh queue depth / health of nodes whose data is older than refresh_interval"""
+        now = time.monotonic()
+        stale = [n for n in self.nodes if force or now - n.last_refresh >= self.refresh_interval]
+        if stale:
+            await asyncio.gather(*(self._refresh_node(n) for n in stale))
+
+    def healthy_nodes(self) -> List[ComfyUINode]:
+        return [n for n in self.nodes if n.healthy]
+
+    def primary_client(self):
+        """Client of the first healthy node (for capability queries)"""
+        healthy = self.healthy_nodes()
+        return (healthy[0] if healthy else self.nodes[0]).client
+
+    async def missing_on(self, node: ComfyUINode, workflow: dict) -> List[str]:
+        """What `node` lacks to run `workflow` ([] when its catalogue cannot be fetched: let ComfyUI decide)"""
+        try:
+            object_info = await get_node_registry().get_object_info(node.address)
+        except Exception:
+            return []
+        return missing_requirements(workflow, object_info)
+
+    async def nodes_with(self, node_class: str) -> List[ComfyUINode]:
+        """Healthy nodes that have `node_class` installed"""
+        found = []
+        for node in self.healthy_nodes():
+            try:
+                if await get_node_registry().has_node(node_class, node.address):
+                    found.append(node)
+            except Exception:
+                continue
+        return found
+
+    async def pick(self, exclude=(), workflow: dict = None) -> ComfyUINode:
+        await self.refresh()
+        candidates = [n for n in self.healthy_nodes() if n.address not in exclude]
+        if not candidates:
+            # Everything looked down: re-probe once before giving up
+            await self.refresh(force=True)
+            candidates = [n for n in self.healthy_nodes() if n.address not in exclude]
+        if not candidates:
+            raise ComfyUINodeError(self.nodes[0], "no healthy ComfyUI node available")
+        if workflow is not None:
+            capable, missing = [], {}
+            for node in candidates:
+                lacks = await self.missing_on(node, workflow)
+                if lacks:
+                    missing[node.address] = lacks
+                else:
+                    capable.append(node)
+            if not capable:
+                details = "; ".join(f"{address}: {', '.join(sorted(set(lacks)))}" for address, lacks in missing.items())
+                raise ComfyUICapabilityError(f"No ComfyUI node can run this workflow (missing {details})")
+            candidates = capable
+        known = [n.cut_seconds for n in self.nodes if n.cut_seconds is not None]
+        default_cut_seconds = sum(known) / len(known) if known else 1.0
+        return min(candidates, key=lambda n: n.estimated_wait(default_cut_seconds))
+
+    async def submit(self, workflow: dict, exclude=(), before_queue=None) -> Tuple[ComfyUINode, Optional[str]]:
+        """
+        Queue a workflow on the best node that can run it. Returns (node, prompt_id).
+        Raises ComfyUICapabilityError if no healthy node has what the workflow needs.
+        `before_queue(node)` is awaited after the node is chosen and before the prompt is queued.
+        """
+        excluded = set(exclude)
+        while True:
+            async with self._lock:
+                node = await self.pick(excluded, workflow)
+                node.submitted_since_refresh += 1
+            try:
+                if before_queue:
+                    await before_queue(node)
+                result = await node.client.queue_prompt(workflow)
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500:
+                    raise  # the workflow was rejected (validation), another node would reject it too
+                node.healthy = False
+                node.failures += 1
+                excluded.add(node.address)
+                continue
+            prompt_id = result.get("prompt_id")
+            if prompt_id:
+                node.pending[prompt_id] = time.monotonic()
+            return node, prompt_id
+
+    def forget(self, node: ComfyUINode, prompt_id: str):
+        """Stop tracking a prompt that was removed from the node's queue"""
+        node.pending.pop(prompt_id, None)
+
+    async def wait(self, node: ComfyUINode, prompt_id: str, timeout: float = 120, poll_history: bool = False) -> dict:
+        """
+        Wait for a prompt on its node and return the /history entry.
+        Raises ComfyUINodeError if the node went away, asyncio.TimeoutError if it is alive but slow.
+        """
+        try:
+            entry = await wait_for_prompt(prompt_id, node.address, timeout=timeout, poll_history=poll_history)
+        except httpx.TransportError as e:
+            node.healthy = False
+            node.failures += 1
+            raise ComfyUINodeError(node, str(e))
+        except asyncio.TimeoutError:
+            if not await node.client.ping():
+                node.healthy = False
+                node.failures += 1
+                raise ComfyUINodeError(node, "timed out and stopped responding")
+            raise
+        finally:
+            submitted_at = node.pending.pop(prompt_id, None)
+        if submitted_at is not None:
+            # FIFO queue: the prompt started when it was submitted or when the previous one finished
+            now = time.monotonic()
+            node.cut_seconds = self._ewma(node.cut_seconds, now - max(submitted_at, node.last_done))
+            node.last_done = now
+        return entry
+
+    def status(self) -> List[dict]:
+        return [n.snapshot() for n in self.nodes]
+
+# Process-wide dispatcher (rebuilt when the configured server list changes)
+_dispatcher: Optional[ComfyUIDispatcher] = None
+
+def get_dispatcher(config: dict = None) -> ComfyUIDispatcher:
+    global _dispatcher
+    config = config if config is not None else get_config()
+    servers = get_comfyui_servers(config)
+    if _dispatcher is None or _dispatcher.servers != servers:
+        _dispatcher = ComfyUIDispatcher(servers, refresh_interval=float(config.get("comfyui_refresh_interval", 2.0)))
+    return _dispatcher
@@ -0,0 +1,213 @@
+import json
+import asyncio
+import time
+import websockets
+from typing import Dict
+from backend.services.comfyui_service import get_comfyui_client, DEFAULT_COMFYUI_SERVER
+
+class ComfyUIExecutionError(Exception):
+    """Raised when ComfyUI reports execution_error for a prompt"""
+    pass
+
+def history_error(entry: dict):
+    """ComfyUIExecutionError for a /history entry that finished with an error (None if it succeeded)"""
+    status = entry.get("status") or {}
+    if status.get("status_str") != "error":
+        return None
+    for message_type, data in status.get("messages", []):
+        if message_type in ("execution_error", "execution_interrupted"):
+            return ComfyUIExecutionError(f"{data.get('node_type', 'node')} #{data.get('node_id', '?')}: {data.get('exception_message', message_type)}")
+    return ComfyUIExecutionError("execution error")
+
+class ComfyUIEventListener:
+    """
+    One websocket connection per ComfyUI server.
+    Turns executing/executed/execution_error messages into per-prompt futures so callers
+    are woken up the moment ComfyUI finishes. While the socket is down, waiters fall back
+    to polling /history.
+    """
+    def __init__(self, server_address: str, poll_interval: float = 1.0, reconnect_delay: float = 1.0):
+        self.server_address = server_address
+        self.client = get_comfyui_client(server_address)
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+        self.connected = asyncio.Event()
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._outputs: Dict[str, dict] = {}
+        # prompt_id -> (finished_at, error or None) for prompts that finished before anyone waited
+        self._finished: Dict[str, tuple] = {}
+        # prompt_id -> delivered_at for prompts already handed to a waiter (ComfyUI reports
+        # completion twice: `executing` with node=None and `execution_success`)
+        self._delivered: Dict[str, float] = {}
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        self.connected.clear()
+
+    async def _run(self):
+        url = "ws://{}/ws?clientId={}".format(self.server_address, self.client.client_id)
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with websockets.connect(url, max_size=None, ping_interval=20) as ws:
+                    self.connected.set()
+                    delay = self.reconnect_delay
+                    # Messages may have been missed while disconnected
+                    await self._reconcile()
+                    async for message in ws:
+                        if isinstance(message, bytes):
+                            continue  # binary preview frames
+                        self._handle_message(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.connected.is_set():
+                    print(f"[ComfyUI WS] {self.server_address} disconnected: {e}")
+            self.connected.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    def _handle_message(self, message: str):
+        try:
+            msg = json.loads(message)
+        except ValueError:
+            return
+        msg_type = msg.get("type")
+        data = msg.get("data") or {}
+        prompt_id = data.get("prompt_id")
+        if not prompt_id:
+            return
+
+        if msg_type == "executed":
+            output = data.get("output")
+            if output:
+                self._outputs.setdefault(prompt_id, {})[str(data.get("node"))] = output
+        elif msg_type == "executing" and data.get("node") is None:
+            self._resolve(prompt_id)
+        elif msg_type == "execution_success":
+            self._resolve(prompt_id)
+        elif msg_type == "execution_error":
+            error = ComfyUIExecutionError(
+                f"{data.get('node_type', 'node')} #{data.get('node_id', '?')}: {data.get('exception_message', 'execution error')}"
+            )
+            self._resolve(prompt_id, error)
+        elif msg_type == "execution_interrupted":
+            self._resolve(prompt_id, ComfyUIExecutionError(f"interrupted at {data.get('node_type', 'node')} #{data.get('node_id', '?')}"))
+
+    def _resolve(self, prompt_id: str, error: Exception = None):
+        future = self._waiters.pop(prompt_id, None)
+        if future is None:
+            if prompt_id not in self._delivered and prompt_id not in self._finished:
+                self._remember_finished(prompt_id, error)
+            return
+        self._delivered[prompt_id] = time.time()
+        self._prune()
+        if future.done():
+            return
+        if error:
+            future.set_exception(error)
+        else:
+            future.set_result(True)
+
+    def _remember_finished(self, prompt_id: str, error: Exception = None):
+        self._finished[prompt_id] = (time.time(), error)
+        self._prune()
+
+    def _prune(self):
+        """Keep the late-registration buffers small"""
+        now = time.time()
+        for pid in [pid for pid, (ts, _) in self._finished.items() if now - ts > 300]:
+            self._finished.pop(pid, None)
+            self._outputs.pop(pid, None)
+        for pid in [pid for pid, ts in self._delivered.items() if now - ts > 300]:
+            self._delivered.pop(pid, None)
+
+    async def _reconcile(self):
+        """Resolve waiters whose prompts finished while the socket was down"""
+        for prompt_id in list(self._waiters.keys()):
+            try:
+                history = await self.client.get_history(prompt_id)
+            except Exception:
+                continue
+            if prompt_id in history:
+                self._resolve(prompt_id, history_error(history[prompt_id]))
+
+    async def wait_for_prompt(self, prompt_id: str, timeout: float = 120, poll_history: bool = False) -> dict:
+        """
+        Wait until ComfyUI has finished `prompt_id` and return its /history entry.
+        poll_history: also poll /history while the socket is up. ComfyUI only sends progress
+        messages to the client that queued the prompt, so prompts queued by an earlier process
+        (another client_id) are never reported on this socket.
+        Raises asyncio.TimeoutError or ComfyUIExecutionError.
+        """
+        self.start()
+        deadline = time.monotonic() + timeout
+
+        finished = self._finished.pop(prompt_id, None)
+        if finished is None:
+            future = self._waiters.get(prompt_id)
+            if future is None:
+                future = asyncio.get_running_loop().create_future()
+                self._waiters[prompt_id] = future
+            try:
+                while not future.done():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    if self.connected.is_set() and not poll_history:
+                        try:
+                            await asyncio.wait_for(asyncio.shield(future), timeout=min(remaining, 5.0))
+                        except asyncio.TimeoutError:
+                            pass
+                        continue
+                    # Fallback: socket is down (or the prompt is not ours), poll history
+                    history = await self.client.get_history(prompt_id)
+                    if prompt_id in history:
+                        self._resolve(prompt_id, history_error(history[prompt_id]))
+                        break
+                    await asyncio.sleep(min(self.poll_interval, max(remaining, 0)))
+                future.result()
+            finally:
+                self._waiters.pop(prompt_id, None)
+        elif finished[1] is not None:
+            self._outputs.pop(prompt_id, None)
+            raise finished[1]
+
+        ws_outputs = self._outputs.pop(prompt_id, None)
+        history = await self.client.get_history(prompt_id)
+        entry = history.get(prompt_id, {})
+        if not entry.get("outputs") and ws_outputs:
+            # History can lag behind the socket; use the outputs from `executed` messages
+            entry = {**entry, "outputs": ws_outputs}
+        return entry
+
+# Shared listeners (one websocket per ComfyUI server)
+_listeners: Dict[str, ComfyUIEventListener] = {}
+
+def get_event_listener(server_address: str = DEFAULT_COMFYUI_SERVER) -> ComfyUIEventListener:
+    listener = _listeners.get(server_address)
+    if listener is None:
+        listener = ComfyUIEventListener(server_address)
+        _listeners[server_address] = listener
+    listener.start()
+    return listener
+
+async def wait_for_prompt(prompt_id: str, server_address: str = DEFAULT_COMFYUI_SERVER, timeout: float = 120, poll_history: bool = False) -> dict:
+    """Wait for a queued prompt to finish and return its /history entry"""
+    return await get_event_listener(server_address).wait_for_prompt(prompt_id, timeout=timeout, poll_history=poll_history)
+
+async def close_event_listeners():
+    for listener in list(_listeners.values()):
+        await listener.stop()
+    _listeners.clear()
@@ -1,10 +1,53 @@
 import os
-import json
 import socket
-import copy
 from typing import List
-from backend.core.paths import BASE_DIR
-from backend.comfyui_client import ComfyUIClient
+from backend.core.config import get_config
+from backend.comfyui_client import AsyncComfyUIClient
+from backend.services.workflow_templates import CompiledWorkflow, template_cache
+
+DEFAULT_COMFYUI_SERVER = os.getenv("COMFYUI_SERVER_ADDRESS", "127.0.0.1:8188")
+
+def get_comfyui_servers(config: dict = None) -> List[str]:
+    """
+    Configured ComfyUI endpoints ("host:port").
+    config.json "comfyui_servers" (list or comma separated string), else COMFYUI_SERVER_ADDRESS.
+    """
+    config = config if config is not None else get_config()
+    servers = config.get("comfyui_servers") or []
+    if isinstance(servers, str):
+        servers = servers.split(",")
+    servers = [s.strip().replace("http://", "").rstrip("/") for s in servers if s and s.strip()]
+    return servers or [DEFAULT_COMFYUI_SERVER]
+
+# Shared async clients (one keep-alive pool per ComfyUI server)
+_async_clients = {}
+
+def get_comfyui_client(server_address: str = DEFAULT_COMFYUI_SERVER) -> AsyncComfyUIClient:
+    """Get the process-wide AsyncComfyUIClient for a server (created on first use)"""
+    client = _async_clients.get(server_address)
+    if client is None:
+        config = get_config()
+        client = AsyncComfyUIClient(
+            server_address,
+            pool_size=int(config.get("comfyui_pool_size", 8)),
+            timeout=float(config.get("comfyui_timeout", 30.0)),
+            connect_timeout=float(config.get("comfyui_connect_timeout", 5.0)),
+        )
+        _async_clients[server_address] = client
+    return client
+
+async def close_comfyui_clients():
+    """Close all pooled ComfyUI connections (app shutdown)"""
+    for client in list(_async_clients.values()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            print(f"Failed to close ComfyUI client: {e}")
+    _async_clients.clear()
+
+async def check_comfyui_connection_async(server_address: str = DEFAULT_COMFYUI_SERVER) -> bool:
+    """Non-blocking reachability check through the pooled client"""
+    return await get_comfyui_client(server_address).ping()
 
 def check_comfyui_connection(host="127.0.0.1", port=8188):
     """Check if ComfyUI server is reachable"""
@@ -16,129 +59,53 @@ def check_comfyui_connection(host="127.0.0.1", port=8188):
     except Exception:
         return False
 
-async def fetch_available_models(config: dict) -> List[str]:
+async def fetch_available_models(config: dict, server_address: str = None) -> List[str]:
     """
     Get list of models.
     Priority: 
     1. ComfyUI API (Object Info -> CheckpointLoaderSimple)
     2. Local Scan (if configured path exists)
     """
-    # 1. Try API
-    if check_comfyui_connection():
-        try:
-            client = ComfyUIClient("127.0.0.1:8188")
-            info = client.get_object_info("CheckpointLoaderSimple")
-            # Structure: {'CheckpointLoaderSimple': {'input': {'required': {'ckpt_name': [['model1.safetensors', ...], ...]}}}}
-            if 'CheckpointLoaderSimple' in info:
-                input_req = info['CheckpointLoaderSimple'].get('input', {}).get('required', {})
-                ckpt_names = input_req.get('ckpt_name', [])
-                if ckpt_names and isinstance(ckpt_names[0], list):
-                    return ckpt_names[0]
-        except Exception as e:
-            print(f"Failed to fetch models via API: {e}")
+    from backend.services.node_registry import get_node_registry
+    # 1. Try API (served from the cached object_info when warm)
+    try:
+        models = await get_node_registry().list_checkpoints(server_address)
+        if models:
+            return models
+    except Exception as e:
+        print(f"Failed to fetch models via API: {e}")
 
-    # 2. Try Local Scan
+    # 2. Try Local Scan (persistent, incrementally refreshed index)
     comfy_path = config.get("comfyui_path", "")
-    print(f"[DEBUG] Scanning for models. Configured Path: '{comfy_path}'")
-    
     if comfy_path and os.path.exists(comfy_path):
-        # Common paths: models/checkpoints, models/diffusion_models
-        # User requested: models/diffusion_models specifically, but typically checkpoints are in models/checkpoints
-        # We will scan both.
-        models = []
-        search_paths = [
-            os.path.join(comfy_path, "models", "checkpoints"),
-            os.path.join(comfy_path, "ComfyUI", "models", "checkpoints"), # Common if path is root
-            os.path.join(comfy_path, "models", "diffusion_models"),
-        ]
-        
-        for p in search_paths:
-            print(f"[DEBUG] Checking path: '{p}' (Exists: {os.path.exists(p)})")
-            if os.path.exists(p):
-                for root, dirs, files in os.walk(p):
-                    for file in files:
-                        if file.endswith((".safetensors", ".ckpt")):
-                            try:
-                                rel = os.path.relpath(os.path.join(root, file), p)
-                                models.append(rel)
-                            except:
-                                models.append(file)
-        
-        # Dedup and sort
-        found_models = sorted(list(set(models)))
-        print(f"[DEBUG] Found {len(found_models)} models: {found_models[:5]}...")
-        return found_models
+        from backend.services.model_inventory import get_model_inventory
+        return await get_model_inventory(comfy_path).list_models()
 
     return []
 
-async def fetch_available_ipadapters(config: dict) -> List[str]:
+async def fetch_available_ipadapters(config: dict, server_address: str = None) -> List[str]:
     """Get list of IPAdapter models from ComfyUI API"""
-    if check_comfyui_connection():
-        try:
-            client = ComfyUIClient("127.0.0.1:8188")
-            info = client.get_object_info("IPAdapterModelLoader")
-            if 'IPAdapterModelLoader' in info:
-                input_req = info['IPAdapterModelLoader'].get('input', {}).get('required', {})
-                models = input_req.get('ipadapter_file', [])
-                if models and isinstance(models[0], list):
-                    return models[0]
-        except Exception as e:
-            print(f"Failed to fetch IPAdapters: {e}")
+    from backend.services.node_registry import get_node_registry
+    try:
+        return await get_node_registry().list_ipadapters(server_address)
+    except Exception as e:
+        print(f"Failed to fetch IPAdapters: {e}")
             
     # Local scan fallback could go here, but API is reliable for Node lists
     return []
 
-def load_workflow_template(workflow_name: str) -> dict:
-    """Load a ComfyUI workflow template from the workflows directory"""
-    workflow_path = os.path.join(BASE_DIR, "workflows", f"{workflow_name}.json")
-    if os.path.exists(workflow_path):
-        with open(workflow_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return None
+def load_workflow_template(workflow_name: str) -> CompiledWorkflow:
+    """Compiled ComfyUI workflow template from the workflows directory (reloaded when the file changes)"""
+    return template_cache.get(workflow_name)
 
-def prepare_workflow(template: dict, replacements: dict) -> dict:
-    """Replace placeholder strings in workflow JSON safely"""
-    workflow = copy.deepcopy(template)
-    
-    # 1. Direct replacements in nodes (Model, Seed, etc.)
-    target_model = replacements.get("ckpt_name")
-    target_seed = replacements.get("seed")
-    target_width = replacements.get("width")
-    target_height = replacements.get("height")
-    target_steps = replacements.get("steps")
-    target_cfg = replacements.get("cfg")
-    target_sampler = replacements.get("sampler_name")
-    target_scheduler = replacements.get("scheduler")
-    
-    for node_id, node in workflow.items():
-        inputs = node.get("inputs", {})
-        
-        # Replace Model
-        if target_model and node.get("class_type") == "CheckpointLoaderSimple":
-            inputs["ckpt_name"] = target_model
-            
-        # Replace Dimensions (EmptyLatentImage)
-        if node.get("class_type") == "EmptyLatentImage":
-            if target_width: inputs["width"] = target_width
-            if target_height: inputs["height"] = target_height
-
-        # Replace Sampler Parameters (KSampler)
-        if node.get("class_type") == "KSampler":
-            if target_steps: inputs["steps"] = target_steps
-            if target_cfg: inputs["cfg"] = target_cfg
-            if target_sampler: inputs["sampler_name"] = target_sampler
-            if target_scheduler: inputs["scheduler"] = target_scheduler
-            if target_seed is not None: inputs["seed"] = target_seed
-            
-        # Replace placeholders in any string input
-        for key, value in inputs.items():
-            if isinstance(value, str):
-                for rk, rv in replacements.items():
-                    placeholder = f"{rk.upper()}_PLACEHOLDER"
-                    if placeholder in value:
-                        inputs[key] = value.replace(placeholder, str(rv))
-                        
-    return workflow
+def prepare_workflow(template, replacements: dict) -> dict:
+    """
+    Fill a workflow template: typed node parameters (model, size, sampler, seed) and *_PLACEHOLDER strings.
+    Accepts a CompiledWorkflow (fast path) or a raw workflow dict.
+    """
+    if not isinstance(template, CompiledWorkflow):
+        template = CompiledWorkflow(template)
+    return template.instantiate(replacements)
 
 def calculate_parameters(mode: str, concept: str, cuts: int, selected_title: str = ""):
     is_long = mode.lower() == "long" or "long form" in mode.lower()
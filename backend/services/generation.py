@@ -1,32 +1,24 @@
 import os
-import json
 import time
+import uuid
 import asyncio
 import base64
-import shutil
-import urllib.parse
-from typing import AsyncGenerator, Dict
+from typing import AsyncGenerator, Dict, List
 from backend.core.paths import OUTPUTS_DIR, ASSETS_DIR
-from backend.core.config import load_config
-from backend.core.utils import sanitize_filename, clean_string, create_sse_event, get_time
-from backend.services.comfyui_service import check_comfyui_connection, fetch_available_models, fetch_available_ipadapters, load_workflow_template, prepare_workflow
-from backend.comfyui_client import ComfyUIClient
-from backend.services.openai_service import get_openai_client, generate_veo_prompts_batch
+from backend.core.config import get_config
+from backend.core.utils import sanitize_filename, clean_string, create_sse_event, get_time, encode_data_uri
+from backend.services.comfyui_service import fetch_available_models, fetch_available_ipadapters, load_workflow_template, prepare_workflow
+from backend.services.comfyui_events import get_event_listener
+from backend.services.history_index import get_history_index
+from backend.services.io_writer import get_io_writer
+from backend.services.job_store import get_job_store
+from backend.services.project_store import read_project, write_project, finalize_project, append_cut, compact
+from backend.services.job_scheduler import JobState, get_job_scheduler
+from backend.services.thumbnails import get_thumbnail_service, thumbnail_url, MEDIA_TYPES
+from backend.services.comfyui_dispatcher import get_dispatcher, ComfyUINodeError
+from backend.services.openai_service import get_openai_client, create_chat_completion, generate_veo_prompts_batch
 from backend.core.schemas import ReferenceImageRequest, UploadRequest
-
-# Global state
-generation_state = {
-    "status": "idle" # running, stopped, finish_early
-}
-
-def get_generation_status():
-    return generation_state["status"]
-
-def set_generation_status(status: str):
-    if status in ["idle", "running", "stopped", "finish_early"]:
-        generation_state["status"] = status
-        return True
-    return False
+from backend.logic.vram_guard import get_vram_guard
 
 async def upload_reference(req: UploadRequest):
     try:
@@ -52,8 +44,16 @@ async def upload_reference(req: UploadRequest):
         print(f"Upload Error: {e}")
         return {"success": False, "error": str(e)}
 
+async def available_on_nodes(fetch, config: dict, dispatcher) -> List[str]:
+    """Models reported by any healthy node (fetch_available_models / fetch_available_ipadapters), first node's first"""
+    found = {}
+    for node in dispatcher.healthy_nodes():
+        for name in await fetch(config, node.address):
+            found.setdefault(name, None)
+    return list(found)
+
 async def generate_reference_image(req: ReferenceImageRequest):
-    config = load_config()
+    config = get_config()
     protagonist_prompt = config.get("prompts", {}).get("protagonist_prompt", "A majestic wild animal")
     
     if req.style == "animation":
@@ -69,8 +69,9 @@ async def generate_reference_image(req: ReferenceImageRequest):
         cut_description = req.cut.get("description", "")
         positive_prompt = f"photorealistic, 8K UHD, {protagonist_prompt}, {cut_description}"
     
-    comfyui_server = "127.0.0.1:8188"
-    if not check_comfyui_connection(host=comfyui_server.split(':')[0], port=int(comfyui_server.split(':')[1])):
+    dispatcher = get_dispatcher(config)
+    await dispatcher.refresh()
+    if not dispatcher.healthy_nodes():
          return {"success": False, "error": "❌ ComfyUI 서버 연동 실패"}
 
     try:
@@ -82,7 +83,7 @@ async def generate_reference_image(req: ReferenceImageRequest):
         seed = random.randint(0, 2**32 - 1)
         selected_model = config.get("selected_model", "RealVisXL_V5.0.safetensors")
         
-        available_models = await fetch_available_models(config)
+        available_models = await available_on_nodes(fetch_available_models, config, dispatcher)
         if available_models:
             if selected_model not in available_models:
                 selected_model = available_models[0]
@@ -101,58 +102,662 @@ async def generate_reference_image(req: ReferenceImageRequest):
             "height": height
         })
 
-        client = ComfyUIClient(comfyui_server)
-        result = client.queue_prompt(workflow)
-        prompt_id = result.get("prompt_id")
-        
+        node, prompt_id = await dispatcher.submit(workflow)
         if not prompt_id: raise Exception("Failed to queue prompt")
-        
-        max_wait = 120
-        start_time = time.time()
-        
-        while time.time() - start_time < max_wait:
-            history = client.get_history(prompt_id)
-            if prompt_id in history:
-                outputs = history[prompt_id].get("outputs", {})
-                for node_id, node_output in outputs.items():
-                    if "images" in node_output:
-                        image_info = node_output["images"][0]
-                        image_data = client.get_image(image_info["filename"], image_info.get("subfolder", ""), image_info.get("type", "output"))
-                        image_base64 = base64.b64encode(image_data).decode('utf-8')
-                        image_url = f"data:image/png;base64,{image_base64}"
-                        reference_path = os.path.join(OUTPUTS_DIR, f"reference_{prompt_id}.png")
-                        with open(reference_path, 'wb') as f:
-                            f.write(image_data)
-                        return {
-                            "success": True, "imageUrl": image_url, "imagePath": reference_path,
-                            "protagonistPrompt": protagonist_prompt, "cutNumber": req.cut.get("cutNumber", 1),
-                            "source": "comfyui", "seed": seed
-                        }
-                break
-            await asyncio.sleep(1)
-        
-        raise Exception("ComfyUI timeout")
+
+        try:
+            entry = await dispatcher.wait(node, prompt_id, timeout=120)
+        except ComfyUINodeError:
+            # Node died mid-render: run it once more on another node
+            node, prompt_id = await dispatcher.submit(workflow, exclude={node.address})
+            if not prompt_id: raise Exception("Failed to queue prompt")
+            entry = await dispatcher.wait(node, prompt_id, timeout=120)
+        except asyncio.TimeoutError:
+            raise Exception("ComfyUI timeout")
+        client = node.client
+
+        outputs = entry.get("outputs", {})
+        for node_id, node_output in outputs.items():
+            if "images" in node_output:
+                image_info = node_output["images"][0]
+                image_data = await client.get_image(image_info["filename"], image_info.get("subfolder", ""), image_info.get("type", "output"))
+                image_base64 = base64.b64encode(image_data).decode('utf-8')
+                image_url = f"data:image/png;base64,{image_base64}"
+                reference_path = os.path.join(OUTPUTS_DIR, f"reference_{prompt_id}.png")
+                with open(reference_path, 'wb') as f:
+                    f.write(image_data)
+                return {
+                    "success": True, "imageUrl": image_url, "imagePath": reference_path,
+                    "protagonistPrompt": protagonist_prompt, "cutNumber": req.cut.get("cutNumber", 1),
+                    "source": "comfyui", "seed": seed
+                }
+
+        raise Exception("ComfyUI returned no images")
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-async def real_comfyui_process_generator(params: dict, topic: str, reference_image: str = "", skip_generation: bool = False) -> AsyncGenerator[dict, None]:
-    if not skip_generation and not check_comfyui_connection():
-        yield create_sse_event({"type": "error", "message": "❌ ComfyUI 서버(127.0.0.1:8188)가 켜져있지 않습니다. 실행 후 다시 시도해주세요."})
+def build_scene_prompt(cut: dict, params: dict, config: dict) -> str:
+    """Build a positive prompt from the cut's scene fields (no explicit imagePrompt)"""
+    physics = clean_string(cut.get("physicsDetail", ""))
+    lighting = clean_string(cut.get("lightingCondition", ""))
+    weather = clean_string(cut.get("weatherAtmosphere", ""))
+    char_prompt = clean_string(params.get("character_prompt", "")) if cut.get("characterTag") else ""
+    positive_template = config.get("prompts", {}).get("positive_prompt_template", "photorealistic, 8K UHD, {{scene}}")
+    scene_text = f"{physics}, {lighting}, {weather}, {char_prompt}"
+    return positive_template.replace("{{scene}}", scene_text)
+
+def build_cut_prompts(cut: dict, params: dict, config: dict):
+    """Return (positive_prompt, negative_prompt) for a cut"""
+    prompts = config.get("prompts", {})
+    if params.get("style") == "animation":
+        anim_template = prompts.get("style_animation", "")
+        desc = clean_string(cut.get("description", ""))
+        char_p = clean_string(params.get("character_prompt", "Character"))
+        subject_desc = f"{char_p}, {desc}"
+        positive_prompt = anim_template.replace("{{subject_description}}", subject_desc)
+        negative_prompt = clean_string(prompts.get("negative_prompt_animation", ""))
+    elif cut.get("imagePrompt"):
+        positive_prompt = clean_string(cut.get('imagePrompt', ''))
+        negative_prompt = clean_string(prompts.get("negative_prompt", "bad quality, blurry"))
+    else:
+        positive_prompt = build_scene_prompt(cut, params, config)
+        negative_prompt = clean_string(prompts.get("negative_prompt", "bad quality"))
+    return positive_prompt, negative_prompt
+
+def start_veo_task(cut: dict, config: dict):
+    """Schedule the per-cut Veo prompt LLM call; the result is awaited when the cut is persisted"""
+    try:
+        veo_system = config.get("prompts", {}).get("veo_video", "")
+        if not veo_system:
+            return None
+        veo_system = veo_system.replace("{{scene_description}}", cut.get("description", ""))
+        veo_system = veo_system.replace("{{physics_detail}}", cut.get("physicsDetail", "Dynamic movement"))
+        veo_system = veo_system.replace("{{sfx_guide}}", cut.get("sfxGuide", "Ambient sound"))
+        veo_system = veo_system.replace("{{emotion_level}}", str(cut.get("emotionLevel", 5)))
+        veo_system = veo_system.replace("{{character_tag}}", cut.get("characterTag", "Main Character"))
+
+        openai_client = get_openai_client()
+        if openai_client:
+            return asyncio.create_task(create_chat_completion(openai_client, [{"role": "system", "content": veo_system}, {"role": "user", "content": "Generate 5-element Veo prompt."}], priority="bulk"))
+    except Exception as e:
+        print(f"Veo Prompt Setup Error: {e}")
+    return None
+
+def project_summary(params: dict, topic: str, folder_name: str, cuts_data: list, cut_files: dict, created_at: str, completed: bool) -> dict:
+    """metadata.json content; cuts without a saved image keep an empty filename"""
+    return {
+        "title": params['selected_title'] or topic,
+        "mode": params['mode_name'],
+        "resolution": f"{params['resolution_w']}x{params['resolution_h']}",
+        "cuts": len(cuts_data), # Total planned cuts
+        "created_at": created_at,
+        "cuts_data": [{**cut, "filename": cut_files.get(i, "")} for i, cut in enumerate(cuts_data)],
+        "folder_name": folder_name,
+        "completed": completed
+    }
+
+def _compact_and_index(project_dir: str, folder_name: str):
+    compact(project_dir)
+    get_history_index().upsert_project(folder_name)
+
+_STAGE_DONE = object()
+_PREVIEW_READY = object()  # placeholder in the event queue for the most recent preview
+
+class RenderPipeline:
+    """
+    Queue-ahead cut renderer.
+
+    submit -> ComfyUI queue (up to `depth` prompts ahead) -> collect -> persist -> notify
+
+    Every stage is a worker fed by a FIFO queue, so cuts stay in order end to end while
+    ComfyUI always has the next prompt waiting. With reference chaining each cut needs the
+    previous output, so the depth drops to 1 and a slot is only freed once the cut is persisted.
+    """
+    def __init__(self, dispatcher, config: dict, params: dict, cuts: list,
+                 project_dir: str, folder_name: str, selected_model: str, selected_ipadapter: str,
+                 reference_image: str, comfyui_input_dir: str, use_reference_chaining: bool, depth: int = 2,
+                 job_id: str = "", completed: dict = None, recovered: dict = None, state: JobState = None):
+        self.dispatcher = dispatcher
+        self.config = config
+        self.params = params
+        self.cuts = cuts
+        self.project_dir = project_dir
+        self.folder_name = folder_name
+        self.selected_model = selected_model
+        self.selected_ipadapter = selected_ipadapter
+        self.current_reference_image = reference_image
+        self.comfyui_input_dir = comfyui_input_dir
+        self.use_reference_chaining = use_reference_chaining
+        self.depth = 1 if use_reference_chaining else max(1, depth)
+        # Resume state from the job store: cuts already saved, prompts queued before a restart
+        self.job_id = job_id
+        self.completed = completed or {}
+        self.recovered = recovered or {}
+        # Per-job status (stop / finish_early) and the global in-flight prompt limit
+        self.state = state or JobState(folder_name)
+        self.scheduler = get_job_scheduler(config)
+        self.vram_guard = get_vram_guard(config)
+        self.writer = get_io_writer()
+
+        self.cut_files = {}  # cut index -> saved filename
+        self.compact_every = max(1, int(config.get("project_compact_every", 10)))
+        self.stopped = False
+        self.finished_early = False
+        self._halted = asyncio.Event()  # set on "stopped": nothing is collected, saved or reported after it
+
+        self._slots = asyncio.Semaphore(self.depth)
+        self._in_flight = []  # jobs queued in ComfyUI and not yet collected (submission order)
+        self._dropped = set()  # prompt_ids removed from a ComfyUI queue
+        self._submitted = asyncio.Queue()
+        self._completed = asyncio.Queue()
+        self._persisted = asyncio.Queue()
+        self._events = asyncio.Queue()
+        self._latest_preview = None
+        self._preview_pending = False
+
+    async def run(self):
+        """Run all stages and yield SSE events in order"""
+        workers = [
+            asyncio.create_task(self._submit_stage()),
+            asyncio.create_task(self._collect_stage()),
+            asyncio.create_task(self._persist_stage()),
+            asyncio.create_task(self._notify_stage()),
+        ]
+        watcher = asyncio.create_task(self._watch_control())
+        finished = False
+        try:
+            while True:
+                event = await self._events.get()
+                if event is _STAGE_DONE:
+                    finished = True
+                    break
+                if event is _PREVIEW_READY:
+                    self._preview_pending = False
+                    event = self._latest_preview
+                yield event
+        finally:
+            watcher.cancel()
+            if not finished:
+                # Client went away: don't leave orphaned prompts rendering
+                for w in workers:
+                    w.cancel()
+                try:
+                    await self._drop_pending()
+                except Exception:
+                    pass
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _watch_control(self):
+        """Act on stop / finish_early as soon as it is requested, not when the submit stage next gets a slot"""
+        await self.state.interrupted.wait()
+        self.stopped = self.state.status == "stopped"
+        self.finished_early = self.state.status == "finish_early"
+        if self.stopped:
+            self._halted.set()
+        try:
+            await self._drop_pending()
+        except Exception as e:
+            print(f"[Pipeline] Failed to drop queued prompts: {e}")
+
+    async def _acquire_slot(self) -> bool:
+        """Wait for a queue-ahead slot; False if stop / finish_early arrives first"""
+        acquire = asyncio.ensure_future(self._slots.acquire())
+        interrupted = asyncio.ensure_future(self.state.interrupted.wait())
+        try:
+            await asyncio.wait([acquire, interrupted], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            interrupted.cancel()
+            if not acquire.done():
+                acquire.cancel()
+                await asyncio.wait([acquire])
+        if acquire.cancelled():
+            return False
+        if self.state.interrupted.is_set():
+            self._slots.release()
+            return False
+        return True
+
+    async def _unless_halted(self, coro):
+        """Result of `coro`, or None (coro cancelled) if the job is stopped first"""
+        task = asyncio.ensure_future(coro)
+        halted = asyncio.ensure_future(self._halted.wait())
+        try:
+            await asyncio.wait([task, halted], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            halted.cancel()
+            if not task.done():
+                task.cancel()
+                await asyncio.wait([task])
+        return None if task.cancelled() else task.result()
+
+    async def _log(self, message: str, **extra):
+        await self._events.put(create_sse_event({"type": "log", "message": message, **extra}))
+
+    def _release(self, job: dict):
+        if not job.get("released"):
+            job["released"] = True
+            self._slots.release()
+
+    def _release_prompt(self, job: dict):
+        """Give back the job's global in-flight slot once its prompt has left ComfyUI"""
+        if not job.get("prompt_released"):
+            job["prompt_released"] = True
+            self.scheduler.release_prompt(self.state)
+
+    async def _drop_pending(self):
+        """Remove prompts that are still waiting in the ComfyUI queue (the running one is kept)"""
+        by_node = {}
+        for job in self._in_flight:
+            if job["prompt_id"] not in self._dropped:
+                by_node.setdefault(job["node"].address, (job["node"], []))[1].append(job["prompt_id"])
+        for node, pending in by_node.values():
+            try:
+                queue = await node.client.get_queue()
+                running = {item[1] for item in queue.get("queue_running", [])}
+            except Exception:
+                running = set()
+            to_delete = [pid for pid in pending if pid not in running]
+            if to_delete:
+                await node.client.delete_from_queue(to_delete)
+                self._dropped.update(to_delete)
+                for pid in to_delete:
+                    self.dispatcher.forget(node, pid)
+
+    async def _submit_cut(self, i: int, cut: dict, cut_number: int):
+        active_workflow_template = None
+        workflow_name = "base_generation"
+        use_ref_setting = self.config.get("use_reference_image", True)
+
+        if self.current_reference_image and use_ref_setting:
+            try:
+                if not await self.dispatcher.nodes_with("IPAdapterAdvanced"):
+                    await self._log("⚠️ 'IPAdapterAdvanced' 노드가 있는 ComfyUI 서버가 없어 참조 이미지 기능을 건너뜁니다.")
+                else:
+                    if i == 0:
+                        await self._log(f"🔄 [Cut {cut_number}] 초기 참조 이미지 사용: {os.path.basename(self.current_reference_image)}")
+                    else:
+                        await self._log(f"🔗 [Cut {cut_number}] 이전 컷을 참조하여 연속성 유지 중...")
+                    loaded_wf = load_workflow_template("reference_generation")
+                    if loaded_wf:
+                        active_workflow_template = loaded_wf
+                        workflow_name = "reference_generation"
+            except Exception as e:
+                await self._log(f"⚠️ 노드 확인 실패 (Safe Fallback): {e}")
+
+        if not active_workflow_template:
+            if self.current_reference_image and not use_ref_setting:
+                await self._log("⚠️ 참조 이미지가 있지만 설정에서 비활성화되어 무시합니다.")
+            active_workflow_template = load_workflow_template("base_generation")
+
+        positive_prompt, negative_prompt = build_cut_prompts(cut, self.params, self.config)
+        cut["imagePrompt"] = positive_prompt
+        veo_task = start_veo_task(cut, self.config)
+
+        import random
+        seed = random.randint(0, 2**32 - 1)
+        workflow = prepare_workflow(active_workflow_template, {
+            "positive_prompt": positive_prompt, "negative_prompt": negative_prompt, "seed": seed,
+            "cut_number": i, "ckpt_name": self.selected_model,
+            "width": self.params.get("resolution_w", 1920), "height": self.params.get("resolution_h", 1080),
+            "steps": self.config.get("steps", 30), "cfg": self.config.get("cfg", 7.5),
+            "sampler_name": self.config.get("sampler_name", "dpmpp_2m"), "scheduler": self.config.get("scheduler", "karras"),
+            "reference_image": self.current_reference_image if self.current_reference_image else "",
+            "ipadapter_file": self.selected_ipadapter
+        })
+
+        # Models this cut keeps resident (checkpoint + IPAdapter stack for reference workflows)
+        model_key = f"{workflow_name}|{self.selected_model}|{self.selected_ipadapter if workflow_name == 'reference_generation' else ''}"
+
+        async def before_queue(node):
+            reason = await self.vram_guard.before_submit(node.client, node.address, model_key)
+            if reason:
+                await self._log(f"🧹 [{node.address}] VRAM 정리 ({reason})")
+
+        node, prompt_id = await self.dispatcher.submit(workflow, before_queue=before_queue)
+        if not prompt_id:
+            if veo_task: veo_task.cancel()
+            return None
+        return {"index": i, "cut": cut, "cut_number": cut_number, "seed": seed, "workflow": workflow,
+                "model_key": model_key, "node": node, "prompt_id": prompt_id, "veo_task": veo_task}
+
+    async def _record_prompt(self, job: dict):
+        if self.job_id:
+            await asyncio.to_thread(get_job_store().record_prompt, self.job_id, job["index"], {
+                "node": job["node"].address, "prompt_id": job["prompt_id"], "seed": job["seed"],
+                "workflow": job["workflow"], "model_key": job["model_key"], "imagePrompt": job["cut"].get("imagePrompt", ""),
+            })
+
+    async def _resume_cut(self, i: int, cut: dict, cut_number: int):
+        """Re-attach to the prompt a previous run queued for this cut (re-queue it if its node is gone)"""
+        record = self.recovered[i]
+        cut["imagePrompt"] = record.get("imagePrompt", cut.get("imagePrompt", ""))
+        job = {"index": i, "cut": cut, "cut_number": cut_number, "seed": record["seed"], "workflow": record["workflow"],
+               "model_key": record.get("model_key", ""), "node": None, "prompt_id": record["prompt_id"],
+               "veo_task": start_veo_task(cut, self.config), "recovered": True}
+        job["node"] = next((n for n in self.dispatcher.healthy_nodes() if n.address == record["node"]), None)
+        if job["node"] is None:
+            job["recovered"] = False
+            job["node"], job["prompt_id"] = await self.dispatcher.submit(job["workflow"])
+            if not job["prompt_id"]:
+                if job["veo_task"]: job["veo_task"].cancel()
+                return None
+            await self._record_prompt(job)
+        return job
+
+    async def _submit_stage(self):
+        total_cuts = self.params.get("total_cuts", len(self.cuts))
+        try:
+            for i, cut in enumerate(self.cuts):
+                if i in self.completed:
+                    continue
+                # Both return False right away once the job is stopped (the watcher drops queued prompts)
+                if not await self._acquire_slot():
+                    break
+                if not await self.scheduler.acquire_prompt(self.state):
+                    self._slots.release()
+                    break
+
+                cut_number = cut.get("cutNumber", i+1)
+                await self._log(f"⏳ [Cut {cut_number}/{total_cuts}] 생성 중...", cutIndex=cut_number)
+                try:
+                    if i in self.recovered:
+                        job = await self._resume_cut(i, cut, cut_number)
+                    else:
+                        job = await self._submit_cut(i, cut, cut_number)
+                        if job:
+                            await self._record_prompt(job)
+                except Exception as e:
+                    self.scheduler.release_prompt(self.state)
+                    self._slots.release()
+                    await self._log(f"⚠️ [Cut {i}] 에러: {str(e)}")
+                    continue
+                if not job:
+                    self.scheduler.release_prompt(self.state)
+                    self._slots.release()
+                    await self._log(f"⚠️ [Cut {i}] 큐 추가 실패")
+                    continue
+                self._in_flight.append(job)
+                await self._submitted.put(job)
+                if self.state.interrupted.is_set():
+                    # Queued while the watcher was already dropping the others
+                    await self._drop_pending()
+        finally:
+            await self._submitted.put(_STAGE_DONE)
+
+    async def _wait_with_failover(self, job: dict) -> dict:
+        """Wait for the job's prompt; if its node dies, re-queue the cut on another node"""
+        failed_nodes = set()
+        while True:
+            try:
+                # A prompt queued by the previous process is not reported on our socket: poll /history
+                return await self.dispatcher.wait(job["node"], job["prompt_id"], timeout=120, poll_history=job.get("recovered", False))
+            except ComfyUINodeError as e:
+                failed_nodes.add(job["node"].address)
+                await self._log(f"⚠️ [Cut {job['index']}] ComfyUI 노드 응답 없음 ({e}). 다른 노드로 재시도합니다.")
+                node, prompt_id = await self.dispatcher.submit(job["workflow"], exclude=failed_nodes)
+                if not prompt_id:
+                    raise
+                job["node"], job["prompt_id"], job["recovered"] = node, prompt_id, False
+                await self._record_prompt(job)
+
+    async def _wait_recovered(self, job: dict) -> dict:
+        """A prompt queued before a restart: use its /history entry if ComfyUI already finished it"""
+        client = job["node"].client
+        prompt_id = job["prompt_id"]
+        try:
+            history = await client.get_history(prompt_id)
+            if history.get(prompt_id, {}).get("outputs"):
+                return history[prompt_id]
+            queue = await client.get_queue()
+            queued = {item[1] for key in ("queue_running", "queue_pending") for item in queue.get(key, [])}
+        except Exception:
+            queued = set()
+        if prompt_id not in queued:
+            # Lost (ComfyUI restarted or the prompt failed): queue the cut again
+            node, new_prompt_id = await self.dispatcher.submit(job["workflow"])
+            if not new_prompt_id:
+                return {}
+            job["node"], job["prompt_id"], job["recovered"] = node, new_prompt_id, False
+            await self._record_prompt(job)
+        return await self._wait_with_failover(job)
+
+    async def _collect_stage(self):
+        """Wait for each prompt in submission order and download its image"""
+        try:
+            while True:
+                job = await self._submitted.get()
+                if job is _STAGE_DONE:
+                    break
+                prompt_id = job["prompt_id"]
+                job["image_data"] = None
+                if prompt_id in self._dropped or self._halted.is_set():
+                    if job["veo_task"]: job["veo_task"].cancel()
+                    self._release_prompt(job)
+                    self._release(job)
+                    continue
+                try:
+                    try:
+                        wait = self._wait_recovered(job) if job.get("recovered") else self._wait_with_failover(job)
+                        entry = await self._unless_halted(wait)
+                        if entry is None:  # stopped while rendering
+                            if job["veo_task"]: job["veo_task"].cancel()
+                            self._release(job)
+                            continue
+                    except asyncio.TimeoutError:
+                        entry = {}
+                    finally:
+                        if job in self._in_flight:
+                            self._in_flight.remove(job)
+                        self._release_prompt(job)
+                    if not self.use_reference_chaining:
+                        self._release(job)
+
+                    client = job["node"].client
+                    for node_id, node_output in entry.get("outputs", {}).items():
+                        if "images" in node_output:
+                            image_info = node_output["images"][0]
+                            job["image_data"] = await client.get_image(image_info["filename"], image_info.get("subfolder", ""), image_info.get("type", "output"))
+                            break
+                    reason = await self.vram_guard.after_cut(client, job["node"].address)
+                    if reason:
+                        await self._log(f"🧹 [{job['node'].address}] VRAM 정리 ({reason})")
+                except Exception as e:
+                    job["error"] = str(e)
+                await self._completed.put(job)
+        finally:
+            await self._completed.put(_STAGE_DONE)
+
+    async def _persist_stage(self):
+        """Write the image and Veo prompt for each cut"""
+        try:
+            while True:
+                job = await self._completed.get()
+                if job is _STAGE_DONE:
+                    break
+                i = job["index"]
+                try:
+                    if self._halted.is_set():
+                        if job["veo_task"]: job["veo_task"].cancel()
+                        continue
+                    if job.get("error"):
+                        await self._log(f"⚠️ [Cut {i}] 에러: {job['error']}")
+                        continue
+                    if not job["image_data"]:
+                        await self._log(f"⚠️ [Cut {i}] 시간 초과")
+                        continue
+
+                    filename = f"cut_{i:03d}_{job['seed']}.png"
+                    filepath = os.path.join(self.project_dir, filename)
+                    # Resolved by the notify stage before the cut is reported as saved
+                    job["saved"] = await self.writer.write_bytes(self.folder_name, filepath, job["image_data"])
+
+                    if self.use_reference_chaining and self.comfyui_input_dir:
+                        chain_filename = f"chain_ref_{self.folder_name}_{job['cut_number']}.png"
+                        chain_path = os.path.join(self.comfyui_input_dir, chain_filename)
+                        try:
+                            # Runs after the image write; the next cut needs it, so wait here
+                            await (await self.writer.copy_file(self.folder_name, filepath, chain_path))
+                            self.current_reference_image = chain_filename
+                        except: pass
+
+                    # Await Veo Task result if pending
+                    if job["veo_task"]:
+                        try:
+                            veo_resp = await job["veo_task"]
+                            veo_prompt_text = veo_resp.choices[0].message.content
+                            job["cut"]["videoPrompt"] = veo_prompt_text
+                            job["cut"]["veo_generated"] = True
+
+                            if veo_prompt_text:
+                                txt_filename = f"cut_{i:03d}_{job['seed']}.txt"
+                                txt_filepath = os.path.join(self.project_dir, txt_filename)
+                                await self.writer.write_text(self.folder_name, txt_filepath, veo_prompt_text)
+                        except Exception as e:
+                            print(f"Veo Task Wait Error: {e}")
+
+                    job["filename"] = filename
+                    job["filepath"] = filepath
+                    await self._persisted.put(job)
+                except Exception as e:
+                    await self._log(f"⚠️ [Cut {i}] 에러: {str(e)}")
+                finally:
+                    job["image_data"] = None
+                    self._release(job)
+        finally:
+            await self._persisted.put(_STAGE_DONE)
+
+    def _offer_preview(self, event: dict):
+        """
+        Queue a preview without building a backlog: while the client has not picked up the
+        previous preview, a newer one just replaces it.
+        """
+        self._latest_preview = event
+        if not self._preview_pending:
+            self._preview_pending = True
+            self._events.put_nowait(_PREVIEW_READY)
+
+    async def _build_preview(self, job: dict):
+        """
+        Preview event for a persisted cut, per config "preview_mode":
+          "inline" (default): small JPEG/WebP data URI (preview_width / preview_format), encoded off the event loop
+          "url":    /api/thumbnails URL, the client fetches the image itself
+          "full":   the original PNG as a data URI (legacy)
+          "off":    no preview
+        """
+        i = job["index"]
+        mode = self.config.get("preview_mode", "inline")
+        width = int(self.config.get("preview_width", 640))
+        fmt = self.config.get("preview_format", "webp")
+        if mode == "off":
+            return None
+        if mode == "url":
+            return create_sse_event({"type": "preview", "image": thumbnail_url(self.folder_name, job["filename"], width, fmt), "cutIndex": i})
+        if mode == "inline":
+            try:
+                path = await get_thumbnail_service().get(f"{self.folder_name}/{job['filename']}", width, fmt)
+                media_type = MEDIA_TYPES.get(path.rsplit(".", 1)[-1], "image/webp")
+                return create_sse_event({"type": "preview", "image": await asyncio.to_thread(encode_data_uri, path, media_type), "cutIndex": i})
+            except Exception as e:
+                print(f"[Preview] Downscale failed, sending original: {e}")
+        return create_sse_event({"type": "preview", "image": await asyncio.to_thread(encode_data_uri, job["filepath"], "image/png"), "cutIndex": i})
+
+    async def _notify_stage(self):
+        """Push preview + completion events for persisted cuts"""
+        try:
+            while True:
+                job = await self._persisted.get()
+                if job is _STAGE_DONE:
+                    break
+                i = job["index"]
+                if self._halted.is_set():
+                    continue
+                try:
+                    await job["saved"]
+                    self.cut_files[i] = job["filename"]
+                    if self.job_id:
+                        await asyncio.to_thread(get_job_store().record_cut, self.job_id, i, job["filename"], job["cut"])
+                    # Append-only cut record; folded into metadata.json every `compact_every` cuts
+                    await self.writer.submit(self.folder_name, append_cut, self.project_dir, i, {**job["cut"], "filename": job["filename"]})
+                    if len(self.cut_files) % self.compact_every == 0:
+                        await self.writer.submit(self.folder_name, _compact_and_index, self.project_dir, self.folder_name)
+                    get_thumbnail_service().schedule(f"{self.folder_name}/{job['filename']}")
+                    preview = await self._build_preview(job)
+                    if preview:
+                        self._offer_preview(preview)
+                    await self._log(f"✅ [Cut {i}] 생성 완료: {job['filename']}")
+                except Exception as e:
+                    await self._log(f"⚠️ [Cut {i}] 에러: {str(e)}")
+        finally:
+            await self._events.put(_STAGE_DONE)
+
+async def real_comfyui_process_generator(params: dict, topic: str, reference_image: str = "", skip_generation: bool = False,
+                                         job_id: str = "", priority: str = "normal") -> AsyncGenerator[dict, None]:
+    """Run one generation job under the job scheduler (waits for a free job slot first)"""
+    scheduler = get_job_scheduler()
+    try:
+        state = scheduler.register(job_id or str(uuid.uuid4()), priority)
+    except ValueError:
+        yield create_sse_event({"type": "error", "message": "❌ 이미 진행 중인 작업입니다."})
         return
+    try:
+        yield create_sse_event({"type": "job", "jobId": state.job_id, "status": state.status})
+        ahead = scheduler.position(state)
+        if ahead:
+            yield create_sse_event({"type": "log", "message": f"⏳ 대기열에서 차례를 기다리는 중... (앞에 {ahead}개 작업)"})
+        if not await scheduler.admit(state):
+            # Stopped / finished early before it started: nothing was rendered, so no project is written
+            if job_id:
+                await asyncio.to_thread(get_job_store().set_status, job_id, "stopped")
+            if state.status == "finish_early":
+                yield create_sse_event({"type": "log", "message": "🏁 시작 전에 조기 종료 요청을 받아 작업을 취소합니다."})
+            else:
+                yield create_sse_event({"type": "log", "message": "🛑 사용자 요청으로 생성이 중단되었습니다."})
+            yield create_sse_event({"type": "error", "message": "Generation Stopped"})
+            return
+        try:
+            async for event in _generate_project(state, params, topic, reference_image, skip_generation, job_id):
+                yield event
+        except Exception as e:
+            print(f"Generation Error [{state.job_id}]: {e}")
+            if job_id:
+                await asyncio.to_thread(get_job_store().set_status, job_id, "error")
+            yield create_sse_event({"type": "error", "message": f"❌ 생성 중 오류가 발생했습니다: {e}"})
+    finally:
+        scheduler.finish(state)
+
+async def _generate_project(state: JobState, params: dict, topic: str, reference_image: str, skip_generation: bool, job_id: str) -> AsyncGenerator[dict, None]:
+    config = get_config()
+    dispatcher = get_dispatcher(config)
+    if not skip_generation:
+        await dispatcher.refresh()
+        if not dispatcher.healthy_nodes():
+            servers = ", ".join(dispatcher.servers)
+            yield create_sse_event({"type": "error", "message": f"❌ ComfyUI 서버({servers})가 켜져있지 않습니다. 실행 후 다시 시도해주세요."})
+            return
+        # Open the completion websockets before the first prompt is queued
+        for node in dispatcher.healthy_nodes():
+            get_event_listener(node.address)
     
-    config = load_config()
-    comfyui_server = "127.0.0.1:8188"
-    client = ComfyUIClient(comfyui_server)
-    
-    timestamp = time.strftime("%Y%m%d-%H%M%S")
-    folder_name = f"{timestamp}_{sanitize_filename(params['selected_title'] or topic)}"
+    # A job that already started (backend restarted, client reconnected) continues in its folder
+    job_store = get_job_store()
+    job = await asyncio.to_thread(job_store.get_job, job_id) if job_id else None
+    if job and job["folder_name"] and os.path.isdir(os.path.join(OUTPUTS_DIR, job["folder_name"])):
+        folder_name = job["folder_name"]
+    else:
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        folder_name = f"{timestamp}_{sanitize_filename(params['selected_title'] or topic)}"
+    resuming = bool(job and job["folder_name"] == folder_name)
     project_dir = os.path.join(OUTPUTS_DIR, folder_name)
     os.makedirs(project_dir, exist_ok=True)
+    if job:
+        await asyncio.to_thread(job_store.set_status, job_id, "running", folder_name)
     
     total_cuts = params['total_cuts']
-    generation_state["status"] = "running"
     
-    yield create_sse_event({"type": "log", "message": f"🚀 프로젝트 생성: {folder_name}"})
+    if resuming:
+        yield create_sse_event({"type": "log", "message": f"♻️ 이전 작업 이어서 진행: {folder_name}"})
+    else:
+        yield create_sse_event({"type": "log", "message": f"🚀 프로젝트 생성: {folder_name}"})
     yield create_sse_event({"type": "log", "message": f"📸 총 {total_cuts}컷 이미지 생성 시작 (Real ComfyUI)"})
 
     workflow_template = load_workflow_template("base_generation")
@@ -163,7 +768,7 @@ async def real_comfyui_process_generator(params: dict, topic: str, reference_ima
     # Model Selection
     selected_model = config.get("selected_model", "RealVisXL_V5.0.safetensors")
     if not skip_generation:
-        available_models = await fetch_available_models(config)
+        available_models = await available_on_nodes(fetch_available_models, config, dispatcher)
         if available_models and selected_model not in available_models:
             fallback_model = available_models[0]
             yield create_sse_event({"type": "log", "message": f"⚠️ 모델 '{selected_model}'을(를) 찾을 수 없어 '{fallback_model}'을(를) 사용합니다."})
@@ -172,7 +777,7 @@ async def real_comfyui_process_generator(params: dict, topic: str, reference_ima
     # IPAdapter Selection
     selected_ipadapter = "ip-adapter-plus_sdxl_vit-h.safetensors" # Default
     if not skip_generation:
-        available_ipadapters = await fetch_available_ipadapters(config)
+        available_ipadapters = await available_on_nodes(fetch_available_ipadapters, config, dispatcher)
         if available_ipadapters:
             # 1. Exact match
             if selected_ipadapter in available_ipadapters:
@@ -207,8 +812,7 @@ async def real_comfyui_process_generator(params: dict, topic: str, reference_ima
             filename = f"ref_base64_{timestamp}.{ext}"
             file_path = os.path.join(ASSETS_DIR, filename)
             os.makedirs(ASSETS_DIR, exist_ok=True)
-            with open(file_path, "wb") as f:
-                f.write(data)
+            await (await get_io_writer().write_bytes(folder_name, file_path, data))
             reference_image = file_path
             yield create_sse_event({"type": "log", "message": f"🖼️ Base64 참조 이미지 저장 완료: {filename}"})
         except Exception as e:
@@ -233,8 +837,7 @@ async def real_comfyui_process_generator(params: dict, topic: str, reference_ima
         try:
             ref_filename = os.path.basename(reference_image)
             target_path = os.path.join(comfyui_input_dir, ref_filename)
-            if not os.path.exists(target_path):
-                shutil.copy(reference_image, target_path)
+            await (await get_io_writer().copy_file(folder_name, reference_image, target_path, overwrite=False))
             # Use only filename for ComfyUI LoadImage node, not absolute path
             reference_image = ref_filename 
             yield create_sse_event({"type": "log", "message": f"📂 참조 이미지를 ComfyUI Input 폴더로 복사: {ref_filename}"})
@@ -243,9 +846,9 @@ async def real_comfyui_process_generator(params: dict, topic: str, reference_ima
 
     current_reference_image = reference_image
 
-    generated_images = []
     cuts_data = params.get("cuts", [])
-    final_cuts_metadata = []
+    cut_files = {}
+    created_at = get_time()
     
     if not cuts_data:
         yield create_sse_event({"type": "log", "message": "❌ 생성할 컷(Cut) 데이터가 없습니다."})
@@ -267,224 +870,87 @@ async def real_comfyui_process_generator(params: dict, topic: str, reference_ima
              else:
                  cut_data["videoPrompt"] = "Generation Skipped/Failed"
 
-    for i, current_cut in enumerate(cuts_data):
-        if generation_state["status"] == "stopped":
-            yield create_sse_event({"type": "log", "message": "🛑 사용자 요청으로 생성이 중단되었습니다."})
-            yield create_sse_event({"type": "error", "message": "Generation Stopped"})
-            generation_state["status"] = "idle"
-            return
-        elif generation_state["status"] == "finish_early":
-            yield create_sse_event({"type": "log", "message": "🏁 사용자 요청으로 조기 종료합니다."})
-            generation_state["status"] = "idle"
-            break
-            
-        cut_number = current_cut.get("cutNumber", i+1)
-        yield create_sse_event({"type": "log", "message": f"⏳ [Cut {cut_number}/{total_cuts}] 생성 중...", "cutIndex": cut_number})
-        
-        # [SKIP LOGIC - BYPASS ALL COMFYUI]
-        if skip_generation:
-             # Just generate Image Prompt (Meta) locally
-             current_cut = current_cut # variable alias
-             if params.get("style") == "animation":
-                    anim_template = config.get("prompts", {}).get("style_animation", "")
-                    desc = clean_string(current_cut.get("description", ""))
-                    char_p = clean_string(params.get("character_prompt", "Character"))
-                    subject_desc = f"{char_p}, {desc}"
-                    positive_prompt = anim_template.replace("{{subject_description}}", subject_desc)
-             else:
-                desc = clean_string(current_cut.get("description", ""))
-                physics = clean_string(current_cut.get("physicsDetail", ""))
-                lighting = clean_string(current_cut.get("lightingCondition", ""))
-                weather = clean_string(current_cut.get("weatherAtmosphere", ""))
-                char_prompt = clean_string(params.get("character_prompt", "")) if current_cut.get("characterTag") else ""
-                positive_template = config.get("prompts", {}).get("positive_prompt_template", "photorealistic, 8K UHD, {{scene}}")
-                scene_text = f"{physics}, {lighting}, {weather}, {char_prompt}"
-                positive_prompt = positive_template.replace("{{scene}}", scene_text)
-            
-             if current_cut:
-                current_cut["imagePrompt"] = positive_prompt
-             
-             if i % 5 == 0:
-                 yield create_sse_event({"type": "log", "message": f"⏭️ [Cut {cut_number}] 데이터 처리 완료"})
-             continue
-
-        active_workflow_template = None
-        use_ref_setting = config.get("use_reference_image", True)
-        
-        if current_reference_image and use_ref_setting:
-             try:
-                 node_info = client.get_object_info("IPAdapterAdvanced")
-                 if not node_info or "IPAdapterAdvanced" not in node_info:
-                     yield create_sse_event({"type": "log", "message": "⚠️ 'IPAdapterAdvanced' 노드가 감지되지 않아 참조 이미지 기능을 건너뜁니다."})
-                 else:
-                     if i == 0:
-                         yield create_sse_event({"type": "log", "message": f"🔄 [Cut {cut_number}] 초기 참조 이미지 사용: {os.path.basename(current_reference_image)}"})
-                     else:
-                         yield create_sse_event({"type": "log", "message": f"🔗 [Cut {cut_number}] 이전 컷을 참조하여 연속성 유지 중..."})
-                     loaded_wf = load_workflow_template("reference_generation")
-                     if loaded_wf: active_workflow_template = loaded_wf
-             except Exception as e:
-                 yield create_sse_event({"type": "log", "message": f"⚠️ 노드 확인 실패 (Safe Fallback): {e}"})
-
-        if not active_workflow_template:
-            if current_reference_image and not use_ref_setting:
-                 yield create_sse_event({"type": "log", "message": "⚠️ 참조 이미지가 있지만 설정에서 비활성화되어 무시합니다."})
-            active_workflow_template = load_workflow_template("base_generation")
-        
+    if skip_generation:
+        for i, current_cut in enumerate(cuts_data):
+            if state.status == "stopped":
+                if job:
+                    await asyncio.to_thread(job_store.set_status, job_id, "stopped")
+                yield create_sse_event({"type": "log", "message": "🛑 사용자 요청으로 생성이 중단되었습니다."})
+                yield create_sse_event({"type": "error", "message": "Generation Stopped"})
+                return
+            elif state.status == "finish_early":
+                yield create_sse_event({"type": "log", "message": "🏁 사용자 요청으로 조기 종료합니다."})
+                break
 
+            cut_number = current_cut.get("cutNumber", i+1)
+            yield create_sse_event({"type": "log", "message": f"⏳ [Cut {cut_number}/{total_cuts}] 생성 중...", "cutIndex": cut_number})
 
-        try:
-            # Prompt Construction
+            # [SKIP LOGIC - BYPASS ALL COMFYUI] Just generate Image Prompt (Meta) locally
             if params.get("style") == "animation":
-                anim_template = config.get("prompts", {}).get("style_animation", "")
-                desc = clean_string(current_cut.get("description", ""))
-                char_p = clean_string(params.get("character_prompt", "Character"))
-                subject_desc = f"{char_p}, {desc}"
-                positive_prompt = anim_template.replace("{{subject_description}}", subject_desc)
-                raw_neg = config.get("prompts", {}).get("negative_prompt_animation", "")
-                negative_prompt = clean_string(raw_neg)
-            elif current_cut.get("imagePrompt"):
-                positive_prompt = clean_string(current_cut.get('imagePrompt', ''))
-                raw_neg = config.get("prompts", {}).get("negative_prompt", "bad quality, blurry")
-                negative_prompt = clean_string(raw_neg)
+                positive_prompt, _ = build_cut_prompts(current_cut, params, config)
             else:
-                desc = clean_string(current_cut.get("description", ""))
-                physics = clean_string(current_cut.get("physicsDetail", ""))
-                lighting = clean_string(current_cut.get("lightingCondition", ""))
-                weather = clean_string(current_cut.get("weatherAtmosphere", ""))
-                char_prompt = clean_string(params.get("character_prompt", "")) if current_cut.get("characterTag") else ""
-                positive_template = config.get("prompts", {}).get("positive_prompt_template", "photorealistic, 8K UHD, {{scene}}")
-                scene_text = f"{physics}, {lighting}, {weather}, {char_prompt}"
-                positive_prompt = positive_template.replace("{{scene}}", scene_text)
-                raw_neg = config.get("prompts", {}).get("negative_prompt", "bad quality")
-                negative_prompt = clean_string(raw_neg)
-
-            if current_cut:
-                current_cut["imagePrompt"] = positive_prompt
-
-            # Veo Prompt Generation
-            veo_task = None
-            if current_cut:
-                 try:
-                    veo_system = config.get("prompts", {}).get("veo_video", "")
-                    if veo_system:
-                        veo_system = veo_system.replace("{{scene_description}}", current_cut.get("description", ""))
-                        veo_system = veo_system.replace("{{physics_detail}}", current_cut.get("physicsDetail", "Dynamic movement"))
-                        veo_system = veo_system.replace("{{sfx_guide}}", current_cut.get("sfxGuide", "Ambient sound"))
-                        veo_system = veo_system.replace("{{emotion_level}}", str(current_cut.get("emotionLevel", 5)))
-                        veo_system = veo_system.replace("{{character_tag}}", current_cut.get("characterTag", "Main Character"))
-                        
-                        openai_client = get_openai_client()
-                        if openai_client:
-                             # Schedule task, await later
-                             veo_task = asyncio.create_task(asyncio.to_thread(openai_client.chat.completions.create, model="gpt-5-mini-2025-08-07", messages=[{"role": "system", "content": veo_system}, {"role": "user", "content": "Generate 5-element Veo prompt."}]))
-                 except Exception as e:
-                    print(f"Veo Prompt Setup Error: {e}")
-
-            import random
-            seed = random.randint(0, 2**32 - 1)
-            workflow = prepare_workflow(active_workflow_template, {
-                "positive_prompt": positive_prompt, "negative_prompt": negative_prompt, "seed": seed,
-                "cut_number": i, "ckpt_name": selected_model, "width": params.get("resolution_w", 1920), "height": params.get("resolution_h", 1080),
-                "steps": config.get("steps", 30), "cfg": config.get("cfg", 7.5),
-                "steps": config.get("steps", 30), "cfg": config.get("cfg", 7.5),
-                "sampler_name": config.get("sampler_name", "dpmpp_2m"), "scheduler": config.get("scheduler", "karras"),
-                "reference_image": current_reference_image if current_reference_image else "",
-                "ipadapter_file": selected_ipadapter
-            })
-            
-            result = client.queue_prompt(workflow)
-            prompt_id = result.get("prompt_id")
-            if not prompt_id:
-                yield create_sse_event({"type": "log", "message": f"⚠️ [Cut {i}] 큐 추가 실패"})
-                continue
-
-            max_wait = 120
-            start_time = time.time()
-            output_image_path = None
-            
-            while time.time() - start_time < max_wait:
-                history = client.get_history(prompt_id)
-                if prompt_id in history:
-                    outputs = history[prompt_id].get("outputs", {})
-                    for node_id, node_output in outputs.items():
-                        if "images" in node_output:
-                            image_info = node_output["images"][0]
-                            image_data = client.get_image(image_info["filename"], image_info.get("subfolder", ""), image_info.get("type", "output"))
-                            filename = f"cut_{i:03d}_{seed}.png"
-                            filepath = os.path.join(project_dir, filename)
-                            with open(filepath, 'wb') as f:
-                                f.write(image_data)
-                            
-                            if use_reference_chaining and os.path.exists(filepath):
-                                if comfyui_input_dir:
-                                    chain_filename = f"chain_ref_{folder_name}_{cut_number}.png"
-                                    chain_path = os.path.join(comfyui_input_dir, chain_filename)
-                                    try:
-                                        shutil.copy(filepath, chain_path)
-                                        current_reference_image = chain_filename
-                                    except: pass
-                            
-                            output_image_path = filepath
-                            
-                            # Await Veo Task result if pending
-                            if veo_task:
-                                try:
-                                    veo_resp = await veo_task
-                                    veo_prompt_text = veo_resp.choices[0].message.content
-                                    if current_cut:
-                                        current_cut["videoPrompt"] = veo_prompt_text
-                                        current_cut["veo_generated"] = True
-                                        
-                                    if veo_prompt_text:
-                                        txt_filename = f"cut_{i:03d}_{seed}.txt"
-                                        txt_filepath = os.path.join(project_dir, txt_filename)
-                                        with open(txt_filepath, 'w', encoding='utf-8') as tf: tf.write(veo_prompt_text)
-                                except Exception as e:
-                                    print(f"Veo Task Wait Error: {e}")
-
-                            generated_images.append(filename)
-                            
-                            with open(filepath, "rb") as img_file:
-                                b64_data = base64.b64encode(img_file.read()).decode('utf-8')
-                                yield create_sse_event({"type": "preview", "image": f"data:image/png;base64,{b64_data}", "cutIndex": i})
-                            
-                            yield create_sse_event({"type": "log", "message": f"✅ [Cut {i}] 생성 완료: {filename}"})
-                            client.free_memory()
-                    break
-                await asyncio.sleep(1)
-            
-            if not output_image_path:
-                yield create_sse_event({"type": "log", "message": f"⚠️ [Cut {i}] 시간 초과"})
-        except Exception as e:
-            yield create_sse_event({"type": "log", "message": f"⚠️ [Cut {i}] 에러: {str(e)}"})
-            await asyncio.sleep(1)
+                positive_prompt = build_scene_prompt(current_cut, params, config)
+            current_cut["imagePrompt"] = positive_prompt
 
-    # Finalize
-    first_image_encoded = urllib.parse.quote(generated_images[0]) if generated_images else ""
-    final_cuts_metadata = []
-    for i, cut in enumerate(cuts_data):
-        prefix = f"cut_{i:03d}_"
-        matching_img = next((img for img in generated_images if img.startswith(prefix)), None)
-        
-        # Always save metadata, even if image wasn't generated
-        cut_copy = cut.copy()
-        cut_copy["filename"] = matching_img if matching_img else ""
-        final_cuts_metadata.append(cut_copy)
+            if i % 5 == 0:
+                yield create_sse_event({"type": "log", "message": f"⏭️ [Cut {cut_number}] 데이터 처리 완료"})
+    else:
+        completed, recovered = {}, {}
+        existing = await asyncio.to_thread(read_project, project_dir) if resuming else None
+        if existing:
+            created_at = existing.get("created_at", created_at)
+        else:
+            # Partial summary up front so the project shows up in history while it renders
+            summary = project_summary(params, topic, folder_name, cuts_data, {}, created_at, completed=False)
+            await (await get_io_writer().submit(folder_name, write_project, project_dir, summary))
+            await asyncio.to_thread(get_history_index().upsert_project, folder_name)
+        if resuming:
+            completed = {
+                i: record for i, record in (await asyncio.to_thread(job_store.completed_cuts, job_id)).items()
+                if i < len(cuts_data) and os.path.exists(os.path.join(project_dir, record["filename"]))
+            }
+            recovered = {i: record for i, record in (await asyncio.to_thread(job_store.pending_prompts, job_id)).items() if i < len(cuts_data) and i not in completed}
+            for i, record in completed.items():
+                cuts_data[i].update(record["cut"])
+                cut_files[i] = record["filename"]
+            first_incomplete = next((i for i in range(len(cuts_data)) if i not in completed), len(cuts_data))
+            yield create_sse_event({"type": "log", "message": f"♻️ 완료된 컷 {len(completed)}개 건너뜀, 대기 중이던 프롬프트 {len(recovered)}개 회수, Cut {first_incomplete}부터 재개"})
+            if use_reference_chaining and completed and comfyui_input_dir:
+                last = max(completed)
+                chain_filename = f"chain_ref_{folder_name}_{cuts_data[last].get('cutNumber', last+1)}.png"
+                if os.path.exists(os.path.join(comfyui_input_dir, chain_filename)):
+                    current_reference_image = chain_filename
 
-    result_data = {
-        "title": params['selected_title'] or topic,
-        "mode": params['mode_name'],
-        "resolution": f"{params['resolution_w']}x{params['resolution_h']}",
-        "cuts": len(cuts_data), # Total planned cuts
-        "created_at": get_time(),
-        "cuts_data": final_cuts_metadata,
-        "folder_name": folder_name,
-        "completed": True
-    }
+        pipeline = RenderPipeline(
+            dispatcher=dispatcher, config=config, params=params,
+            cuts=cuts_data, project_dir=project_dir, folder_name=folder_name,
+            selected_model=selected_model, selected_ipadapter=selected_ipadapter,
+            reference_image=current_reference_image, comfyui_input_dir=comfyui_input_dir,
+            use_reference_chaining=use_reference_chaining,
+            # queue_ahead_depth is per node
+            depth=int(config.get("queue_ahead_depth", 2)) * max(1, len(dispatcher.healthy_nodes())),
+            job_id=job_id if job else "", completed=completed, recovered=recovered, state=state,
+        )
+        async for event in pipeline.run():
+            yield event
+        cut_files.update(pipeline.cut_files)
+
+        if pipeline.stopped:
+            if job:
+                await asyncio.to_thread(job_store.set_status, job_id, "stopped")
+            yield create_sse_event({"type": "log", "message": "🛑 사용자 요청으로 생성이 중단되었습니다."})
+            yield create_sse_event({"type": "error", "message": "Generation Stopped"})
+            return
+        elif pipeline.finished_early:
+            yield create_sse_event({"type": "log", "message": "🏁 사용자 요청으로 조기 종료합니다."})
+
+    # Finalize
+    result_data = project_summary(params, topic, folder_name, cuts_data, cut_files, created_at, completed=True)
     
-    with open(os.path.join(project_dir, "metadata.json"), 'w', encoding='utf-8') as f:
-        json.dump(result_data, f, indent=4, ensure_ascii=False)
+    # Queued after every cut write of this project, so it lands once they are all on disk (and replaces cuts.jsonl)
+    result_data = await (await get_io_writer().submit(folder_name, finalize_project, project_dir, result_data))
+    await asyncio.to_thread(get_history_index().upsert_project, folder_name)
+    if job:
+        await asyncio.to_thread(job_store.set_status, job_id, "completed")
         
     yield create_sse_event({"type": "done", "result": result_data})
-    generation_state["status"] = "idle"
@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import base64
+import sqlite3
+import threading
+from typing import List, Optional
+from backend.core.paths import OUTPUTS_DIR, CACHE_DIR
+from backend.services.thumbnails import thumbnail_url
+from backend.services.project_store import read_project, project_mtime
+
+IMAGE_EXTENSIONS = ('.png', '.jpg')
+SORT_COLUMNS = {"folder_name": "folder_name", "created_at": "created_at", "title": "title", "cuts": "cuts"}
+
+def is_cut_image(name: str) -> bool:
+    return name.endswith(IMAGE_EXTENSIONS) and "reference" not in name and "chain" not in name
+
+class HistoryIndex:
+    """
+    SQLite index of projects under OUTPUTS_DIR (one row per project: summary fields, thumbnail,
+    image count and the metadata.json / cuts.jsonl mtime it was built from).
+    Projects still generating are listed too (completed=false, with the cuts saved so far).
+
+    Writers (generator, title update, delete, Veo backfill) call upsert_project/remove_project.
+    sync() reconciles with the disk (new, changed or deleted folders) at most every
+    `sync_interval` seconds, or immediately when OUTPUTS_DIR itself changed, so edits made
+    outside the app are still picked up.
+    """
+    def __init__(self, db_path: str = None, outputs_dir: str = OUTPUTS_DIR, sync_interval: float = 10.0):
+        self.db_path = db_path or os.path.join(CACHE_DIR, "history.sqlite3")
+        self.outputs_dir = outputs_dir
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._last_sync = 0.0
+        self._outputs_mtime = None
+        with self._connect() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS projects (
+                    folder_name TEXT PRIMARY KEY,
+                    title TEXT,
+                    mode TEXT,
+                    cuts INTEGER,
+                    image_count INTEGER,
+                    created_at TEXT,
+                    completed INTEGER,
+                    thumbnail TEXT,
+                    meta_mtime REAL,
+                    summary TEXT
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS idx_projects_created ON projects (created_at, folder_name)")
+            db.execute("CREATE INDEX IF NOT EXISTS idx_projects_title ON projects (title, folder_name)")
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=10)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def _read_project(self, folder_name: str) -> Optional[dict]:
+        """Summary row for a project folder (None if it has no readable metadata.json)"""
+        path = os.path.join(self.outputs_dir, folder_name)
+        meta_mtime = project_mtime(path)
+        data = read_project(path) if meta_mtime is not None else None
+        if data is None:
+            return None
+
+        images = sorted(name for name in os.listdir(path) if is_cut_image(name))
+        summary = {k: v for k, v in data.items() if k != "cuts_data"}
+        if "created_at" in summary and "timestamp" not in summary:
+            summary["timestamp"] = summary["created_at"]
+        summary["folder_name"] = folder_name
+        summary["id"] = folder_name
+        summary["image_count"] = len(images)
+        return {
+            "folder_name": folder_name,
+            "title": data.get("title", folder_name),
+            "mode": data.get("mode", ""),
+            "cuts": data.get("cuts", len(data.get("cuts_data", []))),
+            "image_count": len(images),
+            "created_at": data.get("created_at", ""),
+            "completed": 1 if data.get("completed") else 0,
+            "thumbnail": images[0] if images else "",
+            "meta_mtime": meta_mtime,
+            "summary": json.dumps(summary, ensure_ascii=False),
+        }
+
+    def upsert_project(self, folder_name: str):
+        row = self._read_project(folder_name)
+        if row is None:
+            self.remove_project(folder_name)
+            return
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO projects VALUES (:folder_name, :title, :mode, :cuts, :image_count, :created_at, :completed, :thumbnail, :meta_mtime, :summary)",
+                row,
+            )
+
+    def remove_project(self, folder_name: str):
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM projects WHERE folder_name = ?", (folder_name,))
+
+    def sync(self, force: bool = False) -> int:
+        """Reconcile the index with OUTPUTS_DIR. Returns the number of rows changed."""
+        try:
+            outputs_mtime = os.stat(self.outputs_dir).st_mtime
+        except OSError:
+            return 0
+        if not force and outputs_mtime == self._outputs_mtime and time.monotonic() - self._last_sync < self.sync_interval:
+            return 0
+
+        on_disk = {}
+        with os.scandir(self.outputs_dir) as it:
+            for entry in it:
+                if entry.is_dir():
+                    mtime = project_mtime(entry.path)
+                    if mtime is not None:
+                        on_disk[entry.name] = mtime
+        with self._connect() as db:
+            indexed = {r["folder_name"]: r["meta_mtime"] for r in db.execute("SELECT folder_name, meta_mtime FROM projects")}
+
+        changed = 0
+        for folder_name in indexed.keys() - on_disk.keys():
+            self.remove_project(folder_name)
+            changed += 1
+        for folder_name, mtime in on_disk.items():
+            if indexed.get(folder_name) != mtime:
+                self.upsert_project(folder_name)
+                changed += 1
+        self._outputs_mtime = outputs_mtime
+        self._last_sync = time.monotonic()
+        return changed
+
+    @staticmethod
+    def encode_cursor(value, folder_name: str) -> str:
+        return base64.urlsafe_b64encode(json.dumps([value, folder_name], ensure_ascii=False).encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        try:
+            value, folder_name = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return value, folder_name
+        except (ValueError, TypeError):
+            return None
+
+    def list_projects(self, limit: int = None, cursor: str = None, sort: str = "folder_name", order: str = "desc",
+                      fields: str = "summary") -> dict:
+        """
+        One page of projects, newest folder first by default.
+        Keyset pagination on (sort column, folder_name): pass the returned nextCursor to get the next page.
+        fields="summary" returns metadata without cuts_data; fields="full" reads each project's metadata (log applied).
+        """
+        self.sync()
+        column = SORT_COLUMNS.get(sort, "folder_name")
+        descending = order.lower() != "asc"
+        op, direction = ("<", "DESC") if descending else (">", "ASC")
+
+        query = f"SELECT * FROM projects"
+        args = []
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if decoded is not None:
+            value, folder_name = decoded
+            query += f" WHERE ({column}, folder_name) {op} (?, ?)"
+            args += [value, folder_name]
+        query += f" ORDER BY {column} {direction}, folder_name {direction}"
+        if limit:
+            query += " LIMIT ?"
+            args.append(int(limit) + 1)
+
+        with self._connect() as db:
+            rows = db.execute(query, args).fetchall()
+            total = db.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.encode_cursor(rows[-1][column], rows[-1]["folder_name"])
+
+        projects = []
+        for row in rows:
+            if fields == "full":
+                project = self._load_full(row["folder_name"]) or json.loads(row["summary"])
+            else:
+                project = json.loads(row["summary"])
+            project["thumbnails"] = [thumbnail_url(row["folder_name"], row["thumbnail"])] if row["thumbnail"] else []
+            projects.append(project)
+        return {"projects": projects, "nextCursor": next_cursor, "total": total}
+
+    def _load_full(self, folder_name: str) -> Optional[dict]:
+        data = read_project(os.path.join(self.outputs_dir, folder_name))
+        if data is None:
+            return None
+        if "created_at" in data and "timestamp" not in data:
+            data["timestamp"] = data["created_at"]
+        data["folder_name"] = folder_name
+        data["id"] = folder_name
+        return data
+
+_history_index: Optional[HistoryIndex] = None
+
+def get_history_index() -> HistoryIndex:
+    global _history_index
+    if _history_index is None:
+        _history_index = HistoryIndex()
+    return _history_index
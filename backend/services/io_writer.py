@@ -0,0 +1,106 @@
+import os
+import shutil
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from backend.core.config import get_config
+from backend.core.utils import atomic_write_json
+
+def _atomic_write_bytes(path: str, data: bytes):
+    """Write to a temp file next to `path`, fsync, rename: readers never see a partial file"""
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return path
+
+def _copy_file(src: str, dst: str, overwrite: bool = True):
+    if overwrite or not os.path.exists(dst):
+        shutil.copy(src, dst)
+    return dst
+
+class IOWriter:
+    """
+    Runs blocking file writes for the generator on a small thread pool.
+
+    - Ordering: operations submitted under the same key (the project folder) run one after
+      another in submission order; different projects write in parallel.
+    - Backpressure: at most `max_pending` operations may be outstanding. submit() waits for a
+      free slot, which also caps the image bytes held in memory on a slow disk.
+    - Durability: submit() returns a future that resolves once the write is on disk (or raises
+      its error); flush(key) waits for everything submitted so far for that key.
+    """
+    def __init__(self, max_pending: int = 32, workers: int = 4):
+        self.max_pending = max(1, max_pending)
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="io-writer")
+        self._tails: Dict[str, asyncio.Future] = {}
+        self.pending = 0
+
+    async def submit(self, key: str, fn, *args) -> asyncio.Future:
+        await self._slots.acquire()
+        self.pending += 1
+        previous = self._tails.get(key)
+        op = asyncio.ensure_future(self._run(previous, fn, args))
+        self._tails[key] = op
+
+        def done(fut, key=key):
+            self.pending -= 1
+            self._slots.release()
+            if self._tails.get(key) is fut:
+                del self._tails[key]
+            if not fut.cancelled() and fut.exception() is not None:
+                print(f"[IOWriter] {key}: {fut.exception()}")
+        op.add_done_callback(done)
+        return op
+
+    async def _run(self, previous: Optional[asyncio.Future], fn, args):
+        if previous is not None:
+            # Wait for the previous write of this project, whether it succeeded or not
+            await asyncio.wait([previous])
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def write_bytes(self, key: str, path: str, data: bytes) -> asyncio.Future:
+        return await self.submit(key, _atomic_write_bytes, path, data)
+
+    async def write_text(self, key: str, path: str, text: str) -> asyncio.Future:
+        return await self.submit(key, _atomic_write_bytes, path, text.encode("utf-8"))
+
+    async def write_json(self, key: str, path: str, data, **dump_kwargs) -> asyncio.Future:
+        return await self.submit(key, lambda: atomic_write_json(path, data, **dump_kwargs))
+
+    async def copy_file(self, key: str, src: str, dst: str, overwrite: bool = True) -> asyncio.Future:
+        return await self.submit(key, _copy_file, src, dst, overwrite)
+
+    async def flush(self, key: str = None):
+        """Wait until every write submitted so far (for `key`, or for all keys) has finished"""
+        tails = [self._tails[key]] if key in self._tails else [] if key else list(self._tails.values())
+        if tails:
+            await asyncio.wait(tails)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+_writer: Optional[IOWriter] = None
+
+def get_io_writer() -> IOWriter:
+    global _writer
+    if _writer is None:
+        config = get_config()
+        _writer = IOWriter(max_pending=int(config.get("io_writer_max_pending", 32)),
+                           workers=int(config.get("io_writer_workers", 4)))
+    return _writer
+
+def shutdown_io_writer():
+    if _writer is not None:
+        _writer.shutdown()
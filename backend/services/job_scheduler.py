@@ -0,0 +1,204 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional
+from backend.core.config import get_config
+
+JOB_PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+JOB_ACTIONS = ("stop", "finish_early")
+
+class _PrioritySlots:
+    """Counting semaphore whose waiters are served by priority, then FIFO"""
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.in_use = 0
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+
+    def _dispatch(self):
+        while self._waiters and self.in_use < self.limit:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():  # cancelled while waiting
+                continue
+            self.in_use += 1
+            future.set_result(None)
+
+    def resize(self, limit: int):
+        self.limit = max(1, limit)
+        self._dispatch()
+
+    async def acquire(self, priority: int = 1):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.in_use = max(0, self.in_use - 1)
+        self._dispatch()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for w in self._waiters if not w[2].done())
+
+class JobState:
+    """
+    Status of one generation job: queued -> running -> done.
+    stop / finish_early requests move a queued or running job to "stopped" / "finish_early";
+    the pipeline checks the status before queueing each cut. The request also sets `interrupted`
+    and cancels the job's waits for a job / prompt slot (`waits`), so a queued job ends without
+    ever starting and a running one is not held behind other jobs' prompts.
+    """
+    def __init__(self, job_id: str, priority: str = "normal"):
+        self.job_id = job_id
+        self.priority = priority if priority in JOB_PRIORITIES else "normal"
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.in_flight = 0  # this job's prompts currently holding a global slot
+        self.interrupted = asyncio.Event()  # set by stop / finish_early
+        self.waits = set()  # pending slot acquisitions, cancelled on stop / finish_early
+
+    @property
+    def rank(self) -> int:
+        return JOB_PRIORITIES[self.priority]
+
+    def request(self, action: str) -> bool:
+        if action not in JOB_ACTIONS or self.status not in ("queued", "running"):
+            return False
+        self.status = "stopped" if action == "stop" else action
+        self.interrupted.set()
+        for wait in list(self.waits):
+            wait.cancel()
+        return True
+
+    def snapshot(self) -> dict:
+        return {
+            "jobId": self.job_id, "priority": self.priority, "status": self.status,
+            "inFlight": self.in_flight, "createdAt": self.created_at, "startedAt": self.started_at,
+        }
+
+class JobScheduler:
+    """
+    Runs generation jobs side by side.
+
+    At most `max_jobs` jobs run at once; the rest wait in priority order ("high" < "normal" < "low",
+    then FIFO). Across all running jobs at most `max_inflight_prompts` ComfyUI prompts are queued
+    or executing, and a freed prompt slot also goes to the highest-priority job waiting for one.
+    Control requests (stop / finish_early) target a single job by id.
+    """
+    def __init__(self, max_jobs: int = 2, max_inflight_prompts: int = 8):
+        self._job_slots = _PrioritySlots(max_jobs)
+        self._prompt_slots = _PrioritySlots(max_inflight_prompts)
+        self.jobs: Dict[str, JobState] = {}
+
+    def configure(self, max_jobs: int, max_inflight_prompts: int):
+        self._job_slots.resize(max_jobs)
+        self._prompt_slots.resize(max_inflight_prompts)
+
+    def register(self, job_id: str, priority: str = "normal") -> JobState:
+        """Raises ValueError if a job with this id is still queued or running"""
+        existing = self.jobs.get(job_id)
+        if existing is not None and existing.status != "done":
+            raise ValueError(f"Job {job_id} is already active")
+        state = JobState(job_id, priority)
+        self.jobs[job_id] = state
+        # Keep finished jobs around briefly for status queries
+        finished = [s for s in self.jobs.values() if s.status == "done"]
+        for s in sorted(finished, key=lambda s: s.created_at)[:-20]:
+            self.jobs.pop(s.job_id, None)
+        return state
+
+    def position(self, state: JobState) -> int:
+        """Jobs that will be admitted before this one (0 if it can start now)"""
+        if self._job_slots.in_use < self._job_slots.limit:
+            return 0
+        return sum(1 for s in self.jobs.values() if s.status == "queued" and (s.rank, s.created_at) < (state.rank, state.created_at)) + 1
+
+    async def _acquire_for(self, slots: _PrioritySlots, state: JobState) -> bool:
+        """Take a slot in the job's priority; False if stop / finish_early cancelled the wait"""
+        if state.interrupted.is_set():
+            return False
+        wait = asyncio.ensure_future(slots.acquire(state.rank))
+        state.waits.add(wait)
+        try:
+            await asyncio.wait([wait])
+        except asyncio.CancelledError:
+            wait.cancel()
+            if wait.done() and not wait.cancelled():
+                slots.release()
+            raise
+        finally:
+            state.waits.discard(wait)
+        return not wait.cancelled()
+
+    async def admit(self, state: JobState) -> bool:
+        """Wait for a job slot. False if the job was stopped / finished early while still queued."""
+        if state.status != "queued" or not await self._acquire_for(self._job_slots, state):
+            return False
+        state.started_at = time.time()
+        if state.status != "queued":
+            return False  # control request landed between the slot being granted and now
+        state.status = "running"
+        return True
+
+    def finish(self, state: JobState):
+        for wait in list(state.waits):
+            wait.cancel()
+        if state.started_at is not None:
+            self._job_slots.release()
+        while state.in_flight > 0:
+            self.release_prompt(state)
+        state.status = "done"
+
+    async def acquire_prompt(self, state: JobState) -> bool:
+        """Take a global prompt slot. False (holding nothing) once the job is stopped / finishing early."""
+        if not await self._acquire_for(self._prompt_slots, state):
+            return False
+        if state.interrupted.is_set():
+            self._prompt_slots.release()
+            return False
+        state.in_flight += 1
+        return True
+
+    def release_prompt(self, state: JobState):
+        if state.in_flight > 0:
+            state.in_flight -= 1
+            self._prompt_slots.release()
+
+    def get(self, job_id: str) -> Optional[JobState]:
+        return self.jobs.get(job_id)
+
+    def active_jobs(self) -> List[JobState]:
+        return [s for s in self.jobs.values() if s.status in ("queued", "running")]
+
+    def control(self, job_id: str, action: str) -> bool:
+        state = self.jobs.get(job_id)
+        return state.request(action) if state else False
+
+    def status(self) -> dict:
+        return {
+            "maxJobs": self._job_slots.limit, "runningJobs": self._job_slots.in_use, "waitingJobs": self._job_slots.waiting,
+            "maxInflightPrompts": self._prompt_slots.limit, "inflightPrompts": self._prompt_slots.in_use,
+            "jobs": [s.snapshot() for s in self.jobs.values()],
+        }
+
+_scheduler: Optional[JobScheduler] = None
+
+def get_job_scheduler(config: dict = None) -> JobScheduler:
+    """Process-wide scheduler; limits follow max_concurrent_jobs / max_inflight_prompts"""
+    global _scheduler
+    config = config if config is not None else get_config()
+    max_jobs = int(config.get("max_concurrent_jobs", 2))
+    max_prompts = int(config.get("max_inflight_prompts", 8))
+    if _scheduler is None:
+        _scheduler = JobScheduler(max_jobs, max_prompts)
+    else:
+        _scheduler.configure(max_jobs, max_prompts)
+    return _scheduler
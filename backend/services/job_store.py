@@ -0,0 +1,145 @@
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+from backend.core.paths import JOBS_DB_PATH
+
+class JobStore:
+    """
+    Persistent record of queued work (SQLite), so a backend restart does not lose it.
+
+    jobs:        one row per queued generation job / prepared story request (request payload,
+                 status: queued / running / stopped / completed / error, project folder once started)
+    job_prompts: the ComfyUI prompt submitted for each cut (node, prompt_id, seed, workflow)
+    job_cuts:    cuts whose image is saved (filename + final cut data)
+
+    A resumed job skips the cuts in job_cuts and re-attaches to the prompts in job_prompts
+    (ComfyUI may have finished them while the backend was down).
+    """
+    def __init__(self, db_path: str = JOBS_DB_PATH, retention_days: float = 7):
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT,
+                    payload TEXT,
+                    status TEXT,
+                    folder_name TEXT,
+                    created_at REAL,
+                    updated_at REAL
+                )
+            """)
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS job_prompts (
+                    job_id TEXT,
+                    cut_index INTEGER,
+                    record TEXT,
+                    PRIMARY KEY (job_id, cut_index)
+                )
+            """)
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS job_cuts (
+                    job_id TEXT,
+                    cut_index INTEGER,
+                    filename TEXT,
+                    cut TEXT,
+                    completed_at REAL,
+                    PRIMARY KEY (job_id, cut_index)
+                )
+            """)
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=10)
+        db.row_factory = sqlite3.Row
+        return db
+
+    @staticmethod
+    def _job_row(row) -> dict:
+        return {
+            "job_id": row["job_id"], "kind": row["kind"], "payload": json.loads(row["payload"]),
+            "status": row["status"], "folder_name": row["folder_name"],
+            "created_at": row["created_at"], "updated_at": row["updated_at"],
+        }
+
+    def create_job(self, job_id: str, kind: str, payload: dict):
+        now = time.time()
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, 'queued', NULL, ?, ?)",
+                (job_id, kind, json.dumps(payload, ensure_ascii=False), now, now),
+            )
+        self.prune()
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._job_row(row) if row else None
+
+    def list_jobs(self, kind: str = None, statuses=None) -> List[dict]:
+        query, args = "SELECT * FROM jobs WHERE 1 = 1", []
+        if kind:
+            query += " AND kind = ?"
+            args.append(kind)
+        if statuses:
+            query += f" AND status IN ({', '.join('?' for _ in statuses)})"
+            args += list(statuses)
+        with self._connect() as db:
+            rows = db.execute(query + " ORDER BY created_at", args).fetchall()
+        return [self._job_row(row) for row in rows]
+
+    def set_status(self, job_id: str, status: str, folder_name: str = None):
+        with self._lock, self._connect() as db:
+            if folder_name is not None:
+                db.execute("UPDATE jobs SET status = ?, folder_name = ?, updated_at = ? WHERE job_id = ?",
+                           (status, folder_name, time.time(), job_id))
+            else:
+                db.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?", (status, time.time(), job_id))
+
+    def record_prompt(self, job_id: str, cut_index: int, record: dict):
+        with self._lock, self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO job_prompts VALUES (?, ?, ?)",
+                       (job_id, cut_index, json.dumps(record, ensure_ascii=False)))
+            db.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+    def record_cut(self, job_id: str, cut_index: int, filename: str, cut: dict):
+        with self._lock, self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO job_cuts VALUES (?, ?, ?, ?, ?)",
+                       (job_id, cut_index, filename, json.dumps(cut, ensure_ascii=False), time.time()))
+            db.execute("DELETE FROM job_prompts WHERE job_id = ? AND cut_index = ?", (job_id, cut_index))
+            db.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+    def completed_cuts(self, job_id: str) -> Dict[int, dict]:
+        with self._connect() as db:
+            rows = db.execute("SELECT cut_index, filename, cut FROM job_cuts WHERE job_id = ?", (job_id,)).fetchall()
+        return {row["cut_index"]: {"filename": row["filename"], "cut": json.loads(row["cut"])} for row in rows}
+
+    def pending_prompts(self, job_id: str) -> Dict[int, dict]:
+        """Prompts submitted for cuts that have not been saved yet"""
+        with self._connect() as db:
+            rows = db.execute("SELECT cut_index, record FROM job_prompts WHERE job_id = ?", (job_id,)).fetchall()
+        return {row["cut_index"]: json.loads(row["record"]) for row in rows}
+
+    def prune(self):
+        """
+        Drop jobs not updated for retention_days: finished ones, story requests, and generation jobs
+        left queued / running / stopped (a live job updates its row with every prompt and cut)
+        """
+        cutoff = time.time() - self.retention_days * 86400
+        with self._lock, self._connect() as db:
+            stale = [r["job_id"] for r in db.execute("SELECT job_id FROM jobs WHERE updated_at < ?", (cutoff,))]
+            for job_id in stale:
+                db.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+                db.execute("DELETE FROM job_prompts WHERE job_id = ?", (job_id,))
+                db.execute("DELETE FROM job_cuts WHERE job_id = ?", (job_id,))
+
+_job_store: Optional[JobStore] = None
+
+def get_job_store() -> JobStore:
+    global _job_store
+    if _job_store is None:
+        _job_store = JobStore()
+    return _job_store
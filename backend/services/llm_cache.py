@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Optional
+from backend.core.paths import CACHE_DIR
+from backend.core.config import get_config
+from backend.core.utils import atomic_write_json
+
+LLM_CACHE_DIR = os.path.join(CACHE_DIR, "llm")
+
+class _Message:
+    def __init__(self, content: str):
+        self.content = content
+        self.role = "assistant"
+
+class _Choice:
+    def __init__(self, content: str):
+        self.message = _Message(content)
+        self.index = 0
+        self.finish_reason = "stop"
+
+class _Usage:
+    def __init__(self, total_tokens):
+        self.total_tokens = total_tokens
+
+class CachedCompletion:
+    """Minimal stand-in for a ChatCompletion (choices[0].message.content, usage)"""
+    def __init__(self, content: str, total_tokens: Optional[int] = None):
+        self.choices = [_Choice(content)]
+        self.usage = _Usage(total_tokens)
+        self.cached = True
+
+class LLMResponseCache:
+    """
+    Content-addressed on-disk cache of chat completions.
+
+    Key: sha256 of (model, messages, response_format). One small JSON file per entry under
+    CACHE_DIR/llm/<2 hex>/; a hit touches the file so its mtime doubles as the LRU clock.
+    When the cache grows past max_bytes / max_entries the least recently used entries are removed.
+    """
+    def __init__(self, directory: str = LLM_CACHE_DIR, max_bytes: int = 200 * 1024**2, max_entries: int = 20000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._entries = None  # key -> (size, last_used); built on first use
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, messages, response_format=None) -> str:
+        payload = json.dumps({"model": model, "messages": messages, "response_format": response_format},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _load_index(self):
+        if self._entries is not None:
+            return
+        entries = {}
+        total = 0
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if not name.endswith(".json") or name.startswith(".tmp_"):
+                        continue
+                    try:
+                        st = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    entries[name[:-5]] = (st.st_size, st.st_mtime)
+                    total += st.st_size
+        self._entries = entries
+        self._total_bytes = total
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            self._load_index()
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                now = time.time()
+                os.utime(path, (now, now))
+            except (OSError, ValueError):
+                self._forget(key)
+                self.misses += 1
+                return None
+            self._entries[key] = (self._entries[key][0], now)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, content: str, total_tokens: Optional[int] = None):
+        if content is None:
+            return
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                atomic_write_json(path, {"content": content, "total_tokens": total_tokens, "created": time.time()}, ensure_ascii=False)
+                size = os.path.getsize(path)
+            except OSError as e:
+                print(f"[LLMCache] Failed to store entry: {e}")
+                return
+            self._forget(key, remove_file=False)
+            self._entries[key] = (size, time.time())
+            self._total_bytes += size
+            self.stores += 1
+            self._evict()
+
+    def _forget(self, key: str, remove_file: bool = True):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._total_bytes -= entry[0]
+        if remove_file:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes and len(self._entries) <= self.max_entries:
+            return
+        for key, _ in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes * 0.9 and len(self._entries) <= self.max_entries * 0.9:
+                break
+            self._forget(key)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._load_index()
+            for key in list(self._entries):
+                self._forget(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries), "bytes": self._total_bytes, "maxBytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "stores": self.stores, "evictions": self.evictions,
+                "hitRate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+_cache: Optional[LLMResponseCache] = None
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Process-wide LLM response cache, or None when llm_cache_enabled is false"""
+    global _cache
+    config = get_config()
+    if not config.get("llm_cache_enabled", True):
+        return None
+    max_bytes = int(float(config.get("llm_cache_max_mb", 200)) * 1024**2)
+    if _cache is None:
+        _cache = LLMResponseCache(max_bytes=max_bytes)
+    _cache.max_bytes = max_bytes
+    return _cache
@@ -0,0 +1,131 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import List, Optional
+from backend.core.config import get_config
+
+PRIORITIES = {"interactive": 0, "normal": 1, "bulk": 2}
+
+def estimate_tokens(messages: List[dict], completion_tokens: int = 1500) -> int:
+    """
+    Rough token cost of a chat call (prompt + expected completion).
+    Korean text is close to one token per character, English about four characters per token;
+    half the character count is a safe middle ground for a limiter.
+    """
+    chars = sum(len(str(m.get("content", ""))) for m in messages)
+    return chars // 2 + completion_tokens
+
+class _TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it already is)"""
+        missing = amount - self.level
+        return max(0.0, missing / self.rate) if self.rate > 0 else float("inf")
+
+class LLMRateLimiter:
+    """
+    Shared requests-per-minute / tokens-per-minute limiter for every OpenAI call.
+
+    Callers wait in one queue ordered by lane ("interactive" < "normal" < "bulk") and then FIFO,
+    so a click on "regenerate cut" goes ahead of 100 queued story chunks or Veo backfills.
+    A request is released when both buckets (and the in-flight cap) allow it; the token
+    estimate is corrected with the real usage once the response arrives. A 429 pauses the
+    whole queue for the server's retry-after instead of letting every waiter hit it again.
+    """
+    def __init__(self, rpm: int = 500, tpm: int = 200000, max_concurrency: int = 16):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self._requests = _TokenBucket(rpm)
+        self._tokens = _TokenBucket(tpm)
+        self._waiters = []  # heap of (priority, seq, tokens, future)
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _dispatch(self):
+        self._timer = None
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        while self._waiters:
+            priority, seq, tokens, future = self._waiters[0]
+            if future.done():  # cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+            if self._in_flight >= self.max_concurrency:
+                return  # release() dispatches again
+            wait = max(self._paused_until - now, self._requests.wait_time(1), self._tokens.wait_time(tokens))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self._requests.level -= 1
+            self._tokens.level -= tokens
+            self._in_flight += 1
+            future.set_result(None)
+
+    def _schedule(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._dispatch()
+
+    async def acquire(self, tokens: int, priority: str = "normal") -> int:
+        """Wait for a slot. Returns the number of tokens reserved (pass it to release)."""
+        tokens = min(int(tokens), int(self._tokens.capacity))  # a single huge prompt must still fit
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITIES.get(priority, 1), next(self._seq), tokens, future))
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before the cancel landed: give the slot back
+                self.release(tokens, 0)
+            raise
+        return tokens
+
+    def release(self, reserved: int, used: Optional[int] = None):
+        """Finish a request; `used` (actual total tokens) corrects the estimate when known"""
+        self._in_flight = max(0, self._in_flight - 1)
+        if used is not None:
+            self._tokens.level = min(self._tokens.capacity, self._tokens.level + reserved - used)
+        self._schedule()
+
+    def pause(self, seconds: float):
+        """Hold every waiter for `seconds` (after a 429)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._schedule()
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        return {
+            "rpm": self.rpm, "tpm": self.tpm, "inFlight": self._in_flight,
+            "waiting": sum(1 for w in self._waiters if not w[3].done()),
+            "requestsAvailable": int(self._requests.level), "tokensAvailable": int(self._tokens.level),
+            "pausedFor": round(max(0.0, self._paused_until - now), 1),
+        }
+
+_limiter: Optional[LLMRateLimiter] = None
+
+def get_llm_limiter(config: dict = None) -> LLMRateLimiter:
+    """Process-wide limiter (rebuilt when llm_rpm / llm_tpm / llm_max_concurrency change)"""
+    global _limiter
+    config = config if config is not None else get_config()
+    settings = (int(config.get("llm_rpm", 500)), int(config.get("llm_tpm", 200000)), int(config.get("llm_max_concurrency", 16)))
+    if _limiter is None or (_limiter.rpm, _limiter.tpm, _limiter.max_concurrency) != settings:
+        _limiter = LLMRateLimiter(*settings)
+    return _limiter
@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Dict, List, Optional
+from backend.core.paths import CACHE_DIR
+from backend.core.utils import atomic_write_json
+
+MODEL_EXTENSIONS = (".safetensors", ".ckpt")
+
+def model_search_paths(comfy_path: str) -> List[str]:
+    """Checkpoint folders under a ComfyUI install (models/checkpoints, models/diffusion_models)"""
+    return [
+        os.path.join(comfy_path, "models", "checkpoints"),
+        os.path.join(comfy_path, "ComfyUI", "models", "checkpoints"), # Common if path is root
+        os.path.join(comfy_path, "models", "diffusion_models"),
+    ]
+
+class ModelInventory:
+    """
+    Persistent index of model files (relative path, size, mtime) under a set of folders.
+
+    The index lives in CACHE_DIR and survives restarts. A refresh only re-lists directories
+    whose mtime changed (a directory's mtime changes when entries are added, removed or renamed),
+    so on slow/NAS mounts it costs one stat per folder instead of a full os.walk.
+    Lookups are served from memory; refreshes run in a worker thread.
+    """
+    def __init__(self, roots: List[str], refresh_interval: float = 30.0):
+        self.roots = list(roots)
+        self.refresh_interval = refresh_interval
+        key = hashlib.sha1("|".join(self.roots).encode("utf-8")).hexdigest()[:12]
+        self.index_path = os.path.join(CACHE_DIR, f"model_inventory_{key}.json")
+        # root -> {"dirs": {rel_dir: mtime}, "files": {rel_path: {"size": int, "mtime": float}}}
+        self._index: Dict[str, dict] = {}
+        self._models: List[str] = []
+        self._files: Dict[str, dict] = {}
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("roots") == self.roots:
+                self._index = data.get("index", {})
+                self._rebuild_views()
+        except (OSError, ValueError):
+            self._index = {}
+
+    def _save(self):
+        try:
+            atomic_write_json(self.index_path, {"roots": self.roots, "index": self._index})
+        except OSError as e:
+            print(f"[ModelInventory] Failed to persist index: {e}")
+
+    def _rebuild_views(self):
+        files = {}
+        for root in self.roots:
+            for rel, info in self._index.get(root, {}).get("files", {}).items():
+                files.setdefault(rel, {**info, "path": os.path.join(root, rel)})
+        self._files = files
+        self._models = sorted(files.keys())
+
+    def _scan_dir(self, root: str, rel_dir: str, entry: dict):
+        """List one directory: update its files, return its subdirectories"""
+        abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+        prefix = f"{rel_dir}{os.sep}" if rel_dir else ""
+        for rel in [r for r in entry["files"] if os.path.dirname(r) == rel_dir]:
+            del entry["files"][rel]
+        subdirs = []
+        with os.scandir(abs_dir) as it:
+            for item in it:
+                rel = prefix + item.name
+                if item.is_dir():
+                    subdirs.append(rel)
+                elif item.name.endswith(MODEL_EXTENSIONS):
+                    st = item.stat()
+                    entry["files"][rel] = {"size": st.st_size, "mtime": st.st_mtime}
+        return subdirs
+
+    def _drop_dir(self, entry: dict, rel_dir: str):
+        prefix = f"{rel_dir}{os.sep}"
+        for d in [d for d in entry["dirs"] if d == rel_dir or d.startswith(prefix)]:
+            del entry["dirs"][d]
+        for f in [f for f in entry["files"] if f.startswith(prefix)]:
+            del entry["files"][f]
+
+    def refresh_sync(self) -> bool:
+        """Bring the index up to date. Returns True if anything changed."""
+        with self._lock:
+            changed = False
+            for root in self.roots:
+                if not os.path.isdir(root):
+                    if self._index.pop(root, None) is not None:
+                        changed = True
+                    continue
+                entry = self._index.setdefault(root, {"dirs": {}, "files": {}})
+                pending = [""] + [d for d in entry["dirs"] if d]
+                seen = set()
+                while pending:
+                    rel_dir = pending.pop()
+                    if rel_dir in seen:
+                        continue
+                    seen.add(rel_dir)
+                    abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+                    try:
+                        mtime = os.stat(abs_dir).st_mtime
+                    except OSError:
+                        self._drop_dir(entry, rel_dir)
+                        changed = True
+                        continue
+                    if entry["dirs"].get(rel_dir) == mtime:
+                        continue
+                    subdirs = self._scan_dir(root, rel_dir, entry)
+                    entry["dirs"][rel_dir] = mtime
+                    changed = True
+                    known = set(entry["dirs"])
+                    for sub in subdirs:
+                        if sub not in known:
+                            pending.append(sub)
+                    # Subdirectories that disappeared from this listing
+                    for d in [d for d in known if d and os.path.dirname(d) == rel_dir and d not in subdirs]:
+                        self._drop_dir(entry, d)
+            if changed:
+                self._rebuild_views()
+                self._save()
+            self._last_refresh = time.monotonic()
+            return changed
+
+    async def refresh(self):
+        await asyncio.to_thread(self.refresh_sync)
+
+    def _schedule_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.refresh())
+
+    async def list_models(self) -> List[str]:
+        """
+        Sorted model names (relative to their folder).
+        Served from the index; a stale index is refreshed in the background. Only a cold index
+        (first run) waits for the scan.
+        """
+        if not self._index:
+            await self.refresh()
+        elif time.monotonic() - self._last_refresh > self.refresh_interval:
+            self._schedule_refresh()
+        return self._models
+
+    def get(self, name: str) -> Optional[dict]:
+        """{"path", "size", "mtime"} for a model name, or None"""
+        return self._files.get(name)
+
+    def size_of(self, name: str) -> Optional[int]:
+        """File size in bytes (a proxy for how long the model takes to load)"""
+        info = self._files.get(name)
+        return info["size"] if info else None
+
+    def sizes(self) -> Dict[str, int]:
+        return {name: info["size"] for name, info in self._files.items()}
+
+_inventories: Dict[str, ModelInventory] = {}
+
+def get_model_inventory(comfy_path: str) -> ModelInventory:
+    inventory = _inventories.get(comfy_path)
+    if inventory is None:
+        inventory = ModelInventory(model_search_paths(comfy_path))
+        _inventories[comfy_path] = inventory
+    return inventory
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+from backend.core.config import get_config
+from backend.services.comfyui_service import get_comfyui_client, get_comfyui_servers
+
+class NodeRegistry:
+    """
+    Process-wide cache of ComfyUI's full /object_info, one entry per server.
+    Capability questions (is node X installed, which checkpoints exist, what inputs does a node take)
+    are answered from memory; the catalogue is re-fetched after `ttl` seconds or on invalidate().
+    """
+    def __init__(self, ttl: float = 600.0, failure_ttl: float = 5.0):
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self._info: Dict[str, dict] = {}
+        self._fetched_at: Dict[str, float] = {}
+        self._failed: Dict[str, tuple] = {}  # server -> (failed_at, exception); avoids repeated connect timeouts
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _server(self, server_address: Optional[str]) -> str:
+        return server_address or get_comfyui_servers()[0]
+
+    def is_warm(self, server_address: str = None) -> bool:
+        server = self._server(server_address)
+        fetched_at = self._fetched_at.get(server)
+        return fetched_at is not None and time.monotonic() - fetched_at < self.ttl
+
+    def invalidate(self, server_address: str = None):
+        """Drop cached object_info for one server (or all servers)"""
+        if server_address is None:
+            self._info.clear()
+            self._fetched_at.clear()
+            self._failed.clear()
+        else:
+            self._info.pop(server_address, None)
+            self._fetched_at.pop(server_address, None)
+            self._failed.pop(server_address, None)
+
+    async def get_object_info(self, server_address: str = None) -> dict:
+        """Full /object_info for a server. Raises if the server cannot be reached and nothing is cached."""
+        server = self._server(server_address)
+        if self.is_warm(server):
+            return self._info[server]
+        lock = self._locks.setdefault(server, asyncio.Lock())
+        async with lock:
+            # Another waiter may have refreshed it while we were queued on the lock
+            if self.is_warm(server):
+                return self._info[server]
+            failed = self._failed.get(server)
+            if failed and time.monotonic() - failed[0] < self.failure_ttl:
+                raise failed[1]
+            try:
+                info = await get_comfyui_client(server).get_object_info()
+            except Exception as e:
+                self._failed[server] = (time.monotonic(), e)
+                if server in self._info:
+                    return self._info[server]  # serve the expired catalogue rather than nothing
+                raise
+            self._failed.pop(server, None)
+            self._info[server] = info
+            self._fetched_at[server] = time.monotonic()
+            return info
+
+    async def has_node(self, node_class: str, server_address: str = None) -> bool:
+        return node_class in await self.get_object_info(server_address)
+
+    async def node_inputs(self, node_class: str, server_address: str = None) -> dict:
+        """{"required": {...}, "optional": {...}} for a node class ({} if unknown)"""
+        info = await self.get_object_info(server_address)
+        return info.get(node_class, {}).get("input", {})
+
+    async def input_choices(self, node_class: str, input_name: str, server_address: str = None) -> List[str]:
+        """Allowed values of a combo input, e.g. CheckpointLoaderSimple.ckpt_name"""
+        inputs = await self.node_inputs(node_class, server_address)
+        spec = inputs.get("required", {}).get(input_name) or inputs.get("optional", {}).get(input_name) or []
+        if spec and isinstance(spec[0], list):
+            return spec[0]
+        return []
+
+    async def list_checkpoints(self, server_address: str = None) -> List[str]:
+        return await self.input_choices("CheckpointLoaderSimple", "ckpt_name", server_address)
+
+    async def list_ipadapters(self, server_address: str = None) -> List[str]:
+        return await self.input_choices("IPAdapterModelLoader", "ipadapter_file", server_address)
+
+_registry: Optional[NodeRegistry] = None
+
+def get_node_registry() -> NodeRegistry:
+    global _registry
+    if _registry is None:
+        _registry = NodeRegistry(ttl=float(get_config().get("object_info_ttl", 600)))
+    return _registry
@@ -2,30 +2,158 @@ import os
 import json
 import re
 import asyncio
+import random
 import time
 from typing import List, AsyncGenerator
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, RateLimitError
 from sse_starlette.sse import EventSourceResponse
 
-from backend.core.config import load_config, DEFAULT_PROMPTS
-from backend.core.utils import clean_string, robust_parse_json
+from backend.core.config import get_config, DEFAULT_PROMPTS
+from backend.core.utils import clean_string, robust_parse_json, shingles, jaccard_similarity, StreamingArrayParser
 from backend.core.schemas import (
     DraftRequest, RegenerateDraftRequest, StoryRequest, 
     PrepareStoryRequest, RegenerateCutRequest, TitleRequest, 
     ParseScriptRequest
 )
 from backend.core.paths import OUTPUTS_DIR
-
-# Globals (for streaming context)
-temp_story_data = {}
+from backend.services.llm_limiter import get_llm_limiter, estimate_tokens
+from backend.services.llm_cache import get_llm_cache, CachedCompletion
+from backend.services.job_store import get_job_store
+
+LLM_MODEL = "gpt-5-mini-2025-08-07"
+
+# Process-wide AsyncOpenAI client as (api_key, client).
+# Rebuilt only when the API key changes, so calls reuse warm keep-alive connections.
+_openai_client = None
+
+def _openai_http_client(config) -> httpx.AsyncClient:
+    pool_size = int(config.get("openai_pool_size", 20))
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=float(config.get("openai_keepalive", 60.0)),
+        ),
+        timeout=httpx.Timeout(float(config.get("openai_timeout", 120.0)), connect=10.0),
+    )
 
 def get_openai_client():
-    """Get OpenAI client with API key from config"""
-    config = load_config()
+    """Shared AsyncOpenAI client for the API key in config (None if no key is set)"""
+    global _openai_client
+    config = get_config()
     api_key = config.get("openai_api_key")
     if not api_key:
         return None
-    return OpenAI(api_key=api_key)
+    if _openai_client and _openai_client[0] == api_key:
+        return _openai_client[1]
+    previous = _openai_client
+    _openai_client = (api_key, AsyncOpenAI(api_key=api_key, http_client=_openai_http_client(config)))
+    if previous:
+        try:
+            asyncio.get_running_loop().create_task(previous[1].close())
+        except RuntimeError:
+            pass
+    return _openai_client[1]
+
+async def close_openai_clients():
+    """Close pooled OpenAI connections (app shutdown)"""
+    global _openai_client
+    if _openai_client:
+        await _openai_client[1].close()
+        _openai_client = None
+
+LLM_RATE_LIMIT_RETRIES = 3
+
+def _retry_after(error: RateLimitError, attempt: int) -> float:
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return min(60.0, 2.0 * 2 ** attempt)
+
+async def _create_limited(client, messages: List[dict], priority: str, **kwargs):
+    """Create a completion through the shared rate limiter. Returns (response, limiter, reserved tokens)."""
+    limiter = get_llm_limiter()
+    estimate = estimate_tokens(messages, int(kwargs.get("max_completion_tokens") or kwargs.get("max_tokens") or 1500))
+    for attempt in range(LLM_RATE_LIMIT_RETRIES + 1):
+        reserved = await limiter.acquire(estimate, priority)
+        try:
+            response = await client.chat.completions.create(model=LLM_MODEL, messages=messages, **kwargs)
+            return response, limiter, reserved
+        except RateLimitError as e:
+            limiter.release(reserved)
+            if attempt == LLM_RATE_LIMIT_RETRIES:
+                raise
+            delay = _retry_after(e, attempt)
+            print(f"[LLM] 429 rate limited, pausing queue for {delay:.1f}s (attempt {attempt + 1})")
+            limiter.pause(delay)
+        except BaseException:
+            limiter.release(reserved)
+            raise
+
+def _cache_lookup(cache: bool, messages: List[dict], kwargs: dict):
+    """(cache, key) for a cacheable call, else (None, None)"""
+    llm_cache = get_llm_cache() if cache else None
+    if llm_cache is None:
+        return None, None
+    return llm_cache, llm_cache.make_key(LLM_MODEL, messages, kwargs.get("response_format"))
+
+def _cacheable(content, finish_reason, kwargs: dict, expect_json: bool) -> bool:
+    """Only complete replies are worth replaying: finished with "stop" and, for JSON calls, parseable"""
+    if finish_reason != "stop" or not content or not content.strip():
+        return False
+    if expect_json or (kwargs.get("response_format") or {}).get("type") == "json_object":
+        return robust_parse_json(content) is not None
+    return True
+
+async def create_chat_completion(client, messages: List[dict], priority: str = "normal", cache: bool = True, expect_json: bool = False, **kwargs):
+    """
+    Single entry point for chat completions (non-blocking; the event loop keeps serving other requests).
+    priority: "interactive" (user is waiting on this one call), "normal", or "bulk" (chunks, Veo backfill).
+    cache: serve identical (model, messages, response_format) calls from the on-disk cache;
+    pass False for generations that are meant to differ every time (drafts, regenerations).
+    expect_json: the caller parses JSON out of a plain-text reply; don't cache replies that don't contain any.
+    """
+    llm_cache, key = _cache_lookup(cache, messages, kwargs)
+    if llm_cache:
+        entry = await asyncio.to_thread(llm_cache.get, key)
+        if entry is not None:
+            return CachedCompletion(entry["content"], entry.get("total_tokens"))
+
+    response, limiter, reserved = await _create_limited(client, messages, priority, **kwargs)
+    usage = getattr(response, "usage", None)
+    limiter.release(reserved, getattr(usage, "total_tokens", None))
+    if llm_cache:
+        choice = response.choices[0]
+        if _cacheable(choice.message.content, getattr(choice, "finish_reason", None), kwargs, expect_json):
+            await asyncio.to_thread(llm_cache.put, key, choice.message.content, getattr(usage, "total_tokens", None))
+    return response
+
+async def stream_chat_completion(client, messages: List[dict], priority: str = "normal", cache: bool = True, expect_json: bool = False, **kwargs) -> AsyncGenerator[str, None]:
+    """Yield content deltas of a streamed chat completion as they arrive (a cache hit arrives as one delta)"""
+    llm_cache, key = _cache_lookup(cache, messages, kwargs)
+    if llm_cache:
+        entry = await asyncio.to_thread(llm_cache.get, key)
+        if entry is not None:
+            yield entry["content"]
+            return
+
+    stream, limiter, reserved = await _create_limited(client, messages, priority, stream=True, **kwargs)
+    full_text = ""
+    finish_reason = None
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            if chunk.choices[0].finish_reason:
+                finish_reason = chunk.choices[0].finish_reason
+            if chunk.choices[0].delta.content:
+                full_text += chunk.choices[0].delta.content
+                yield chunk.choices[0].delta.content
+    finally:
+        limiter.release(reserved)
+    if llm_cache and _cacheable(full_text, finish_reason, kwargs, expect_json):
+        await asyncio.to_thread(llm_cache.put, key, full_text)
 
 async def generate_drafts(req: DraftRequest):
     client = get_openai_client()
@@ -33,7 +161,7 @@ async def generate_drafts(req: DraftRequest):
         return {"success": False, "error": "OpenAI API Key is missing", "drafts": [], "source": "error"}
 
     try:
-        config = load_config()
+        config = get_config()
         system_prompt = config.get("prompts", {}).get("draft_generation", "당신은 실사 영상 스토리 작가입니다. 10가지 스토리 초안을 JSON 배열로 반환하세요.")
         
         system_prompt = system_prompt.replace("{{count}}", "10")
@@ -42,8 +170,10 @@ async def generate_drafts(req: DraftRequest):
         
         user_input = req.customInput if req.customInput else f"카테고리: {req.category}"
         
-        response = client.chat.completions.create(
-            model="gpt-5-mini-2025-08-07",
+        response = await create_chat_completion(
+            client,
+            priority="interactive",
+            cache=False,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_input}
@@ -62,7 +192,7 @@ async def generate_drafts(req: DraftRequest):
         return {"success": False, "drafts": [{"id": 1, "title": "API Error", "summary": str(e), "theme": "error"}], "error": str(e)}
 
 async def generate_drafts_stream(mode: str = "long", category: str = None, customInput: str = None):
-    config = load_config()
+    config = get_config()
     client = get_openai_client()
     
     async def event_generator():
@@ -87,21 +217,13 @@ async def generate_drafts_stream(mode: str = "long", category: str = None, custo
             
             user_input = customInput if customInput else f"카테고리: {category}"
             
-            stream = client.chat.completions.create(
-                model="gpt-5-mini-2025-08-07",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_input}
-                ],
-                stream=True
-            )
-            
             full_text = ""
-            for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    delta_text = chunk.choices[0].delta.content
-                    full_text += delta_text
-                    yield {"event": "delta", "data": json.dumps({"text": delta_text})}
+            async for delta_text in stream_chat_completion(client, priority="interactive", cache=False, messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_input}
+            ]):
+                full_text += delta_text
+                yield {"event": "delta", "data": json.dumps({"text": delta_text})}
             
             # Final Parse
             json_match = re.search(r'\[.*\]', full_text, re.DOTALL)
@@ -116,28 +238,149 @@ async def generate_drafts_stream(mode: str = "long", category: str = None, custo
     
     return EventSourceResponse(event_generator())
 
-async def generate_drafts_parallel(mode: str = "long", category: str = None, customInput: str = None):
-    config = load_config()
+DRAFT_COUNT = 10
+DRAFT_SIMILARITY_THRESHOLD = 0.35  # Jaccard over title+summary trigrams
+DRAFT_MAX_RETRIES = 2
+
+# One angle per concurrent draft so the 10 requests diverge without seeing each other
+DRAFT_ANGLES = [
+    "배경: 대도시 한복판, 계절: 한겨울",
+    "배경: 외딴 시골 마을, 계절: 장마철",
+    "배경: 깊은 산속, 계절: 가을",
+    "배경: 해안가/항구, 계절: 태풍이 오는 여름",
+    "배경: 재개발 지역/폐허, 시간: 새벽",
+    "배경: 고속도로/휴게소, 시간: 한밤중",
+    "시점: 구조하는 사람의 시선에서 전개",
+    "시점: 주인공 동물의 시선에서 전개",
+    "구조: 과거 회상과 현재가 교차하는 전개",
+    "구조: 하루 동안 벌어지는 시간 제한 서사",
+]
+
+def _draft_prompt(base_prompt_template: str, draft_id: int) -> str:
+    current_prompt = base_prompt_template.replace("{{count}}", "1")
+    current_prompt += f"\n\n지금 생성할 초안 번호: {draft_id}/{DRAFT_COUNT}"
+    return current_prompt
+
+def _draft_output_rules(draft_id: int) -> str:
+    return (
+        "\n반드시 단일 객체만 반환: {\"id\": " + str(draft_id) + ", \"title\": \"...\", \"summary\": \"...\", \"theme\": \"...\"}"
+        "\n[중요] summary와 title 모두 한국어로 작성하세요."
+    )
+
+def _parse_draft(full_response: str, draft_id: int) -> dict:
+    json_match = re.search(r'\{.*\}', full_response, re.DOTALL)
+    if json_match:
+        draft = json.loads(json_match.group())
+        draft["id"] = draft_id
+    else:
+        draft = {"id": draft_id, "title": f"Story #{draft_id}", "summary": full_response[:400], "theme": "parsed"}
+    return draft
+
+def _draft_shingles(draft: dict) -> set:
+    return shingles(f"{draft.get('title', '')} {draft.get('summary', '')}")
+
+async def generate_drafts_parallel(mode: str = "long", category: str = None, customInput: str = None, concurrent: bool = True):
+    """
+    Stream 10 drafts as per-draft SSE events (delta / draft / complete).
+    concurrent=True fires all drafts at once, each with its own angle (DRAFT_ANGLES); a draft whose
+    title+summary is too similar to an accepted one is regenerated (a "retry" event resets its deltas).
+    concurrent=False keeps the serial mode where each prompt lists the previous summaries.
+    """
+    config = get_config()
     client = get_openai_client()
-    
-    async def event_generator():
+
+    protagonist_prompt = config.get("prompts", {}).get("protagonist_prompt", "20대 중반의 한국인 여성")
+    base_prompt_template = config.get("prompts", {}).get("draft_generation", "스토리 작가입니다.")
+    base_prompt_template = base_prompt_template.replace("{{protagonist}}", protagonist_prompt)
+    base_prompt_template = base_prompt_template.replace("{{category}}", category or "ALL")
+    user_input = customInput if customInput else f"카테고리: {category}"
+
+    async def concurrent_event_generator():
+        if not client:
+            yield {"event": "error", "data": json.dumps({"error": "OpenAI API Key is missing"})}
+            return
+
+        events = asyncio.Queue()
+        attempts = {}
+        tasks = []
+
+        def launch(draft_id: int, avoid: dict = None):
+            attempt = attempts.get(draft_id, 0)
+            attempts[draft_id] = attempt + 1
+            # A retried draft moves to a different angle
+            angle = DRAFT_ANGLES[(draft_id - 1 + attempt * 3) % len(DRAFT_ANGLES)]
+            prompt = _draft_prompt(base_prompt_template, draft_id)
+            prompt += f"\n\n[이번 초안의 방향] {angle}"
+            prompt += f"\n[변주 시드] {random.randint(1000, 9999)}"
+            if avoid:
+                prompt += f"\n\n[피해야 할 기존 초안] [{avoid.get('title', '')}] {avoid.get('summary', '')[:100]}..."
+                prompt += "\n[지시사항] 위 안과는 소재, 전개, 분위기가 **완전히 다른** 새로운 이야기를 만드세요."
+            prompt += _draft_output_rules(draft_id)
+
+            async def run():
+                full_response = ""
+                try:
+                    async for content in stream_chat_completion(client, [{"role": "system", "content": prompt}, {"role": "user", "content": user_input}], priority="interactive", cache=False):
+                        full_response += content
+                        await events.put(("delta", draft_id, content))
+                    draft = _parse_draft(full_response, draft_id)
+                except Exception as e:
+                    draft = {"id": draft_id, "title": f"Error #{draft_id}", "summary": str(e), "theme": "error"}
+                await events.put(("done", draft_id, draft))
+
+            tasks.append(asyncio.create_task(run()))
+
+        try:
+            for i in range(DRAFT_COUNT):
+                launch(i + 1)
+
+            accepted = []  # (draft, shingles)
+            remaining = DRAFT_COUNT
+            while remaining:
+                kind, draft_id, payload = await events.get()
+                if kind == "delta":
+                    yield {"event": "delta", "data": json.dumps({"draft_id": draft_id, "text": payload})}
+                    continue
+
+                draft = payload
+                if draft.get("theme") != "error":
+                    fingerprint = _draft_shingles(draft)
+                    similar, score = None, 0.0
+                    for other, other_fingerprint in accepted:
+                        sim = jaccard_similarity(fingerprint, other_fingerprint)
+                        if sim > score:
+                            similar, score = other, sim
+                    if score >= DRAFT_SIMILARITY_THRESHOLD and attempts[draft_id] <= DRAFT_MAX_RETRIES:
+                        yield {"event": "retry", "data": json.dumps({"draft_id": draft_id, "similar_to": similar.get("id"), "similarity": round(score, 2)})}
+                        launch(draft_id, avoid=similar)
+                        continue
+                    accepted.append((draft, fingerprint))
+
+                yield {"event": "draft", "data": json.dumps(draft)}
+                remaining -= 1
+
+            retried = sum(1 for n in attempts.values() if n > 1)
+            yield {"event": "complete", "data": json.dumps({"total": DRAFT_COUNT, "retried": retried, "source": "openai_concurrent"})}
+
+        except Exception as e:
+            yield {"event": "error", "data": json.dumps({"error": str(e)})}
+        finally:
+            # Client went away (or we are done): stop any draft still streaming
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def serial_event_generator():
         if not client:
             yield {"event": "error", "data": json.dumps({"error": "OpenAI API Key is missing"})}
             return
         
         try:
-            protagonist_prompt = config.get("prompts", {}).get("protagonist_prompt", "20대 중반의 한국인 여성")
-            base_prompt_template = config.get("prompts", {}).get("draft_generation", "스토리 작가입니다.")
-            base_prompt_template = base_prompt_template.replace("{{protagonist}}", protagonist_prompt)
-            base_prompt_template = base_prompt_template.replace("{{category}}", category or "ALL")
-            
-            user_input = customInput if customInput else f"카테고리: {category}"
             previous_summaries = []
 
-            for i in range(10):
+            for i in range(DRAFT_COUNT):
                 draft_id = i + 1
-                current_prompt = base_prompt_template.replace("{{count}}", "1")
-                current_prompt += f"\n\n지금 생성할 초안 번호: {draft_id}/10"
+                current_prompt = _draft_prompt(base_prompt_template, draft_id)
                 
                 if previous_summaries:
                     current_prompt += "\n\n[이전에 생성된 초안들 (중복 회피용)]"
@@ -145,30 +388,15 @@ async def generate_drafts_parallel(mode: str = "long", category: str = None, cus
                         current_prompt += f"\n- {idx+1}. {summary[:100]}..."
                     current_prompt += "\n\n[지시사항] 위 안들과는 소재, 전개, 분위기가 **완전히 다른** 새로운 이야기를 만드세요."
                 
-                current_prompt += "\n반드시 단일 객체만 반환: {\"id\": " + str(draft_id) + ", \"title\": \"...\", \"summary\": \"...\", \"theme\": \"...\"}"
-                current_prompt += "\n[중요] summary와 title 모두 한국어로 작성하세요."
+                current_prompt += _draft_output_rules(draft_id)
 
                 try:
-                    stream = client.chat.completions.create(
-                        model="gpt-5-mini-2025-08-07",
-                        messages=[{"role": "system", "content": current_prompt}, {"role": "user", "content": user_input}],
-                        stream=True
-                    )
-
                     full_response = ""
-                    for chunk in stream:
-                        if chunk.choices[0].delta.content:
-                            content = chunk.choices[0].delta.content
-                            full_response += content
-                            yield {"event": "delta", "data": json.dumps({"draft_id": draft_id, "text": content})}
-
-                    json_match = re.search(r'\{.*\}', full_response, re.DOTALL)
-                    if json_match:
-                        draft = json.loads(json_match.group())
-                        draft["id"] = draft_id
-                    else:
-                        draft = {"id": draft_id, "title": f"Story #{draft_id}", "summary": full_response[:400], "theme": "parsed"}
-                    
+                    async for content in stream_chat_completion(client, [{"role": "system", "content": current_prompt}, {"role": "user", "content": user_input}], priority="interactive", cache=False):
+                        full_response += content
+                        yield {"event": "delta", "data": json.dumps({"draft_id": draft_id, "text": content})}
+
+                    draft = _parse_draft(full_response, draft_id)
                     yield {"event": "draft", "data": json.dumps(draft)}
                     previous_summaries.append(f"[{draft.get('title', 'Untitled')}] {draft.get('summary', '')}")
 
@@ -177,12 +405,12 @@ async def generate_drafts_parallel(mode: str = "long", category: str = None, cus
                     yield {"event": "draft", "data": json.dumps(error_draft)}
                     previous_summaries.append("Error during generation")
 
-            yield {"event": "complete", "data": json.dumps({"total": 10, "source": "openai_serial_context"})}
+            yield {"event": "complete", "data": json.dumps({"total": DRAFT_COUNT, "source": "openai_serial_context"})}
 
         except Exception as e:
             yield {"event": "error", "data": json.dumps({"error": str(e)})}
     
-    return EventSourceResponse(event_generator())
+    return EventSourceResponse(concurrent_event_generator() if concurrent else serial_event_generator())
 
 async def regenerate_draft(req: RegenerateDraftRequest):
     client = get_openai_client()
@@ -190,7 +418,7 @@ async def regenerate_draft(req: RegenerateDraftRequest):
         return {"success": False, "error": "OpenAI API Key is missing"}
 
     try:
-        config = load_config()
+        config = get_config()
         protagonist_prompt = config.get("prompts", {}).get("protagonist_prompt", "20대 중반의 한국인 여성")
         base_prompt = config.get("prompts", {}).get("draft_generation", "스토리 작가입니다.")
         base_prompt = base_prompt.replace("{{protagonist}}", protagonist_prompt)
@@ -203,8 +431,10 @@ async def regenerate_draft(req: RegenerateDraftRequest):
         single_prompt += "\n반드시 단일 객체만 반환: {\"id\": " + str(req.draftId) + ", \"title\": \"...\", \"summary\": \"...\", \"theme\": \"...\"}"
         single_prompt += "\n[중요] summary와 title 모두 한국어로 작성하세요."
 
-        response = client.chat.completions.create(
-            model="gpt-5-mini-2025-08-07",
+        response = await create_chat_completion(
+            client,
+            priority="interactive",
+            cache=False,
             messages=[{"role": "system", "content": single_prompt}, {"role": "user", "content": user_input}]
         )
         
@@ -228,7 +458,7 @@ async def generate_story(req: StoryRequest):
          return {"success": False, "error": "OpenAI API Key is missing"}
 
     total_cuts = 100 if req.mode == "long" else 20
-    config = load_config()
+    config = get_config()
     
     try:
         system_prompt = config.get("prompts", {}).get("story_confirmation", "")
@@ -251,8 +481,10 @@ async def generate_story(req: StoryRequest):
             f"필수: 각 컷에 'description'(한글)과 'imagePrompt'(영문)를 모두 포함하세요."
         )
         
-        response = client.chat.completions.create(
-            model="gpt-5-mini-2025-08-07",
+        response = await create_chat_completion(
+            client,
+            priority="interactive",
+            expect_json=True,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_input}
@@ -277,17 +509,18 @@ async def generate_story(req: StoryRequest):
 async def prepare_story_generation(req: PrepareStoryRequest):
     import uuid
     request_id = str(uuid.uuid4())
-    temp_story_data[request_id] = {
+    await asyncio.to_thread(get_job_store().create_job, request_id, "story", {
         "draftId": req.draftId,
         "draftTitle": req.draftTitle,
         "draftSummary": req.draftSummary,
         "mode": req.mode
-    }
+    })
     return {"requestId": request_id}
 
 async def story_generation_stream(requestId: str = None, draftId: int = None, draftTitle: str = None, draftSummary: str = None, mode: str = "long"):
-    if requestId and requestId in temp_story_data:
-        data = temp_story_data[requestId]
+    story_request = await asyncio.to_thread(get_job_store().get_job, requestId) if requestId else None
+    if story_request:
+        data = story_request["payload"]
         draftTitle = data["draftTitle"]
         draftSummary = data["draftSummary"]
         mode = data["mode"]
@@ -298,10 +531,11 @@ async def story_generation_stream(requestId: str = None, draftId: int = None, dr
     chunk_size = 10
     total_chunks = (total_cuts + chunk_size - 1) // chunk_size
     
-    config = load_config()
+    config = get_config()
     client = get_openai_client()
 
-    async def generate_chunk_task(chunk_idx, start_cut, end_cut, guide, context=""):
+    async def generate_chunk_task(events, chunk_idx, start_cut, end_cut, guide, context=""):
+        """Stream one chunk; every cut is put on `events` as soon as its JSON object closes"""
         try:
             prompt_template = config.get("prompts", {}).get("story_chunk_generation", "")
             if not prompt_template: prompt_template = DEFAULT_PROMPTS.get("story_chunk_generation")
@@ -316,34 +550,40 @@ async def story_generation_stream(requestId: str = None, draftId: int = None, dr
             
             user_msg = f"Generate cuts {start_cut} to {end_cut}. Guide: {guide}. Context: {context}. Output valid JSON."
             
-            response = await asyncio.to_thread(
-                client.chat.completions.create,
-                model="gpt-5-mini-2025-08-07",
+            parser = StreamingArrayParser()
+            streamed_cuts = []
+            content = ""
+            async for delta in stream_chat_completion(
+                client,
+                priority="bulk",
                 messages=[
                     {"role": "system", "content": prompt},
                     {"role": "user", "content": user_msg}
                 ],
                 response_format={"type": "json_object"}
-            )
-            content = response.choices[0].message.content
-            
-            parsed = robust_parse_json(content)
-            if not parsed:
-                # print(f"[DEBUG] Chunk {chunk_idx} Parsing Failed!")
-                parsed = {}
-            # else:
-            #      print(f"[DEBUG] Chunk {chunk_idx} Parsed Successfully. Cuts: {len(parsed.get('cuts', []))}") 
+            ):
+                content += delta
+                for cut in parser.feed(delta):
+                    if not isinstance(cut, dict):
+                        continue
+                    # Post-process: ensure cut numbers are correct
+                    cut["cutNumber"] = start_cut + len(streamed_cuts)
+                    cut["characterTag"] = "The Wild Animal"
+                    streamed_cuts.append(cut)
+                    await events.put(("cut", cut))
 
-            cuts = parsed.get("cuts", [])
-            
-            # Post-process: ensure cut numbers are correct
+            parsed = robust_parse_json(content)
+            cuts = parsed.get("cuts", []) if isinstance(parsed, dict) else []
+            if len(cuts) < len(streamed_cuts):
+                cuts = streamed_cuts
             for i, cut in enumerate(cuts):
                 cut["cutNumber"] = start_cut + i
                 cut["characterTag"] = "The Wild Animal"
                 
-            return {"index": chunk_idx, "cuts": cuts, "text": f"\n[Chunk {chunk_idx+1} Done] Generated {len(cuts)} cuts.\n"}
+            result = {"index": chunk_idx, "cuts": cuts, "text": f"\n[Chunk {chunk_idx+1} Done] Generated {len(cuts)} cuts.\n"}
         except Exception as e:
-            return {"index": chunk_idx, "cuts": [], "text": f"\n[Chunk {chunk_idx+1} Error] {str(e)}\n", "error": str(e)}
+            result = {"index": chunk_idx, "cuts": [], "text": f"\n[Chunk {chunk_idx+1} Error] {str(e)}\n", "error": str(e)}
+        await events.put(("done", result))
 
     async def event_generator():
         if not client:
@@ -361,9 +601,9 @@ async def story_generation_stream(requestId: str = None, draftId: int = None, dr
             blueprint_prompt = blueprint_prompt.replace("{{story_summary}}", draftSummary)
             blueprint_prompt = blueprint_prompt.replace("{{theme}}", "Nature Drama")
 
-            bp_response = await asyncio.to_thread(
-                client.chat.completions.create,
-                model="gpt-5-mini-2025-08-07",
+            bp_response = await create_chat_completion(
+                client,
+                priority="normal",
                 messages=[{"role": "system", "content": blueprint_prompt}, {"role": "user", "content": "Generate Blueprint JSON."}],
                 response_format={"type": "json_object"}
             )
@@ -377,6 +617,7 @@ async def story_generation_stream(requestId: str = None, draftId: int = None, dr
             yield {"event": "delta", "data": json.dumps({"text": "✅ Blueprint Created. Starting Parallel Generation...\n"})}
 
             # Phase 2: Parallel Execution
+            events = asyncio.Queue()
             tasks = []
             for i in range(total_chunks):
                 start = i * chunk_size + 1
@@ -388,21 +629,25 @@ async def story_generation_stream(requestId: str = None, draftId: int = None, dr
                     guide_text = guides[i].get("guide", "Follow plot.")
                     context_text = guides[i].get("context", "Standard scene context.")
                 
-                tasks.append(generate_chunk_task(i, start, end, guide_text, context_text))
+                tasks.append(asyncio.create_task(generate_chunk_task(events, i, start, end, guide_text, context_text)))
             
-            # Stream results as they complete
+            # Stream cuts as their objects close, and chunk results as chunks complete
             all_cuts = []
-            # print(f"[DEBUG] Starting collection of {len(tasks)} chunks...")
-            for future in asyncio.as_completed(tasks):
-                result = await future
-                # print(f"[DEBUG] Chunk {result.get('index')} finished. Cuts found: {len(result.get('cuts', []))}")
-                if result.get("cuts"):
-                    all_cuts.extend(result["cuts"])
-                else:
-                    # print(f"[DEBUG] Chunk {result.get('index')} Failed/Empty: {result.get('text')}")
-                    pass
-                    
-                yield {"event": "delta", "data": json.dumps({"text": result["text"]})}
+            pending_chunks = len(tasks)
+            try:
+                while pending_chunks:
+                    kind, payload = await events.get()
+                    if kind == "cut":
+                        yield {"event": "cut", "data": json.dumps(payload)}
+                        continue
+                    pending_chunks -= 1
+                    if payload.get("cuts"):
+                        all_cuts.extend(payload["cuts"])
+                    yield {"event": "delta", "data": json.dumps({"text": payload["text"]})}
+            finally:
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
             
             # Phase 3: Finalize
             all_cuts.sort(key=lambda x: x["cutNumber"])
@@ -428,7 +673,7 @@ async def regenerate_cut(req: RegenerateCutRequest):
     if not client:
         return {"success": False, "error": "OpenAI API Key is missing"}
 
-    config = load_config()
+    config = get_config()
     try:
         system_prompt = config.get("prompts", {}).get("single_cut_regeneration", "")
         if not system_prompt:
@@ -447,8 +692,10 @@ async def regenerate_cut(req: RegenerateCutRequest):
         
         user_input = f"Regenerate cut {req.cutNumber}..."
         
-        response = client.chat.completions.create(
-            model="gpt-5-mini-2025-08-07",
+        response = await create_chat_completion(
+            client,
+            priority="interactive",
+            cache=False,
             messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_input}]
         )
         
@@ -470,13 +717,15 @@ async def generate_titles(req: TitleRequest):
     if not client:
         return {"success": False, "error": "OpenAI API Key is missing"}
     
-    config = load_config()
+    config = get_config()
     try:
         system_prompt = config.get("prompts", {}).get("title_generation", "한국어 제목 생성기")
         system_prompt += "\n\n[CRITICAL REQUEST] All titles must be in KOREAN (한국어)."
         
-        response = client.chat.completions.create(
-            model="gpt-5-mini-2025-08-07",
+        response = await create_chat_completion(
+            client,
+            priority="interactive",
+            expect_json=True,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": f"스토리 요약:\n{req.storyPreview}"}
@@ -498,13 +747,15 @@ async def parse_script(req: ParseScriptRequest):
     if not client:
         return {"success": False, "error": "OpenAI API Key is missing"}
 
-    config = load_config()
+    config = get_config()
     try:
         system_prompt = config.get("prompts", {}).get("script_parsing", "Parse script to cuts JSON.")
         system_prompt = system_prompt.replace("{{script}}", req.script)
         
-        response = client.chat.completions.create(
-            model="gpt-5-mini-2025-08-07",
+        response = await create_chat_completion(
+            client,
+            priority="interactive",
+            expect_json=True,
             messages=[{"role": "system", "content": "You are a script parser JSON generator."}, {"role": "user", "content": system_prompt}]
         )
         output_text = response.choices[0].message.content
@@ -518,97 +769,99 @@ async def parse_script(req: ParseScriptRequest):
         return {"success": False, "error": str(e)}
 
 async def generate_veo_prompts_for_history(folder_name: str):
+    """Fill missing videoPrompts of one project (see VeoBackfill; progress is checkpointed per batch)"""
     import urllib.parse
+    from backend.services.veo_backfill import get_veo_backfill
     folder_name = urllib.parse.unquote(folder_name)
-    folder_path = os.path.join(OUTPUTS_DIR, folder_name)
-    meta_path = os.path.join(folder_path, "metadata.json")
-    
-    if not os.path.exists(meta_path):
-        return {"success": False, "error": "Metadata not found"}
-        
-    config = load_config()
-    client = get_openai_client()
-    if not client:
-        return {"success": False, "error": "OpenAI API Key is missing"}
 
+    result = {"success": False, "error": "Backfill did not complete"}
     try:
-        with open(meta_path, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-            
-        cuts_data = metadata.get("cuts_data", [])
-        updated_cuts = []
-        veo_prompt_template = config.get("prompts", {}).get("veo_video", "")
-
-        for cut in cuts_data:
-            if "videoPrompt" not in cut or not cut["videoPrompt"]:
-                prompt_text = veo_prompt_template
-                prompt_text = prompt_text.replace("{{scene_description}}", cut.get("description", ""))
-                prompt_text = prompt_text.replace("{{physics_detail}}", cut.get("physicsDetail", "None"))
-                
-                try:
-                    response = client.chat.completions.create(
-                        model="gpt-5-mini-2025-08-07",
-                        messages=[{"role": "system", "content": "Fill the template strictly."}, {"role": "user", "content": prompt_text}]
-                    )
-                    cut["videoPrompt"] = response.choices[0].message.content.strip()
-                    cut["veo_generated"] = True
-                except:
-                    cut["videoPrompt"] = "Gen Failed"
-            
-            updated_cuts.append(cut)
-            
-        metadata["cuts_data"] = updated_cuts
-        with open(meta_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=4, ensure_ascii=False)
-            
-        return {"success": True, "updated_cuts": updated_cuts}
-    except Exception as e:
-        return {"success": False, "error": str(e)}
-        return {"success": True, "updated_cuts": updated_cuts}
+        # Drain the generator completely so its project lock is released before returning
+        async for event in get_veo_backfill().backfill_project(folder_name):
+            if event["type"] == "project_error":
+                result = {"success": False, "error": event["message"]}
+            elif event["type"] == "project_done":
+                result = {"success": True, "updated_cuts": event["cuts_data"]}
+        return result
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-async def generate_veo_prompts_batch(cuts_metadata: List[dict]):
-    """
-    Batch generate Veo prompts for multiple cuts in one go.
-    cuts_metadata: list of dicts with keys 'cutNumber', 'description', 'physicsDetail', etc.
-    Returns: dict { cutIndex: prompt_string }
-    """
-    client = get_openai_client()
-    if not client: return {}
-
+VEO_BATCH_SYSTEM_PROMPT = (
+    "You are a Video Prompt Expert for Google Veo 3.1.\n"
+    "Generate optimized video prompts for the list of scenes provided.\n"
+    "Return ONLY a JSON Object with a key 'prompts' which is a list of objects: {\"cutNumber\": int, \"videoPrompt\": \"...\"}\n"
+    "Each videoPrompt must include visual style, camera movement, and lighting details."
+)
+VEO_OUTPUT_TOKENS_PER_CUT = 250  # a 5-element Veo prompt is roughly 120-180 English words
+
+def _veo_cut_line(cut: dict) -> str:
+    return f"[Cut {cut['cutNumber']}] Desc: {cut.get('description','')} | Physics: {cut.get('physicsDetail','')} | Emotion: {cut.get('emotionLevel','')}\n"
+
+def split_veo_batches(cuts_metadata: List[dict], max_batch_tokens: int) -> List[List[dict]]:
+    """Group cuts so each request's estimated prompt + output tokens stays under max_batch_tokens"""
+    batches, current, current_tokens = [], [], 0
+    for cut in cuts_metadata:
+        cost = estimate_tokens([{"content": _veo_cut_line(cut)}], VEO_OUTPUT_TOKENS_PER_CUT)
+        if current and current_tokens + cost > max_batch_tokens:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(cut)
+        current_tokens += cost
+    if current:
+        batches.append(current)
+    return batches
+
+async def _request_veo_batch(client, cuts: List[dict], cache: bool = True) -> dict:
     try:
-        # Construct Batch Prompt
-        descriptions_str = ""
-        for cut in cuts_metadata:
-            descriptions_str += f"[Cut {cut['cutNumber']}] Desc: {cut.get('description','')} | Physics: {cut.get('physicsDetail','')} | Emotion: {cut.get('emotionLevel','')}\n"
-
-        system_prompt = (
-            "You are a Video Prompt Expert for Google Veo 3.1.\n"
-            "Generate optimized video prompts for the list of scenes provided.\n"
-            "Return ONLY a JSON Object with a key 'prompts' which is a list of objects: {\"cutNumber\": int, \"videoPrompt\": \"...\"}\n"
-            "Each videoPrompt must include visual style, camera movement, and lighting details."
-        )
-
-        response = await asyncio.to_thread(
-            client.chat.completions.create,
-            model="gpt-5-mini-2025-08-07",
+        response = await create_chat_completion(
+            client,
+            priority="normal",
+            cache=cache,
             messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": descriptions_str}
+                {"role": "system", "content": VEO_BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": "".join(_veo_cut_line(cut) for cut in cuts)}
             ],
             response_format={"type": "json_object"}
         )
-        
-        content = response.choices[0].message.content
-        parsed = robust_parse_json(content)
-        
-        result_map = {}
-        if parsed and "prompts" in parsed:
-            for item in parsed["prompts"]:
-                result_map[item["cutNumber"]] = item["videoPrompt"]
-        
-        return result_map
+        parsed = robust_parse_json(response.choices[0].message.content)
     except Exception as e:
         print(f"Batch Veo Generation Error: {e}")
         return {}
+
+    result_map = {}
+    for item in (parsed or {}).get("prompts", []) if isinstance(parsed, dict) else []:
+        try:
+            cut_number = int(item["cutNumber"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if item.get("videoPrompt"):
+            result_map[cut_number] = item["videoPrompt"]
+    return result_map
+
+async def generate_veo_prompts_batch(cuts_metadata: List[dict], max_batch_tokens: int = None, repair_rounds: int = 2):
+    """
+    Generate Veo prompts for many cuts.
+    Cuts are split into token-budgeted batches that run concurrently; cutNumbers missing from the
+    replies are re-requested (only the gaps, bypassing the cache) up to `repair_rounds` times.
+    cuts_metadata: list of dicts with keys 'cutNumber', 'description', 'physicsDetail', etc.
+    Returns: dict { cutNumber: prompt_string }
+    """
+    client = get_openai_client()
+    if not client: return {}
+
+    if max_batch_tokens is None:
+        max_batch_tokens = int(get_config().get("veo_batch_max_tokens", 6000))
+    cuts = [{**cut, "cutNumber": cut.get("cutNumber", i + 1)} for i, cut in enumerate(cuts_metadata)]
+
+    result_map = {}
+    pending = cuts
+    for round_index in range(repair_rounds + 1):
+        batches = split_veo_batches(pending, max_batch_tokens)
+        for batch_map in await asyncio.gather(*(_request_veo_batch(client, batch, cache=round_index == 0) for batch in batches)):
+            result_map.update(batch_map)
+        pending = [cut for cut in pending if int(cut["cutNumber"]) not in result_map]
+        if not pending:
+            break
+        if round_index < repair_rounds:
+            print(f"[Veo Batch] {len(pending)} cuts missing, re-requesting (round {round_index + 1})")
+    return result_map
@@ -0,0 +1,154 @@
+import os
+import hashlib
+import zipfile
+from typing import Iterator, List, Optional, Tuple
+from backend.core.paths import OUTPUTS_DIR, CACHE_DIR
+from backend.services.project_store import CUTS_LOG_FILE
+
+ARCHIVE_CACHE_DIR = os.path.join(CACHE_DIR, "downloads")
+CHUNK_SIZE = 1024 * 1024
+# Already-compressed media: deflating them costs CPU and saves nothing
+STORED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.mp4', '.webm', '.zip')
+
+class _ChunkSink:
+    """Write-only file object for zipfile: collects output so it can be yielded chunk by chunk"""
+    def __init__(self, tee=None):
+        self._chunks: List[bytes] = []
+        self._tee = tee
+
+    def write(self, data) -> int:
+        if data:
+            data = bytes(data)
+            self._chunks.append(data)
+            if self._tee is not None:
+                self._tee.write(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def is_archived(name: str) -> bool:
+    """False for the per-cut log (folded into metadata.json) and half-written temp files"""
+    return name != CUTS_LOG_FILE and not name.startswith(".tmp_") and not name.endswith(".tmp")
+
+def project_files(folder_name: str) -> List[Tuple[str, str, int, int]]:
+    """(arcname, path, size, mtime_ns) of the files in a project folder that go into its ZIP, sorted by arcname"""
+    root = os.path.join(OUTPUTS_DIR, folder_name)
+    files = []
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            if not is_archived(name):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((os.path.relpath(path, root).replace(os.sep, "/"), path, st.st_size, st.st_mtime_ns))
+    files.sort()
+    return files
+
+def content_fingerprint(files: List[Tuple[str, str, int, int]]) -> str:
+    """Changes whenever a file is added, removed, resized or rewritten"""
+    digest = hashlib.sha1()
+    for arcname, _, size, mtime_ns in files:
+        if not is_archived(os.path.basename(arcname)):
+            continue
+        digest.update(f"{arcname}|{size}|{mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def iter_zip(files: List[Tuple[str, str, int, int]], tee=None) -> Iterator[bytes]:
+    """
+    Generate a ZIP archive of `files` on the fly (no temporary file).
+    Media entries are stored, everything else is deflated. The output is not seekable, so zipfile
+    writes a data descriptor after each entry. Blocking: iterate it from a thread.
+    """
+    sink = _ChunkSink(tee)
+    with zipfile.ZipFile(sink, "w", allowZip64=True) as zf:
+        for arcname, path, size, _ in files:
+            try:
+                zinfo = zipfile.ZipInfo.from_file(path, arcname)
+                zinfo.compress_type = zipfile.ZIP_STORED if arcname.lower().endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+                with open(path, "rb") as src, zf.open(zinfo, "w", force_zip64=size >= zipfile.ZIP64_LIMIT) as dst:
+                    while True:
+                        chunk = src.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+            except OSError as e:
+                # File vanished mid-download: skip it rather than break the archive
+                print(f"[Download] Skipping {arcname}: {e}")
+            data = sink.drain()
+            if data:
+                yield data
+    data = sink.drain()
+    if data:
+        yield data
+
+class ProjectArchiveCache:
+    """
+    Finished project ZIPs under CACHE_DIR/downloads, named by project and content fingerprint.
+    A download of an unchanged project is served from the cache; any change to the project's files
+    changes the fingerprint, and the stale archive is replaced by the next download.
+    """
+    def __init__(self, directory: str = ARCHIVE_CACHE_DIR):
+        self.directory = directory
+
+    def _prefix(self, folder_name: str) -> str:
+        return hashlib.sha1(folder_name.encode("utf-8")).hexdigest()[:16]
+
+    def path(self, folder_name: str, fingerprint: str) -> str:
+        return os.path.join(self.directory, f"{self._prefix(folder_name)}-{fingerprint}.zip")
+
+    def get(self, folder_name: str, fingerprint: str) -> Optional[str]:
+        path = self.path(folder_name, fingerprint)
+        return path if os.path.isfile(path) else None
+
+    def stream_and_store(self, folder_name: str, fingerprint: str, files) -> Iterator[bytes]:
+        """Stream the archive and keep a copy; the copy is only published if the stream completes"""
+        os.makedirs(self.directory, exist_ok=True)
+        final_path = self.path(folder_name, fingerprint)
+        tmp_path = f"{final_path}.{os.getpid()}.{id(files)}.tmp"
+        completed = False
+        try:
+            with open(tmp_path, "wb") as tee:
+                yield from iter_zip(files, tee)
+            completed = True
+        finally:
+            if completed:
+                os.replace(tmp_path, final_path)
+                self.invalidate(folder_name, keep=final_path)
+            else:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def invalidate(self, folder_name: str, keep: str = None):
+        """Remove cached archives of a project (except `keep`)"""
+        if not os.path.isdir(self.directory):
+            return
+        prefix = self._prefix(folder_name) + "-"
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(prefix) and name.endswith(".zip") and path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+_archive_cache: Optional[ProjectArchiveCache] = None
+
+def get_archive_cache() -> ProjectArchiveCache:
+    global _archive_cache
+    if _archive_cache is None:
+        _archive_cache = ProjectArchiveCache()
+    return _archive_cache
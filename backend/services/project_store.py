@@ -0,0 +1,136 @@
+import os
+import json
+import threading
+from typing import Dict, Optional
+from backend.core.utils import atomic_write_json
+
+METADATA_FILE = "metadata.json"
+CUTS_LOG_FILE = "cuts.jsonl"
+
+# Metadata the user can change (history title edit) while a job is still writing the project
+USER_META_FIELDS = ("title",)
+
+# Appends and compactions of one project must not interleave (a compaction removes the log)
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+def _lock(project_dir: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(os.path.normpath(project_dir), threading.Lock())
+
+def metadata_path(project_dir: str) -> str:
+    return os.path.join(project_dir, METADATA_FILE)
+
+def cuts_log_path(project_dir: str) -> str:
+    return os.path.join(project_dir, CUTS_LOG_FILE)
+
+def project_mtime(project_dir: str) -> Optional[float]:
+    """Latest change to the project's summary or log (None if it has no metadata.json)"""
+    try:
+        mtime = os.stat(metadata_path(project_dir)).st_mtime
+    except OSError:
+        return None
+    try:
+        return max(mtime, os.stat(cuts_log_path(project_dir)).st_mtime)
+    except OSError:
+        return mtime
+
+def _append(project_dir: str, records: list):
+    payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+    with _lock(project_dir), open(cuts_log_path(project_dir), "a+b") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                payload = b"\n" + payload  # don't glue onto a line torn by a crash
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+
+def append_cut(project_dir: str, index: int, cut: dict):
+    """Record a finished cut (replaces cuts_data[index])"""
+    _append(project_dir, [{"index": index, "cut": cut}])
+
+def update_cuts(project_dir: str, updates: Dict[int, dict]):
+    """Merge fields into existing cuts, e.g. {3: {"videoPrompt": "..."}}"""
+    _append(project_dir, [{"index": index, "update": fields} for index, fields in updates.items()])
+
+def update_meta(project_dir: str, fields: dict):
+    """Change top-level metadata fields (title, completed, ...)"""
+    _append(project_dir, [{"meta": fields}])
+
+def _replay(data: dict, log_path: str) -> dict:
+    cuts = list(data.get("cuts_data", []))
+    try:
+        f = open(log_path, "r", encoding="utf-8")
+    except OSError:
+        return data
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line after a crash
+            if "meta" in record:
+                data.update(record["meta"])
+                continue
+            index = record.get("index")
+            if not isinstance(index, int) or index < 0:
+                continue
+            while len(cuts) <= index:
+                cuts.append({})
+            if "cut" in record:
+                cuts[index] = record["cut"]
+            elif "update" in record:
+                cuts[index] = {**cuts[index], **record["update"]}
+    data["cuts_data"] = cuts
+    return data
+
+def read_project(project_dir: str) -> Optional[dict]:
+    """metadata.json with the per-cut log applied (None if the project has no readable metadata)"""
+    try:
+        with open(metadata_path(project_dir), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return _replay(data, cuts_log_path(project_dir))
+
+def _replace(project_dir: str, data: dict):
+    atomic_write_json(metadata_path(project_dir), data, indent=4, ensure_ascii=False)
+    try:
+        os.remove(cuts_log_path(project_dir))
+    except OSError:
+        pass
+
+def write_project(project_dir: str, data: dict):
+    """Replace the summary and drop the log it supersedes"""
+    with _lock(project_dir):
+        _replace(project_dir, data)
+
+def finalize_project(project_dir: str, data: dict) -> dict:
+    """
+    write_project for a job's final summary: user-edited metadata and cut fields recorded in the
+    log since the job started (e.g. Veo prompts) are kept. Returns what was written.
+    """
+    with _lock(project_dir):
+        current = read_project(project_dir)
+        if current:
+            data = {**data, **{field: current[field] for field in USER_META_FIELDS if field in current}}
+            cuts = list(data.get("cuts_data", []))
+            for index, cut in enumerate(current.get("cuts_data", [])[:len(cuts)]):
+                cuts[index] = {**cut, **cuts[index]}
+            data["cuts_data"] = cuts
+        _replace(project_dir, data)
+    return data
+
+def compact(project_dir: str) -> Optional[dict]:
+    """Fold the per-cut log into metadata.json"""
+    with _lock(project_dir):
+        if not os.path.exists(cuts_log_path(project_dir)):
+            return None
+        data = read_project(project_dir)
+        if data is None:
+            return None
+        atomic_write_json(metadata_path(project_dir), data, indent=4, ensure_ascii=False)
+        os.remove(cuts_log_path(project_dir))
+    return data
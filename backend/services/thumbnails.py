@@ -0,0 +1,110 @@
+import os
+import asyncio
+import hashlib
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+from backend.core.paths import OUTPUTS_DIR, CACHE_DIR
+from backend.core.config import get_config
+
+THUMBNAIL_DIR = os.path.join(CACHE_DIR, "thumbnails")
+THUMBNAIL_WIDTHS = (160, 320, 480, 640, 960, 1280)
+THUMBNAIL_FORMATS = {"webp": "WEBP", "jpeg": "JPEG", "jpg": "JPEG", "png": "PNG"}
+MEDIA_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg", "jpg": "image/jpeg", "png": "image/png"}
+
+def render_thumbnail(src: str, dst: str, width: int, fmt: str) -> str:
+    """Resize `src` to `width` (keeping aspect ratio) and save it as `dst`. Runs in a worker process."""
+    from PIL import Image
+    with Image.open(src) as img:
+        img.thumbnail((width, width * 4), Image.LANCZOS)
+        pil_format = THUMBNAIL_FORMATS[fmt]
+        if pil_format == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        tmp = f"{dst}.{os.getpid()}.tmp"
+        save_kwargs = {"quality": 82} if pil_format in ("WEBP", "JPEG") else {"optimize": True}
+        img.save(tmp, pil_format, **save_kwargs)
+    os.replace(tmp, dst)
+    return dst
+
+def snap_width(width: int) -> int:
+    """Round a requested width up to a cached size so the derivative cache stays small"""
+    return next((w for w in THUMBNAIL_WIDTHS if w >= width), THUMBNAIL_WIDTHS[-1])
+
+def thumbnail_url(folder_name: str, filename: str, width: int = 320, fmt: str = "webp") -> str:
+    return f"/api/thumbnails/{urllib.parse.quote(folder_name)}/{urllib.parse.quote(filename)}?w={width}&format={fmt}"
+
+class ThumbnailService:
+    """
+    Resized derivatives of images under OUTPUTS_DIR, cached in CACHE_DIR/thumbnails.
+
+    The cache key includes the source's mtime and size, so a regenerated cut gets a fresh thumbnail.
+    Resizing runs in a process pool (Pillow holds the GIL while decoding large PNGs); concurrent
+    requests for the same derivative share one job.
+    """
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, asyncio.Future] = {}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def resolve_source(self, rel_path: str) -> Optional[str]:
+        """Absolute path of an image under OUTPUTS_DIR (None for anything outside it or missing)"""
+        root = os.path.realpath(OUTPUTS_DIR)
+        src = os.path.realpath(os.path.join(root, rel_path))
+        if not src.startswith(root + os.sep) or not os.path.isfile(src):
+            return None
+        return src
+
+    def cache_path(self, src: str, width: int, fmt: str) -> str:
+        st = os.stat(src)
+        key = hashlib.sha1(f"{src}|{st.st_mtime_ns}|{st.st_size}".encode("utf-8")).hexdigest()
+        return os.path.join(THUMBNAIL_DIR, str(width), key[:2], f"{key}.{fmt}")
+
+    async def get(self, rel_path: str, width: int = 320, fmt: str = "webp") -> Optional[str]:
+        """Path of the cached derivative (rendered on demand), or None if the source does not exist"""
+        fmt = fmt.lower() if fmt and fmt.lower() in THUMBNAIL_FORMATS else "webp"
+        width = snap_width(int(width))
+        src = self.resolve_source(rel_path)
+        if src is None:
+            return None
+        dst = self.cache_path(src, width, fmt)
+        if os.path.exists(dst):
+            return dst
+
+        job = self._jobs.get(dst)
+        if job is None:
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            loop = asyncio.get_running_loop()
+            job = asyncio.ensure_future(loop.run_in_executor(self._executor(), render_thumbnail, src, dst, width, fmt))
+            self._jobs[dst] = job
+            job.add_done_callback(lambda _: self._jobs.pop(dst, None))
+        return await asyncio.shield(job)
+
+    def schedule(self, rel_path: str):
+        """Pre-render the configured thumbnail sizes for a freshly saved image (fire and forget)"""
+        widths = get_config().get("thumbnail_widths", [320])
+        fmt = get_config().get("thumbnail_format", "webp")
+        for width in widths:
+            task = asyncio.ensure_future(self.get(rel_path, width, fmt))
+            task.add_done_callback(_log_thumbnail_error)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+def _log_thumbnail_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[Thumbnails] Pre-render failed: {task.exception()}")
+
+_service: Optional[ThumbnailService] = None
+
+def get_thumbnail_service() -> ThumbnailService:
+    global _service
+    if _service is None:
+        _service = ThumbnailService(max_workers=int(get_config().get("thumbnail_workers", 2)))
+    return _service
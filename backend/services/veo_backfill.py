@@ -0,0 +1,120 @@
+import os
+import asyncio
+import urllib.parse
+from typing import AsyncGenerator, Dict, List
+from backend.core.paths import OUTPUTS_DIR
+from backend.core.config import get_config
+from backend.services.openai_service import get_openai_client, create_chat_completion
+from backend.services.history_index import get_history_index
+from backend.services.project_store import metadata_path, read_project, update_cuts, compact
+
+FAILED_PROMPTS = ("", "Gen Failed", "Generation Skipped/Failed")
+
+# One lock per project so two backfills never work on the same cuts at once
+_project_locks: Dict[str, asyncio.Lock] = {}
+
+def needs_video_prompt(cut: dict) -> bool:
+    return (cut.get("videoPrompt") or "").strip() in FAILED_PROMPTS
+
+def build_veo_prompt(template: str, cut: dict) -> str:
+    prompt_text = template
+    prompt_text = prompt_text.replace("{{cut_number}}", str(cut.get("cutNumber", "")))
+    prompt_text = prompt_text.replace("{{scene_description}}", cut.get("description", ""))
+    prompt_text = prompt_text.replace("{{physics_detail}}", cut.get("physicsDetail", "None"))
+    prompt_text = prompt_text.replace("{{sfx_guide}}", cut.get("sfxGuide", "Ambient sound"))
+    prompt_text = prompt_text.replace("{{emotion_level}}", str(cut.get("emotionLevel", 5)))
+    prompt_text = prompt_text.replace("{{character_tag}}", cut.get("characterTag", "Main Character"))
+    return prompt_text
+
+def list_backfill_projects() -> List[str]:
+    """Project folders under OUTPUTS_DIR that have a metadata.json"""
+    if not os.path.isdir(OUTPUTS_DIR):
+        return []
+    return sorted(
+        name for name in os.listdir(OUTPUTS_DIR)
+        if os.path.isfile(metadata_path(os.path.join(OUTPUTS_DIR, name)))
+    )
+
+class VeoBackfill:
+    """
+    Fills missing videoPrompt fields of finished projects.
+
+    Missing cuts are generated `batch_size` at a time (concurrently, through the shared LLM limiter
+    in the bulk lane). Each batch is appended to the project's cuts.jsonl (only the changed cuts are
+    written) and the log is compacted into metadata.json at the end, so an interrupted run resumes
+    where it stopped: cuts that already have a prompt are skipped.
+    run() yields progress dicts suitable for create_sse_event.
+    """
+    def __init__(self, batch_size: int = 8):
+        self.batch_size = max(1, batch_size)
+
+    async def _generate(self, client, template: str, cut: dict):
+        try:
+            response = await create_chat_completion(
+                client,
+                priority="bulk",
+                messages=[{"role": "system", "content": "Fill the template strictly."}, {"role": "user", "content": build_veo_prompt(template, cut)}]
+            )
+            return response.choices[0].message.content.strip(), None
+        except Exception as e:
+            return "Gen Failed", str(e)
+
+    async def backfill_project(self, folder_name: str) -> AsyncGenerator[dict, None]:
+        project_dir = os.path.join(OUTPUTS_DIR, folder_name)
+        if not os.path.exists(metadata_path(project_dir)):
+            yield {"type": "project_error", "folder": folder_name, "message": "Metadata not found"}
+            return
+        client = get_openai_client()
+        if not client:
+            yield {"type": "project_error", "folder": folder_name, "message": "OpenAI API Key is missing"}
+            return
+        template = get_config().get("prompts", {}).get("veo_video", "")
+
+        lock = _project_locks.setdefault(folder_name, asyncio.Lock())
+        async with lock:
+            metadata = await asyncio.to_thread(read_project, project_dir) or {}
+            cuts = metadata.get("cuts_data", [])
+            missing = [i for i, cut in enumerate(cuts) if needs_video_prompt(cut)]
+            yield {"type": "project_start", "folder": folder_name, "total": len(cuts), "missing": len(missing)}
+
+            done = failed = 0
+            for start in range(0, len(missing), self.batch_size):
+                batch = missing[start:start + self.batch_size]
+                results = await asyncio.gather(*(self._generate(client, template, cuts[i]) for i in batch))
+                updates = {}
+                for i, (prompt, error) in zip(batch, results):
+                    cuts[i]["videoPrompt"] = prompt
+                    updates[i] = {"videoPrompt": prompt}
+                    if error is None:
+                        cuts[i]["veo_generated"] = True
+                        updates[i]["veo_generated"] = True
+                        done += 1
+                    else:
+                        failed += 1
+                # Checkpoint: a crash after this point keeps every prompt generated so far
+                await asyncio.to_thread(update_cuts, project_dir, updates)
+                yield {
+                    "type": "progress", "folder": folder_name, "done": done, "failed": failed, "missing": len(missing),
+                    "cuts": [cuts[i].get("cutNumber", i + 1) for i in batch],
+                }
+
+            if missing:
+                await asyncio.to_thread(compact, project_dir)
+                await asyncio.to_thread(get_history_index().upsert_project, folder_name)
+            yield {"type": "project_done", "folder": folder_name, "generated": done, "failed": failed, "cuts_data": cuts}
+
+    async def run(self, folder_names: List[str] = None) -> AsyncGenerator[dict, None]:
+        """Backfill the given projects (all projects under OUTPUTS_DIR when None) one after another"""
+        folders = [urllib.parse.unquote(f) for f in folder_names] if folder_names else list_backfill_projects()
+        generated = failed = 0
+        for folder_name in folders:
+            async for event in self.backfill_project(folder_name):
+                if event["type"] == "project_done":
+                    generated += event["generated"]
+                    failed += event["failed"]
+                    event = {k: v for k, v in event.items() if k != "cuts_data"}
+                yield event
+        yield {"type": "complete", "projects": len(folders), "generated": generated, "failed": failed}
+
+def get_veo_backfill() -> VeoBackfill:
+    return VeoBackfill(batch_size=int(get_config().get("veo_backfill_batch_size", 8)))
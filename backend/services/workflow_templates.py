@@ -0,0 +1,111 @@
+import os
+import re
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+from backend.core.paths import BASE_DIR
+
+WORKFLOWS_DIR = os.path.join(BASE_DIR, "workflows")
+
+PLACEHOLDER_RE = re.compile(r"([A-Z][A-Z0-9_]*?)_PLACEHOLDER")
+
+# Typed parameters patched by node class: (class_type, input name, replacement key, apply falsy values such as seed 0)
+TYPED_SLOTS = [
+    ("CheckpointLoaderSimple", "ckpt_name", "ckpt_name", False),
+    ("EmptyLatentImage", "width", "width", False),
+    ("EmptyLatentImage", "height", "height", False),
+    ("KSampler", "steps", "steps", False),
+    ("KSampler", "cfg", "cfg", False),
+    ("KSampler", "sampler_name", "sampler_name", False),
+    ("KSampler", "scheduler", "scheduler", False),
+    ("KSampler", "seed", "seed", True),
+]
+
+class CompiledWorkflow:
+    """
+    A workflow template parsed once and compiled into a patch plan:
+    the exact (node_id, input) slots for each typed parameter and each *_PLACEHOLDER string.
+    instantiate() copies only the nodes it patches; untouched nodes are shared with the
+    template, so the result must be treated as read-only.
+    """
+    def __init__(self, graph: dict, name: str = "", mtime: float = None):
+        self.name = name
+        self.mtime = mtime
+        self.graph = graph
+        # (node_id, input, key, allow_zero) - falsy values are skipped unless allow_zero
+        self.typed_slots: List[Tuple[str, str, str, bool]] = []
+        # (node_id, input, template string, [(placeholder, candidate keys), ...])
+        self.string_slots: List[Tuple[str, str, str, List[Tuple[str, List[str]]]]] = []
+        self._compile()
+        self.patched_nodes = sorted({s[0] for s in self.typed_slots} | {s[0] for s in self.string_slots})
+
+    @staticmethod
+    def _candidate_keys(token: str) -> List[str]:
+        """"MY_CUT_NUMBER" -> ["my_cut_number", "cut_number", "number"] (longest key first)"""
+        parts = token.lower().split("_")
+        return ["_".join(parts[i:]) for i in range(len(parts)) if parts[i]]
+
+    def _compile(self):
+        for node_id, node in self.graph.items():
+            class_type = node.get("class_type")
+            inputs = node.get("inputs", {})
+            for slot_class, input_name, key, allow_zero in TYPED_SLOTS:
+                if class_type == slot_class:
+                    self.typed_slots.append((node_id, input_name, key, allow_zero))
+            for input_name, value in inputs.items():
+                if isinstance(value, str):
+                    tokens = [(m.group(0), self._candidate_keys(m.group(1))) for m in PLACEHOLDER_RE.finditer(value)]
+                    if tokens:
+                        self.string_slots.append((node_id, input_name, value, tokens))
+
+    def instantiate(self, replacements: dict) -> dict:
+        workflow = dict(self.graph)
+        patched = {}
+        for node_id in self.patched_nodes:
+            node = self.graph[node_id]
+            patched[node_id] = {**node, "inputs": dict(node.get("inputs", {}))}
+        typed_done = set()
+        for node_id, input_name, key, allow_zero in self.typed_slots:
+            value = replacements.get(key)
+            if value is None or (not value and not allow_zero):
+                continue
+            patched[node_id]["inputs"][input_name] = value
+            typed_done.add((node_id, input_name))
+        for node_id, input_name, template, tokens in self.string_slots:
+            if (node_id, input_name) in typed_done:
+                continue
+            value = template
+            for _, keys in tokens:
+                key = next((k for k in keys if k in replacements), None)
+                if key is not None:
+                    value = value.replace(f"{key.upper()}_PLACEHOLDER", str(replacements[key]))
+            patched[node_id]["inputs"][input_name] = value
+        workflow.update(patched)
+        return workflow
+
+class WorkflowTemplateCache:
+    """Compiled templates by name, recompiled when the JSON file's mtime changes"""
+    def __init__(self, directory: str = WORKFLOWS_DIR):
+        self.directory = directory
+        self._templates: Dict[str, CompiledWorkflow] = {}
+        self._lock = threading.Lock()
+
+    def get(self, workflow_name: str) -> Optional[CompiledWorkflow]:
+        path = os.path.join(self.directory, f"{workflow_name}.json")
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            self._templates.pop(workflow_name, None)
+            return None
+        compiled = self._templates.get(workflow_name)
+        if compiled is not None and compiled.mtime == mtime:
+            return compiled
+        with self._lock:
+            compiled = self._templates.get(workflow_name)
+            if compiled is None or compiled.mtime != mtime:
+                with open(path, 'r', encoding='utf-8') as f:
+                    compiled = CompiledWorkflow(json.load(f), name=workflow_name, mtime=mtime)
+                self._templates[workflow_name] = compiled
+            return compiled
+
+template_cache = WorkflowTemplateCache()
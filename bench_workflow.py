@@ -0,0 +1,61 @@
+import sys
+import os
+import json
+import copy
+import timeit
+
+# Context setup
+sys.path.append(os.getcwd())
+from backend.services.workflow_templates import WORKFLOWS_DIR, template_cache
+
+def legacy_prepare_workflow(workflow_name, replacements):
+    """Previous per-cut path: read the JSON, deepcopy, scan every input for placeholders"""
+    with open(os.path.join(WORKFLOWS_DIR, f"{workflow_name}.json"), 'r', encoding='utf-8') as f:
+        workflow = copy.deepcopy(json.load(f))
+    for node in workflow.values():
+        inputs = node.get("inputs", {})
+        if replacements.get("ckpt_name") and node.get("class_type") == "CheckpointLoaderSimple":
+            inputs["ckpt_name"] = replacements["ckpt_name"]
+        if node.get("class_type") == "EmptyLatentImage":
+            inputs["width"] = replacements["width"]
+            inputs["height"] = replacements["height"]
+        if node.get("class_type") == "KSampler":
+            for key in ("steps", "cfg", "sampler_name", "scheduler", "seed"):
+                inputs[key] = replacements[key]
+        for key, value in inputs.items():
+            if isinstance(value, str):
+                for rk, rv in replacements.items():
+                    placeholder = f"{rk.upper()}_PLACEHOLDER"
+                    if placeholder in value:
+                        inputs[key] = value.replace(placeholder, str(rv))
+    return workflow
+
+def compiled_prepare_workflow(workflow_name, replacements):
+    return template_cache.get(workflow_name).instantiate(replacements)
+
+def main():
+    # Usage: python bench_workflow.py [iterations]
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    replacements = {
+        "positive_prompt": "cinematic shot, " * 40, "negative_prompt": "blurry, lowres", "seed": 1234,
+        "cut_number": 7, "ckpt_name": "RealVisXL_V5.0.safetensors", "width": 1920, "height": 1080,
+        "steps": 30, "cfg": 7.5, "sampler_name": "dpmpp_2m", "scheduler": "karras",
+        "reference_image": "akitect_ref.png", "ipadapter_file": "ip-adapter-plus_sdxl_vit-h.safetensors",
+    }
+
+    for name in ("base_generation", "reference_generation"):
+        legacy = legacy_prepare_workflow(name, replacements)
+        compiled = compiled_prepare_workflow(name, replacements)
+        if json.dumps(legacy, sort_keys=True) != json.dumps(compiled, sort_keys=True):
+            print(f"❌ {name}: compiled output differs from legacy output")
+            sys.exit(1)
+
+        legacy_s = timeit.timeit(lambda: legacy_prepare_workflow(name, replacements), number=iterations)
+        compiled_s = timeit.timeit(lambda: compiled_prepare_workflow(name, replacements), number=iterations)
+        print(f"{name}: {iterations} cuts")
+        print(f"  legacy   (load + deepcopy + scan): {legacy_s / iterations * 1e6:8.1f} us/cut")
+        print(f"  compiled (patch plan):             {compiled_s / iterations * 1e6:8.1f} us/cut")
+        print(f"  speedup: {legacy_s / compiled_s:.1f}x")
+
+if __name__ == "__main__":
+    main()
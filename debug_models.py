@@ -17,7 +17,8 @@ except ImportError:
     sys.exit(1)
 
 def main():
-    server_address = "127.0.0.1:8188"
+    # Usage: python debug_models.py [host:port]  (defaults to COMFYUI_SERVER_ADDRESS or 127.0.0.1:8188)
+    server_address = sys.argv[1] if len(sys.argv) > 1 else os.getenv("COMFYUI_SERVER_ADDRESS", "127.0.0.1:8188")
     client = ComfyUIClient(server_address)
     
     print(f"Connecting to ComfyUI at {server_address}...")
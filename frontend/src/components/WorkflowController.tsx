@@ -89,6 +89,8 @@ export default function WorkflowController({ onNavigate }: { onNavigate?: (tab:
     // 이미지 참조 기능 사용 여부 (설정에서 불러옴)
     const [useReferenceImage, setUseReferenceImage] = useState(true);
     const logEndRef = useRef<HTMLDivElement>(null);
+    // 현재 생성 작업 ID (중단/조기 종료 요청 대상)
+    const currentJobIdRef = useRef<string | null>(null);
 
     const [backendStatus, setBackendStatus] = useState<'checking' | 'connected' | 'error'>('checking');
 
@@ -511,7 +513,7 @@ export default function WorkflowController({ onNavigate }: { onNavigate?: (tab:
             const response = await fetch('http://localhost:3501/api/workflow/control', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ action })
+                body: JSON.stringify({ action, jobId: currentJobIdRef.current || '' })
             });
             const data = await response.json();
             if (!data.success) {
@@ -552,7 +554,9 @@ export default function WorkflowController({ onNavigate }: { onNavigate?: (tab:
         const setupEventSource = (eventSource: EventSource) => {
             eventSource.onmessage = (event) => {
                 const data = JSON.parse(event.data);
-                if (data.type === 'log') {
+                if (data.type === 'job') {
+                    currentJobIdRef.current = data.jobId;
+                } else if (data.type === 'log') {
                     setState(s => ({ ...s, logs: [...s.logs, data.message], currentCutIndex: data.cutIndex || s.currentCutIndex }));
                 } else if (data.type === 'preview') {
                     setState(s => ({ ...s, currentImage: data.image, currentCutIndex: data.cutIndex || s.currentCutIndex }));
@@ -573,13 +577,16 @@ export default function WorkflowController({ onNavigate }: { onNavigate?: (tab:
                         setState(s => ({ ...s, logs: [...s.logs, `❌ ERROR: ${data.message}`], isProcessing: false }));
                         alert(`오류 발생: ${data.message}`);
                     }
+                    currentJobIdRef.current = null;
                     eventSource.close();
                 } else if (data.type === 'done') {
+                    currentJobIdRef.current = null;
                     eventSource.close();
                     fetchTitles();
                 }
             };
             eventSource.onerror = () => {
+                currentJobIdRef.current = null;
                 eventSource.close();
                 setState(s => ({ ...s, isProcessing: false }));
             };
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make the `backend` package importable (same as backend/main.py does)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
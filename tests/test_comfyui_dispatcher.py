@@ -0,0 +1,176 @@
+import asyncio
+import itertools
+import uuid
+
+import pytest
+
+for module in ("httpx", "websocket", "websockets", "openai", "sse_starlette", "psutil"):
+    pytest.importorskip(module)
+
+import httpx
+
+from backend.services import comfyui_dispatcher
+from backend.services.comfyui_dispatcher import ComfyUICapabilityError, ComfyUIDispatcher
+from backend.services.comfyui_events import close_event_listeners
+from backend.services.comfyui_service import get_comfyui_client
+from backend.services.generation import RenderPipeline
+
+CHECKPOINTS = {"input": {"required": {"ckpt_name": [["base.safetensors", "other.safetensors"]]}}}
+OBJECT_INFO = {
+    "http://basic": {"CheckpointLoaderSimple": CHECKPOINTS, "KSampler": {}},
+    "http://ipadapter": {"CheckpointLoaderSimple": CHECKPOINTS, "KSampler": {}, "IPAdapterAdvanced": {}},
+}
+
+
+class _FakeRegistry:
+    async def get_object_info(self, server_address=None):
+        return OBJECT_INFO[server_address]
+
+    async def has_node(self, node_class, server_address=None):
+        return node_class in OBJECT_INFO[server_address]
+
+
+def _workflow(ckpt_name, *extra):
+    workflow = {"1": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": ckpt_name}}}
+    for i, class_type in enumerate(extra, start=2):
+        workflow[str(i)] = {"class_type": class_type, "inputs": {}}
+    return workflow
+
+
+@pytest.fixture
+def dispatcher(monkeypatch):
+    monkeypatch.setattr(comfyui_dispatcher, "get_node_registry", lambda: _FakeRegistry())
+    dispatcher = ComfyUIDispatcher(list(OBJECT_INFO))
+
+    async def refresh(force=False):
+        pass
+    dispatcher.refresh = refresh
+    # The basic node is idle, so it wins whenever it can run the workflow
+    dispatcher.nodes[1].queue_depth = 5
+    return dispatcher
+
+
+def test_pick_skips_nodes_without_required_node_classes(dispatcher):
+    node = asyncio.run(dispatcher.pick(workflow=_workflow("base.safetensors", "IPAdapterAdvanced")))
+    assert node.address == "http://ipadapter"
+    node = asyncio.run(dispatcher.pick(workflow=_workflow("base.safetensors", "KSampler")))
+    assert node.address == "http://basic"
+
+
+def test_pick_reports_missing_models(dispatcher):
+    with pytest.raises(ComfyUICapabilityError, match="missing.safetensors"):
+        asyncio.run(dispatcher.pick(workflow=_workflow("missing.safetensors")))
+
+
+def test_nodes_with(dispatcher):
+    nodes = asyncio.run(dispatcher.nodes_with("IPAdapterAdvanced"))
+    assert [n.address for n in nodes] == ["http://ipadapter"]
+
+
+# --- Stand-in ComfyUI servers (httpx.MockTransport behind the real AsyncComfyUIClient) ---
+
+_ports = itertools.count(39100)
+
+
+class _StandIn:
+    """Answers /queue, /object_info, /prompt and /history like ComfyUI; `failure` breaks it"""
+    def __init__(self, queue_depth=0):
+        self.address = f"127.0.0.1:{next(_ports)}"
+        self.queue_depth = queue_depth
+        self.failure = None  # None | "500" | "closed"
+        self.prompts = []
+        get_comfyui_client(self.address)._http = httpx.AsyncClient(
+            base_url=f"http://{self.address}", transport=httpx.MockTransport(self.handle))
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if self.failure == "closed":
+            raise httpx.RemoteProtocolError("Server disconnected without sending a response.", request=request)
+        if self.failure == "500" and path == "/prompt":
+            return httpx.Response(500, text="Internal Server Error")
+        if path == "/queue":
+            running = [[i, f"other-{i}"] for i in range(self.queue_depth)]
+            return httpx.Response(200, json={"queue_running": running[:1], "queue_pending": running[1:]})
+        if path == "/object_info":
+            return httpx.Response(200, json=OBJECT_INFO["http://basic"])
+        if path == "/prompt":
+            prompt_id = str(uuid.uuid4())
+            self.prompts.append(prompt_id)
+            return httpx.Response(200, json={"prompt_id": prompt_id, "number": len(self.prompts)})
+        if path.startswith("/history/"):
+            prompt_id = path.rsplit("/", 1)[-1]
+            entry = {"outputs": {"9": {"images": [{"filename": "out.png"}]}}, "status": {"status_str": "success", "completed": True}}
+            return httpx.Response(200, json={prompt_id: entry} if prompt_id in self.prompts else {})
+        return httpx.Response(200, json={})
+
+
+def _stand_in_dispatcher(*stand_ins):
+    dispatcher = ComfyUIDispatcher([s.address for s in stand_ins])
+    dispatcher.nodes[0].cut_seconds = dispatcher.nodes[1].cut_seconds = 1.0
+    return dispatcher
+
+
+def test_submit_avoids_the_node_with_the_deeper_queue():
+    async def scenario():
+        busy, idle = _StandIn(queue_depth=4), _StandIn(queue_depth=0)
+        node, prompt_id = await _stand_in_dispatcher(busy, idle).submit(_workflow("base.safetensors"))
+        return node.address, idle, busy, prompt_id
+
+    address, idle, busy, prompt_id = asyncio.run(scenario())
+    assert address == idle.address
+    assert idle.prompts == [prompt_id] and busy.prompts == []
+
+
+def test_submit_weighs_queue_depth_by_per_cut_latency():
+    async def scenario():
+        slow, fast = _StandIn(queue_depth=1), _StandIn(queue_depth=2)
+        dispatcher = _stand_in_dispatcher(slow, fast)
+        dispatcher.nodes[0].cut_seconds, dispatcher.nodes[1].cut_seconds = 30.0, 2.0
+        node, _ = await dispatcher.submit(_workflow("base.safetensors"))
+        return node.address, fast.address
+
+    address, fast_address = asyncio.run(scenario())
+    assert address == fast_address
+
+
+@pytest.mark.parametrize("failure", ["500", "closed"])
+def test_submit_requeues_on_the_other_node_when_one_fails(failure):
+    async def scenario():
+        broken, healthy = _StandIn(queue_depth=0), _StandIn(queue_depth=3)
+        dispatcher = _stand_in_dispatcher(broken, healthy)
+        await dispatcher.refresh(force=True)
+        broken.failure = failure  # fails only once it is picked
+        node, prompt_id = await dispatcher.submit(_workflow("base.safetensors"))
+        return node.address, healthy, prompt_id, dispatcher.nodes[0].healthy
+
+    address, healthy, prompt_id, broken_healthy = asyncio.run(scenario())
+    assert address == healthy.address
+    assert healthy.prompts == [prompt_id]
+    assert not broken_healthy
+
+
+def test_cut_moves_to_another_node_when_its_node_dies_while_rendering():
+    async def scenario():
+        dying, spare = _StandIn(queue_depth=0), _StandIn(queue_depth=3)
+        dispatcher = _stand_in_dispatcher(dying, spare)
+        workflow = _workflow("base.safetensors")
+        node, prompt_id = await dispatcher.submit(workflow)
+        assert node.address == dying.address
+        dying.failure = "closed"
+
+        pipeline = RenderPipeline(
+            dispatcher=dispatcher, config={}, params={}, cuts=[], project_dir="", folder_name="project",
+            selected_model="base.safetensors", selected_ipadapter="", reference_image="", comfyui_input_dir=None,
+            use_reference_chaining=False,
+        )
+        job = {"index": 0, "workflow": workflow, "node": node, "prompt_id": prompt_id}
+        try:
+            entry = await asyncio.wait_for(pipeline._wait_with_failover(job), timeout=10)
+        finally:
+            await close_event_listeners()
+        return entry, job, spare
+
+    entry, job, spare = asyncio.run(scenario())
+    assert job["node"].address == spare.address
+    assert spare.prompts == [job["prompt_id"]]
+    assert entry["status"]["status_str"] == "success"
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from backend.services.job_scheduler import JobScheduler
+
+
+def test_stopping_a_queued_job_cancels_its_admission():
+    async def scenario():
+        scheduler = JobScheduler(max_jobs=1)
+        running = scheduler.register("running")
+        assert await scheduler.admit(running)
+
+        stopped = scheduler.register("stopped")
+        finished = scheduler.register("finished")
+        admissions = [asyncio.create_task(scheduler.admit(stopped)), asyncio.create_task(scheduler.admit(finished))]
+        await asyncio.sleep(0)
+        assert scheduler.control("stopped", "stop")
+        assert scheduler.control("finished", "finish_early")
+        results = await asyncio.wait_for(asyncio.gather(*admissions), timeout=1)
+        for state in (stopped, finished):
+            scheduler.finish(state)
+
+        # The slot held by the running job was never handed to the cancelled ones
+        scheduler.finish(running)
+        later = scheduler.register("later")
+        admitted = await asyncio.wait_for(scheduler.admit(later), timeout=1)
+        return results, stopped.status, finished.status, admitted
+
+    results, stopped_status, finished_status, admitted = asyncio.run(scenario())
+    assert results == [False, False]
+    assert stopped_status == finished_status == "done"
+    assert admitted
+
+
+def test_register_rejects_an_active_job_id():
+    scheduler = JobScheduler()
+    state = scheduler.register("job")
+    with pytest.raises(ValueError):
+        scheduler.register("job")
+    scheduler.finish(state)
+    assert scheduler.register("job") is not state
+
+
+def test_stopping_a_job_wakes_its_wait_for_a_prompt_slot():
+    async def scenario():
+        scheduler = JobScheduler(max_jobs=2, max_inflight_prompts=1)
+        busy, stopped = scheduler.register("busy"), scheduler.register("stopped")
+        for state in (busy, stopped):
+            assert await scheduler.admit(state)
+        assert await scheduler.acquire_prompt(busy)
+
+        waiting = asyncio.create_task(scheduler.acquire_prompt(stopped))
+        await asyncio.sleep(0)
+        assert scheduler.control("stopped", "stop")
+        acquired = await asyncio.wait_for(waiting, timeout=1)
+        # Later requests of the stopped job don't queue at all
+        again = await asyncio.wait_for(scheduler.acquire_prompt(stopped), timeout=1)
+        return acquired, again, stopped.in_flight, scheduler.status()["inflightPrompts"]
+
+    acquired, again, in_flight, inflight_prompts = asyncio.run(scenario())
+    assert acquired is False and again is False
+    assert in_flight == 0
+    assert inflight_prompts == 1
@@ -0,0 +1,18 @@
+import time
+
+from backend.services.job_store import JobStore
+
+
+def test_prune_drops_abandoned_jobs_of_any_status(tmp_path):
+    store = JobStore(db_path=str(tmp_path / "jobs.db"), retention_days=1)
+    for job_id, status in (("queued", None), ("running", "running"), ("stopped", "stopped"), ("error", "error")):
+        store.create_job(job_id, "generation", {})
+        if status:
+            store.set_status(job_id, status)
+        store.record_prompt(job_id, 0, {"prompt_id": "p"})
+    with store._connect() as db:
+        db.execute("UPDATE jobs SET updated_at = ?", (time.time() - 2 * 86400,))
+    store.create_job("fresh", "generation", {})
+
+    assert [job["job_id"] for job in store.list_jobs()] == ["fresh"]
+    assert store.pending_prompts("running") == {}
@@ -0,0 +1,75 @@
+import asyncio
+import time
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+pytest.importorskip("sse_starlette")
+
+from backend.services import openai_service
+from backend.services.llm_limiter import LLMRateLimiter
+
+LLM_LATENCY = 0.5
+TICK = 0.01
+
+class _FakeCompletions:
+    async def create(self, **kwargs):
+        await asyncio.sleep(LLM_LATENCY)  # a slow API call that only waits on I/O
+        message = type("Message", (), {"content": "ok"})()
+        choice = type("Choice", (), {"message": message, "finish_reason": "stop"})()
+        usage = type("Usage", (), {"total_tokens": 10})()
+        return type("Completion", (), {"choices": [choice], "usage": usage})()
+
+class _FakeAsyncOpenAI:
+    def __init__(self, **kwargs):
+        self.chat = type("Chat", (), {"completions": _FakeCompletions()})()
+
+    async def close(self):
+        pass
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    monkeypatch.setattr(openai_service, "AsyncOpenAI", _FakeAsyncOpenAI)
+    monkeypatch.setattr(openai_service, "get_config", lambda: {"openai_api_key": "test-key"})
+    monkeypatch.setattr(openai_service, "get_llm_limiter", lambda: LLMRateLimiter())
+    monkeypatch.setattr(openai_service, "_openai_client", None)
+
+def test_event_loop_stays_responsive_during_llm_calls(fake_openai):
+    async def scenario():
+        lags = []
+        stop = asyncio.Event()
+
+        async def ticker():
+            while not stop.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(TICK)
+                lags.append(time.perf_counter() - started - TICK)
+
+        ticker_task = asyncio.create_task(ticker())
+        client = openai_service.get_openai_client()
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(
+            openai_service.create_chat_completion(client, [{"role": "user", "content": f"call {i}"}], cache=False)
+            for i in range(8)
+        ))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await ticker_task
+        return responses, lags, elapsed
+
+    responses, lags, elapsed = asyncio.run(scenario())
+    assert [r.choices[0].message.content for r in responses] == ["ok"] * 8
+    # Calls overlap instead of running one after another
+    assert elapsed < LLM_LATENCY * 3
+    # The loop kept ticking the whole time
+    assert len(lags) > LLM_LATENCY / TICK / 2
+    assert max(lags) < 0.1
+
+def test_only_complete_parseable_replies_are_cached():
+    json_call = {"response_format": {"type": "json_object"}}
+    assert openai_service._cacheable('{"cuts": []}', "stop", json_call, False)
+    assert not openai_service._cacheable('{"cuts": [', "length", json_call, False)
+    assert not openai_service._cacheable("not json", "stop", json_call, False)
+    assert not openai_service._cacheable("no titles here", "stop", {}, True)
+    assert openai_service._cacheable("A plain reply", "stop", {}, False)
+    assert not openai_service._cacheable("", "stop", {}, False)
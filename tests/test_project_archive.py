@@ -0,0 +1,20 @@
+from backend.services import project_archive
+from backend.services.project_archive import content_fingerprint, project_files
+from backend.services.project_store import append_cut, write_project
+
+
+def test_log_and_temp_files_stay_out_of_the_archive_and_fingerprint(tmp_path, monkeypatch):
+    monkeypatch.setattr(project_archive, "OUTPUTS_DIR", str(tmp_path))
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    write_project(str(project_dir), {"title": "Project", "cuts_data": []})
+    (project_dir / "cut_000_1.png").write_bytes(b"png")
+    (project_dir / ".tmp_abc.json").write_text("{")
+    (project_dir / "archive.zip.123.tmp").write_bytes(b"")
+
+    before = project_files("project")
+    append_cut(str(project_dir), 0, {"filename": "cut_000_1.png"})
+    after = project_files("project")
+
+    assert [arcname for arcname, *_ in after] == ["cut_000_1.png", "metadata.json"]
+    assert content_fingerprint(after) == content_fingerprint(before)
@@ -0,0 +1,20 @@
+from backend.services.project_store import append_cut, finalize_project, read_project, update_cuts, update_meta, write_project
+
+
+def test_finalize_keeps_title_and_log_fields_written_during_the_job(tmp_path):
+    project_dir = str(tmp_path)
+    write_project(project_dir, {"title": "Draft", "completed": False, "cuts_data": [{}, {}]})
+    append_cut(project_dir, 0, {"description": "first", "filename": "cut_000.png"})
+    update_meta(project_dir, {"title": "Renamed"})
+    update_cuts(project_dir, {1: {"videoPrompt": "pan left"}})
+
+    final = {"title": "Draft", "completed": True, "cuts_data": [
+        {"description": "first", "filename": "cut_000.png"}, {"description": "second", "filename": "cut_001.png"},
+    ]}
+    written = finalize_project(project_dir, final)
+
+    assert read_project(project_dir) == written
+    assert written["title"] == "Renamed"
+    assert written["completed"] is True
+    assert written["cuts_data"][1] == {"description": "second", "filename": "cut_001.png", "videoPrompt": "pan left"}
+    assert not (tmp_path / "cuts.jsonl").exists()
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+for module in ("openai", "httpx", "sse_starlette", "websockets", "psutil"):
+    pytest.importorskip(module)
+
+from backend.services.generation import RenderPipeline
+from backend.services.job_scheduler import JobState
+
+
+class _FakeClient:
+    def __init__(self):
+        self.deleted = []
+
+    async def get_queue(self):
+        return {"queue_running": [[0, "p0"]], "queue_pending": []}
+
+    async def delete_from_queue(self, prompt_ids):
+        self.deleted.extend(prompt_ids)
+
+
+class _FakeNode:
+    address = "http://stand-in"
+
+    def __init__(self):
+        self.client = _FakeClient()
+
+
+class _FakeDispatcher:
+    """Prompts never finish: the job can only end through stop"""
+    def __init__(self):
+        self.node = _FakeNode()
+
+    def healthy_nodes(self):
+        return [self.node]
+
+    def forget(self, node, prompt_id):
+        pass
+
+    async def wait(self, node, prompt_id, timeout=120, poll_history=False):
+        await asyncio.Event().wait()
+
+
+def test_stop_drops_queued_prompts_while_every_slot_is_busy(tmp_path, monkeypatch):
+    async def scenario():
+        dispatcher = _FakeDispatcher()
+        state = JobState("job")
+        state.status = "running"
+        pipeline = RenderPipeline(
+            dispatcher=dispatcher, config={"preview_mode": "off"}, params={"total_cuts": 4},
+            cuts=[{} for _ in range(4)], project_dir=str(tmp_path), folder_name="project",
+            selected_model="model", selected_ipadapter="", reference_image="", comfyui_input_dir=None,
+            use_reference_chaining=False, depth=2, state=state,
+        )
+        submitted = []
+
+        async def submit_cut(i, cut, cut_number):
+            submitted.append(i)
+            return {"index": i, "cut": cut, "cut_number": cut_number, "seed": 1, "workflow": {},
+                    "model_key": "", "node": dispatcher.node, "prompt_id": f"p{i}", "veo_task": None}
+        monkeypatch.setattr(pipeline, "_submit_cut", submit_cut)
+
+        events = []
+
+        async def consume():
+            async for event in pipeline.run():
+                events.append(event)
+
+        runner = asyncio.create_task(consume())
+        while len(submitted) < 2:
+            await asyncio.sleep(0.01)
+        state.request("stop")
+        await asyncio.wait_for(runner, timeout=2)
+        return pipeline, submitted, dispatcher.node.client.deleted, events
+
+    pipeline, submitted, deleted, events = asyncio.run(scenario())
+    assert pipeline.stopped
+    assert submitted == [0, 1]
+    assert deleted == ["p1"]  # p0 is running and is left alone
+    assert not any("생성 완료" in event["data"] for event in events)